@@ -6,11 +6,14 @@ DATA_FILES = [
     ('templates', ['src/meadow/web/templates/base.html',
                   'src/meadow/web/templates/viewer.html',
                   'src/meadow/web/templates/settings.html',
-                  'src/meadow/web/templates/pdf_upload.html']),
+                  'src/meadow/web/templates/pdf_upload.html',
+                  'src/meadow/web/templates/usage.html']),
     ('static/css', ['src/meadow/web/static/css/styles.css',
                     'src/meadow/web/static/css/pdf_upload.css']),
     ('static/js', ['src/meadow/web/static/js/settings.js',
-                   'src/meadow/web/static/js/sort.js']),
+                   'src/meadow/web/static/js/sort.js',
+                   'src/meadow/web/static/js/search.js',
+                   'src/meadow/web/static/js/events.js']),
     ('resources', ['src/meadow/resources/icon.png'])
 ]
 OPTIONS = {
@@ -36,7 +39,7 @@ setup(
     package_dir={'': 'src'},
     install_requires=[
         'numpy>=1.26.0',
-        'anthropic>=0.37.1',
+        'anthropic>=0.40.0',  # messages.batches
         'pyobjc-framework-Vision>=10.3.1',
         'Flask>=3.0.3',
         'Pillow>=11.0.0',
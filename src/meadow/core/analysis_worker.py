@@ -0,0 +1,294 @@
+"""Analysis pipeline in its own process, so OCR, embeddings and log writes never hold the menubar's GIL"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from meadow.core.ocr_engines import cgimage_to_array
+
+# Tunable Parameters
+# -----------------
+# Captures sent to the worker and not yet finished; further captures are dropped
+WORKER_MAX_PENDING = 8
+# Seconds before restarting a crashed worker, doubled after each crash that
+# comes soon after a restart, up to WORKER_MAX_RESTART_DELAY
+WORKER_RESTART_DELAY = 1
+WORKER_MAX_RESTART_DELAY = 60
+# A worker that ran this long before crashing restarts after the base delay again
+WORKER_STABLE_AFTER = 300
+# Seconds allowed for in-flight analyses to finish on shutdown
+WORKER_STOP_TIMEOUT = 30
+
+
+def _run_job(job, events):
+    """Worker thread: rebuild the frame from shared memory and analyze it"""
+    # pylint: disable=import-outside-toplevel
+    from meadow.core.capture import CapturedFrame, capture_backlog
+    from meadow.core.event_bus import capture_event, get_event_bus
+    from meadow.core.ocr_engines import array_to_cgimage
+    from meadow.core.screenshot_analyzer import analyze_and_log_screenshot
+
+    job_id = job['id']
+    result = None
+    bus = get_event_bus()
+    bus.publish('capture.started', capture_event(job['window_info'], job['timestamp']))
+    try:
+        shm = shared_memory.SharedMemory(name=job['shm_name'])
+        pixels = None
+        try:
+            pixels = np.ndarray(job['shape'], dtype=np.uint8, buffer=shm.buf)
+            # array_to_cgimage copies, so the block can be released right away
+            cg_image = array_to_cgimage(pixels)
+        finally:
+            del pixels
+            shm.close()
+        events.put(('received', job_id, None))
+
+        frame = CapturedFrame(cg_image, job['timestamp'], job['window_info'], job['data_dir'])
+        capture_backlog.add(frame)
+        result = analyze_and_log_screenshot(frame, job['log_path'],
+                                            on_update=lambda tags: events.put(('update', job_id, dict(tags))),
+                                            deferred=job['deferred'])
+    except Exception as e:  # pylint: disable=broad-except
+        # One bad capture must not take down the worker
+        print(f"[ERROR] Analysis of capture {job_id} failed: {e}")
+    events.put(('done', job_id, result))
+    bus.publish('capture.analyzed', capture_event(job['window_info'], job['timestamp'], result))
+    bus.publish('pipeline.stats', _pipeline_stats())
+
+
+def _pipeline_stats():
+    """OCR, Claude and prompt cache totals of this worker process"""
+    # pylint: disable=import-outside-toplevel
+    from meadow.core.ocr_pool import get_ocr_pool_stats
+    from meadow.core.prompts import get_cache_stats
+    from meadow.core.screenshot_analyzer import get_llm_stats
+    from meadow.core.tile_ocr import get_ocr_stats
+    return {'ocr': get_ocr_stats(), 'ocr_pool': get_ocr_pool_stats(), 'llm': get_llm_stats(),
+            'prompt_cache': get_cache_stats()}
+
+
+def _worker_main(jobs, events):
+    """Worker process: analyze each job on its own thread until told to stop"""
+    # pylint: disable=import-outside-toplevel
+    from meadow.core.batch_queue import DEFAULT_QUEUE_DIR
+    from meadow.core.config import Config
+    from meadow.core.screenshot_analyzer import get_batch_queue
+    from meadow.core.topic_similarity import initialize_model, serve_embeddings
+
+    # Reconcile batch results from earlier runs and accept deferred captures
+    if Config().get('analysis_mode') == 'deferred' or os.path.isdir(DEFAULT_QUEUE_DIR):
+        get_batch_queue()
+    events.put(('ready', None, os.getpid()))
+    # Load the embedding model now so the first capture does not wait for it
+    threading.Thread(target=initialize_model, daemon=True).start()
+    # This process owns the embedding cache; the menubar and viewer embed through it
+    serve_embeddings()
+
+    threads = []
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        thread = threading.Thread(target=_run_job, args=(job, events))
+        thread.start()
+        threads = [t for t in threads if t.is_alive()] + [thread]
+
+    deadline = time.time() + WORKER_STOP_TIMEOUT
+    for thread in threads:
+        thread.join(timeout=max(0, deadline - time.time()))
+
+
+class _Job:
+    """Parent-side record of a capture in the worker"""
+
+    def __init__(self, shm, on_update, on_done):
+        self.shm = shm
+        self.on_update = on_update
+        self.on_done = on_done
+
+    def release(self):
+        """Free the shared memory block once the worker has copied it (or died)"""
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class AnalysisWorker:
+    """Runs analyze_and_log_screenshot in a supervised worker process
+
+    ``submit`` copies a frame's pixels once into a shared memory block and
+    queues a small job description; the worker maps the block, analyzes the
+    capture and reports back ``update`` (tags parsed so far) and ``done``
+    (the log entry or None) events, which a supervisor thread in this process
+    hands to the job's callbacks. If the worker dies, its in-flight jobs are
+    finished with None and a fresh worker is started after a backoff delay.
+    """
+
+    def __init__(self, target=_worker_main):
+        # The worker process entry point, called with (jobs, events) queues
+        self._target = target
+        # Spawn, because forking a process that holds PyTorch or Objective-C state is unsafe
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._jobs = None
+        self._events = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._closed = False
+        self._thread = None
+        self._started_at = 0
+        self._restart_delay = WORKER_RESTART_DELAY
+        self.restarts = 0
+
+    def start(self):
+        """Start the worker process and its supervisor thread"""
+        if self._thread is None:
+            self._spawn()
+            self._thread = threading.Thread(target=self._supervise, daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def _spawn(self):
+        # Fresh queues: a killed worker can leave the old ones locked
+        self._jobs = self._context.Queue()
+        self._events = self._context.Queue()
+        # Not a daemon, because the worker starts OCR pool processes of its own
+        self._process = self._context.Process(target=self._target, args=(self._jobs, self._events),
+                                              name='meadow-analysis')
+        self._process.start()
+        self._started_at = time.time()
+
+    def _supervise(self):
+        """Dispatch worker events and restart the worker if it dies"""
+        while not self._closed:
+            try:
+                kind, job_id, value = self._events.get(timeout=1)
+            except (queue.Empty, EOFError, OSError) as e:
+                if self._closed:
+                    continue
+                if not self._process.is_alive():
+                    self._restart()
+                elif not isinstance(e, queue.Empty):
+                    # A broken queue fails instantly; back off instead of spinning
+                    time.sleep(WORKER_RESTART_DELAY)
+                continue
+            self._dispatch(kind, job_id, value)
+
+    def _dispatch(self, kind, job_id, value):
+        if kind == 'ready':
+            print(f"[DEBUG] Analysis worker ready (pid {value})")
+            return
+        with self._lock:
+            job = self._pending.pop(job_id, None) if kind == 'done' else self._pending.get(job_id)
+        if job is None:
+            return
+        try:
+            if kind == 'received':
+                job.release()
+            elif kind == 'update' and job.on_update:
+                job.on_update(value)
+            elif kind == 'done':
+                job.release()
+                if job.on_done:
+                    job.on_done(value)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] Analysis callback failed: {e}")
+
+    def _restart(self):
+        """Start a new worker after a backoff delay and fail the dead worker's jobs"""
+        print(f"[ERROR] Analysis worker exited with code {self._process.exitcode}")
+        if time.time() - self._started_at >= WORKER_STABLE_AFTER:
+            self._restart_delay = WORKER_RESTART_DELAY
+        time.sleep(self._restart_delay)
+        self._restart_delay = min(self._restart_delay * 2, WORKER_MAX_RESTART_DELAY)
+        if self._closed:
+            return
+
+        # Swapped under the lock so every job is either lost with the old queue or sent on the new one
+        with self._lock:
+            jobs = list(self._pending.values())
+            self._pending.clear()
+            self.restarts += 1
+            self._spawn()
+        print(f"[DEBUG] Restarted analysis worker (restart {self.restarts}), dropped {len(jobs)} captures")
+        for job in jobs:
+            job.release()
+            if job.on_done:
+                try:
+                    job.on_done(None)
+                except Exception as e:  # pylint: disable=broad-except
+                    print(f"[ERROR] Analysis callback failed: {e}")
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, frame, log_path, deferred=None, on_update=None, on_done=None):
+        """Send a CapturedFrame to the worker for analysis
+
+        The frame's pixels move to shared memory and the frame is discarded here.
+
+        Args:
+            deferred: As for analyze_and_log_screenshot
+            on_update: Called with the tags parsed so far, on the supervisor thread
+            on_done: Called with the log entry, or None if the capture was not kept
+
+        Returns:
+            False if the capture was dropped because the worker is backed up or stopped
+        """
+        with self._lock:
+            accepted = not self._closed and len(self._pending) < WORKER_MAX_PENDING
+        if not accepted:
+            print("[DEBUG] Analysis worker is backed up, dropping capture")
+            frame.discard()
+            return False
+
+        pixels = np.ascontiguousarray(cgimage_to_array(frame.cg_image))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, pixels.nbytes))
+        np.ndarray(pixels.shape, dtype=np.uint8, buffer=shm.buf)[...] = pixels
+        frame.discard()
+
+        with self._lock:
+            self._next_id += 1
+            job_id = self._next_id
+            self._pending[job_id] = _Job(shm, on_update, on_done)
+            self._jobs.put({
+                'id': job_id,
+                'shm_name': shm.name,
+                'shape': pixels.shape,
+                'timestamp': frame.timestamp,
+                'window_info': frame.window_info,
+                'data_dir': frame.data_dir,
+                'log_path': log_path,
+                'deferred': deferred,
+            })
+        return True
+
+    def stop(self):
+        """Let in-flight analyses finish, then stop the worker"""
+        if self._closed or self._process is None:
+            return
+        self._closed = True
+        try:
+            self._jobs.put(None)
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=WORKER_STOP_TIMEOUT + 5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=5)
+        with self._lock:
+            jobs = list(self._pending.values())
+            self._pending.clear()
+        for job in jobs:
+            job.release()
@@ -0,0 +1,173 @@
+"""Persistent queue of Claude requests submitted as Message Batches on a schedule"""
+
+import json
+import os
+import threading
+
+from meadow.core.markdown_bridge import atomic_write
+
+# Tunable Parameters
+# -----------------
+# Seconds between submitting queued requests and polling submitted batches
+BATCH_INTERVAL = 600
+# Maximum requests per submitted batch
+BATCH_MAX_REQUESTS = 500
+# Times a request is retried after its batch result errored or expired
+BATCH_MAX_ATTEMPTS = 3
+
+APP_DIR = os.path.expanduser('~/Library/Application Support/Meadow')
+DEFAULT_QUEUE_DIR = os.path.join(APP_DIR, 'data', 'batch_queue')
+
+
+class BatchQueue:
+    """Queues requests on disk, submits them as batches and hands back results
+
+    Each request is a JSON file in ``pending/`` holding the messages request
+    ``params`` and caller ``meta``. ``submit`` sends pending requests as one
+    batch and moves them to ``submitted/``; ``poll`` checks submitted batches
+    and calls ``on_result(meta, message)`` for each succeeded request.
+    Errored or expired requests go back to ``pending/`` until
+    BATCH_MAX_ATTEMPTS. Everything survives a restart.
+    """
+
+    def __init__(self, client_factory, on_result, queue_dir=DEFAULT_QUEUE_DIR, interval=BATCH_INTERVAL):
+        self.client_factory = client_factory
+        self.on_result = on_result
+        self.pending_dir = os.path.join(queue_dir, 'pending')
+        self.submitted_dir = os.path.join(queue_dir, 'submitted')
+        self.state_path = os.path.join(queue_dir, 'batches.json')
+        self.interval = interval
+        os.makedirs(self.pending_dir, exist_ok=True)
+        os.makedirs(self.submitted_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _load_batches(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_batches(self, batches):
+        atomic_write(self.state_path, json.dumps(batches, indent=2))
+
+    def enqueue(self, custom_id, params, meta):
+        """Queue one request; custom_id must be unique and match [a-zA-Z0-9_-]{1,64}"""
+        record = {'custom_id': custom_id, 'params': params, 'meta': meta, 'attempts': 0}
+        atomic_write(os.path.join(self.pending_dir, f'{custom_id}.json'), json.dumps(record))
+        print(f"[DEBUG] Queued {custom_id} for batch analysis")
+
+    def pending_count(self):
+        return len([name for name in os.listdir(self.pending_dir) if name.endswith('.json')])
+
+    def submit(self):
+        """Send pending requests as one batch; returns the batch id or None"""
+        with self._lock:
+            names = sorted(name for name in os.listdir(self.pending_dir) if name.endswith('.json'))
+            names = names[:BATCH_MAX_REQUESTS]
+            if not names:
+                return None
+            records = []
+            for name in names:
+                with open(os.path.join(self.pending_dir, name), 'r', encoding='utf-8') as f:
+                    records.append(json.load(f))
+
+            batch = self.client_factory().messages.batches.create(
+                requests=[{'custom_id': r['custom_id'], 'params': r['params']} for r in records])
+
+            batches = self._load_batches()
+            batches[batch.id] = [r['custom_id'] for r in records]
+            self._save_batches(batches)
+            for name in names:
+                os.replace(os.path.join(self.pending_dir, name), os.path.join(self.submitted_dir, name))
+            print(f"[DEBUG] Submitted batch {batch.id} with {len(records)} requests")
+            return batch.id
+
+    def poll(self):
+        """Reconcile every submitted batch that has ended; returns the number of results handled"""
+        handled = 0
+        with self._lock:
+            batches = self._load_batches()
+            client = self.client_factory() if batches else None
+            for batch_id, custom_ids in list(batches.items()):
+                if client.messages.batches.retrieve(batch_id).processing_status != 'ended':
+                    continue
+                remaining = set(custom_ids)
+                for result in client.messages.batches.results(batch_id):
+                    self._handle_result(result)
+                    remaining.discard(result.custom_id)
+                    handled += 1
+                # Requests missing from the results are retried like expired ones
+                for custom_id in remaining:
+                    self._retry(custom_id, 'missing')
+                del batches[batch_id]
+                self._save_batches(batches)
+        return handled
+
+    def _handle_result(self, result):
+        path = os.path.join(self.submitted_dir, f'{result.custom_id}.json')
+        if result.result.type != 'succeeded':
+            self._retry(result.custom_id, result.result.type)
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return
+        try:
+            self.on_result(record['meta'], result.result.message)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] Failed to reconcile batch result {result.custom_id}: {e}")
+        os.remove(path)
+
+    def _retry(self, custom_id, reason):
+        """Move a submitted request back to pending, or drop it after BATCH_MAX_ATTEMPTS"""
+        path = os.path.join(self.submitted_dir, f'{custom_id}.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return
+        record['attempts'] += 1
+        if record['attempts'] >= BATCH_MAX_ATTEMPTS:
+            print(f"[ERROR] Giving up on batch request {custom_id} ({reason})")
+            try:
+                self.on_result(record['meta'], None)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[ERROR] Failed to drop batch request {custom_id}: {e}")
+        else:
+            print(f"[DEBUG] Batch request {custom_id} {reason}, requeueing")
+            atomic_write(os.path.join(self.pending_dir, f'{custom_id}.json'), json.dumps(record))
+        os.remove(path)
+
+    def run_once(self):
+        """Poll finished batches, then submit whatever is pending"""
+        try:
+            self.poll()
+            self.submit()
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Batch queue run failed: {e}")
+        except Exception as e:  # pylint: disable=broad-except
+            # API errors must not kill the scheduler; requests stay on disk for the next run
+            print(f"[ERROR] Batch API request failed: {e}")
+
+    def start(self):
+        """Submit and poll in the background every interval seconds"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                self.run_once()
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
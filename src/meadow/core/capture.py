@@ -0,0 +1,191 @@
+"""In-memory screen captures that are only encoded and written to disk once they are kept"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from meadow.core.ocr_engines import array_to_cgimage
+
+# Tunable Parameters
+# -----------------
+# Captures held in memory (decoded pixels) before the oldest are spilled to disk as PNG
+CAPTURE_MEMORY_LIMIT_MB = 256
+
+
+def encode_png(cg_image):
+    """Encode a CGImage to PNG bytes without touching the disk"""
+    # pylint: disable=import-outside-toplevel,no-name-in-module
+    from Quartz import (NSMutableData, CGImageDestinationCreateWithData,
+                        CGImageDestinationAddImage, CGImageDestinationFinalize)
+    data = NSMutableData.data()
+    destination = CGImageDestinationCreateWithData(data, "public.png", 1, None)
+    CGImageDestinationAddImage(destination, cg_image, None)
+    if not CGImageDestinationFinalize(destination):
+        raise ValueError("Failed to encode capture as PNG")
+    return bytes(data)
+
+
+def load_cgimage(path):
+    """Read an image file back into a CGImage"""
+    # pylint: disable=import-outside-toplevel,no-name-in-module
+    from Quartz import NSURL, CGImageSourceCreateWithURL, CGImageSourceCreateImageAtIndex
+    source = CGImageSourceCreateWithURL(NSURL.fileURLWithPath_(path), None)
+    cg_image = CGImageSourceCreateImageAtIndex(source, 0, None) if source else None
+    if cg_image is None:
+        raise FileNotFoundError(f"Could not read spilled capture {path}")
+    return cg_image
+
+
+def cgimage_geometry(cg_image):
+    """(width, height, pixel buffer bytes) of a CGImage"""
+    # pylint: disable=import-outside-toplevel,no-name-in-module
+    from Quartz import CGImageGetBytesPerRow, CGImageGetHeight, CGImageGetWidth
+    height = CGImageGetHeight(cg_image)
+    return CGImageGetWidth(cg_image), height, CGImageGetBytesPerRow(cg_image) * height
+
+
+class CapturedFrame:
+    """One capture, kept as a CGImage in memory while it is analyzed
+
+    The PNG is encoded at most once (``png_bytes``), when the frame is sent to
+    Claude or kept. ``save`` writes it to permanent storage and ``discard``
+    drops it; until then nothing is written unless the capture backlog spills
+    the frame to ``data/temp``, after which its image is read back on demand.
+    """
+
+    def __init__(self, image, timestamp, window_info, data_dir):
+        if not hasattr(image, 'mode'):
+            self._cg_image = image
+        else:
+            # Full-screen fallback capture from PIL
+            self._cg_image = array_to_cgimage(np.asarray(image.convert('RGB')))
+        self.timestamp = timestamp
+        self.window_info = window_info
+        self.data_dir = data_dir
+        self.width, self.height, self.nbytes = cgimage_geometry(self._cg_image)
+        self._png = None
+        self._spill_path = None
+        # Set once the frame is saved or discarded, after which it is never spilled
+        self._done = False
+        self._lock = threading.Lock()
+
+    @property
+    def cg_image(self):
+        with self._lock:
+            if self._cg_image is None:
+                self._cg_image = load_cgimage(self._spill_path)
+            return self._cg_image
+
+    @property
+    def spilled(self):
+        return self._spill_path is not None
+
+    def _png_bytes_locked(self):
+        if self._png is None:
+            if self._spill_path is not None:
+                with open(self._spill_path, 'rb') as f:
+                    self._png = f.read()
+            else:
+                self._png = encode_png(self._cg_image)
+        return self._png
+
+    def png_bytes(self):
+        """PNG encoding of the capture, encoded once and cached"""
+        with self._lock:
+            return self._png_bytes_locked()
+
+    def crop_png(self, rect):
+        """PNG encoding of the (x, y, w, h) pixel rectangle of the capture"""
+        # pylint: disable=import-outside-toplevel,no-name-in-module
+        from Quartz import CGImageCreateWithImageInRect, CGRectMake
+        return encode_png(CGImageCreateWithImageInRect(self.cg_image, CGRectMake(*rect)))
+
+    def spill(self):
+        """Write the capture to data/temp and release its pixels from memory
+
+        The lock is held throughout, so a concurrent save or discard either
+        runs first (and nothing is spilled) or finds the spill file.
+        """
+        with self._lock:
+            if self._done or self._spill_path is not None:
+                return
+            png = self._png_bytes_locked()
+            temp_dir = os.path.join(self.data_dir, 'temp')
+            os.makedirs(temp_dir, exist_ok=True)
+            path = os.path.join(temp_dir, f"temp_{self.timestamp.strftime('%Y%m%d_%H%M%S_%f')}.png")
+            with open(path, 'wb') as f:
+                f.write(png)
+            self._spill_path = path
+            self._cg_image = None
+            self._png = None
+        print(f"[DEBUG] Spilled capture to {path}")
+
+    def save(self, path):
+        """Persist the capture as PNG at path"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            if self._spill_path is not None:
+                os.replace(self._spill_path, path)
+                # The file is permanent now, so discard must not remove it
+                self._spill_path = None
+            else:
+                with open(path, 'wb') as f:
+                    f.write(self._png_bytes_locked())
+            self._done = True
+        capture_backlog.release(self)
+
+    def discard(self):
+        """Drop the capture, removing its spill file if it has one"""
+        with self._lock:
+            if self._spill_path is not None:
+                try:
+                    os.remove(self._spill_path)
+                except OSError:
+                    pass
+                self._spill_path = None
+            self._done = True
+        capture_backlog.release(self)
+
+
+class CaptureBacklog:
+    """Tracks captures waiting in the pipeline and spills the oldest past a memory limit"""
+
+    def __init__(self, limit_bytes=CAPTURE_MEMORY_LIMIT_MB * 1024 * 1024):
+        self.limit_bytes = limit_bytes
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def in_memory_bytes(self):
+        with self._lock:
+            return sum(frame.nbytes for frame in self._frames.values() if not frame.spilled)
+
+    def add(self, frame):
+        """Register a new capture, spilling older ones if the backlog is over the limit"""
+        with self._lock:
+            self._frames[id(frame)] = frame
+            in_memory = [f for f in self._frames.values() if not f.spilled]
+        total = sum(f.nbytes for f in in_memory)
+        # Oldest first; the newest frame is about to be OCR'd so it stays in memory
+        for older in in_memory[:-1]:
+            if total <= self.limit_bytes:
+                break
+            try:
+                older.spill()
+                total -= older.nbytes
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] Failed to spill capture: {e}")
+
+    def release(self, frame):
+        """Stop tracking a capture that was saved or discarded"""
+        with self._lock:
+            self._frames.pop(id(frame), None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+
+# Captures between take_screenshot and save/discard
+capture_backlog = CaptureBacklog()
@@ -0,0 +1,64 @@
+"""Streaming Claude calls with XML tags parsed as they arrive"""
+
+import re
+
+
+def extract_tag(tag, text):
+    """Extract and unescape content from XML tag"""
+    match = re.search(f'<{tag}>(.*?)</{tag}>', text, re.DOTALL)
+    if not match:
+        return None
+    return match.group(1).replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&').strip()
+
+
+class TagStreamParser:
+    """Collects streamed text and reports each XML tag as soon as it closes"""
+
+    def __init__(self):
+        self.text = ''
+        self.tags = {}
+        self._scanned = 0
+
+    def feed(self, delta):
+        """Add streamed text and return the (tag, value) pairs completed by it"""
+        self.text += delta
+        completed = []
+        matches = list(re.finditer(r'<(\w+)>(.*?)</\1>', self.text[self._scanned:], re.DOTALL))
+        for match in matches:
+            tag = match.group(1)
+            if tag not in self.tags:
+                self.tags[tag] = extract_tag(tag, match.group(0))
+                completed.append((tag, self.tags[tag]))
+        if matches:
+            # Text before the last closed tag can not complete another one
+            self._scanned += matches[-1].end()
+        return completed
+
+
+def stream_tags(client, on_tag=None, abort=None, **request):
+    """Run a streaming messages request, parsing tags incrementally
+
+    Args:
+        client: Anthropic client
+        on_tag: Called with (tag, value) as each tag closes
+        abort: Called with (tag, value); returning True cancels the stream
+        request: Arguments for client.messages.stream
+
+    Returns:
+        (response text so far, usage, aborted)
+    """
+    parser = TagStreamParser()
+    aborted = False
+    with client.messages.stream(**request) as stream:
+        for delta in stream.text_stream:
+            for tag, value in parser.feed(delta):
+                if on_tag:
+                    on_tag(tag, value)
+                if abort and abort(tag, value):
+                    aborted = True
+                    break
+            if aborted:
+                break
+        # Leaving the with block closes the connection, which stops generation
+        message = stream.current_message_snapshot if aborted else stream.get_final_message()
+    return parser.text, getattr(message, 'usage', None), aborted
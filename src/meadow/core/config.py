@@ -56,6 +56,11 @@ class Config:
         with open(self._config_path, 'w', encoding='utf-8') as f:
             json.dump(self._config, f)
 
+    def reload(self):
+        """Re-read the configuration file, e.g. after another process changed it"""
+        self._load_config()
+        return self.get_all()
+
     def get(self, key, default=None):
         """Get configuration value"""
         return self._config.get(key, default)
@@ -82,3 +87,9 @@ class Config:
         """Set API key in secure storage"""
         if key:
             keyring.set_password("meadow", "anthropic_api_key", key)
+
+def create_notes_structure(notes_dir):
+    """Create the standard notes directory structure"""
+    os.makedirs(notes_dir, exist_ok=True)
+    os.makedirs(os.path.join(notes_dir, '_machine'), exist_ok=True)
+    os.makedirs(os.path.join(notes_dir, 'research'), exist_ok=True)
@@ -0,0 +1,221 @@
+"""Persistent, content-addressed cache for sentence embeddings"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Tunable Parameters
+# -----------------
+# Maximum number of embeddings kept on disk per model (oldest used are evicted first)
+CACHE_MAX_ENTRIES = 50000
+# Number of embeddings kept in the in-process LRU in front of the disk cache
+MEMORY_CACHE_ENTRIES = 2048
+# Number of disk writes between index flushes
+INDEX_FLUSH_INTERVAL = 64
+
+INDEX_FILENAME = 'index.json'
+VECTORS_FILENAME = 'vectors.f16'
+KEYS_FILENAME = 'keys.bin'
+# Bytes of the content hash stored next to each row to verify it on read
+ROW_KEY_BYTES = 16
+
+
+def content_key(text):
+    """Return the content hash used to key an embedding"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-level embedding cache: an in-process LRU backed by a float16 memmap on disk.
+
+    Each model gets its own directory, so switching models never serves stale
+    vectors. The disk tier holds at most ``max_entries`` rows; when it is full
+    the least recently used row is overwritten.
+
+    The index is only flushed every INDEX_FLUSH_INTERVAL writes, so after a
+    crash it can map a key to a row that was since reused. Each row therefore
+    also stores a prefix of its key's hash, checked on every disk read.
+    """
+
+    def __init__(self, cache_dir, model_id, max_entries=CACHE_MAX_ENTRIES,
+                 memory_entries=MEMORY_CACHE_ENTRIES):
+        self.model_id = model_id
+        self.cache_dir = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', model_id))
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> float32 vector
+        self._slots = OrderedDict()  # key -> disk row, least recently used first
+        self._free_slots = []
+        self._vectors = None
+        self._keys = None
+        self._dim = None
+        self._dirty_writes = 0
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILENAME)
+
+    def _vectors_path(self):
+        return os.path.join(self.cache_dir, VECTORS_FILENAME)
+
+    def _keys_path(self):
+        return os.path.join(self.cache_dir, KEYS_FILENAME)
+
+    def _load_index(self):
+        """Load the disk index, discarding it if it does not match this cache"""
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if (index.get('model_id') != self.model_id or
+                index.get('max_entries') != self.max_entries or
+                not os.path.exists(self._vectors_path()) or
+                not os.path.exists(self._keys_path())):
+            print(f"[DEBUG] Embedding cache for {self.model_id} is stale, starting fresh")
+            return
+
+        self._dim = index['dim']
+        self._vectors = np.memmap(self._vectors_path(), dtype=np.float16, mode='r+',
+                                  shape=(self.max_entries, self._dim))
+        self._keys = np.memmap(self._keys_path(), dtype=np.uint8, mode='r+',
+                               shape=(self.max_entries, ROW_KEY_BYTES))
+        # Keys are stored least recently used first
+        for key, slot in index.get('slots', []):
+            self._slots[key] = slot
+        used = set(self._slots.values())
+        self._free_slots = [s for s in range(self.max_entries - 1, -1, -1) if s not in used]
+
+    def _create_vectors(self, dim):
+        """Create the backing memmap once the embedding size is known"""
+        self._dim = dim
+        self._vectors = np.memmap(self._vectors_path(), dtype=np.float16, mode='w+',
+                                  shape=(self.max_entries, dim))
+        self._keys = np.memmap(self._keys_path(), dtype=np.uint8, mode='w+',
+                               shape=(self.max_entries, ROW_KEY_BYTES))
+        self._slots.clear()
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _remember(self, key, vector):
+        """Insert into the in-process LRU"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text):
+        """Return the cached embedding for text, or None"""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts):
+        """Return a list with the cached embedding (or None) for each text"""
+        results = []
+        with self._lock:
+            for text in texts:
+                key = content_key(text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    if key in self._slots:
+                        self._slots.move_to_end(key)
+                    self.hits_memory += 1
+                elif key in self._slots and self._row_matches(self._slots[key], key):
+                    self._slots.move_to_end(key)
+                    vector = np.asarray(self._vectors[self._slots[key]], dtype=np.float32)
+                    self._remember(key, vector)
+                    self.hits_disk += 1
+                else:
+                    if key in self._slots:
+                        # The row was reused after the index was last flushed
+                        self._free_slots.append(self._slots.pop(key))
+                    self.misses += 1
+                results.append(vector)
+        return results
+
+    def _row_matches(self, slot, key):
+        return self._keys[slot].tobytes() == bytes.fromhex(key)[:ROW_KEY_BYTES]
+
+    def put(self, text, vector):
+        """Store the embedding for text"""
+        self.put_many([text], [vector])
+
+    def put_many(self, texts, vectors):
+        """Store embeddings for several texts"""
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+                key = content_key(text)
+                self._remember(key, vector)
+
+                if self._vectors is None or vector.shape[0] != self._dim:
+                    self._create_vectors(vector.shape[0])
+
+                if key in self._slots:
+                    slot = self._slots[key]
+                    self._slots.move_to_end(key)
+                elif self._free_slots:
+                    slot = self._free_slots.pop()
+                    self._slots[key] = slot
+                else:
+                    # Reuse the row of the least recently used entry
+                    _, slot = self._slots.popitem(last=False)
+                    self._slots[key] = slot
+                # Clear the row's key first, so a crash mid-write leaves a row that matches no key
+                self._keys[slot] = 0
+                self._vectors[slot] = vector.astype(np.float16)
+                self._keys[slot] = np.frombuffer(bytes.fromhex(key)[:ROW_KEY_BYTES], dtype=np.uint8)
+                self._dirty_writes += 1
+
+            if self._dirty_writes >= INDEX_FLUSH_INTERVAL:
+                self._flush_locked()
+
+    def flush(self):
+        """Persist the disk index and vectors"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._vectors is None or not self._dirty_writes:
+            return
+        self._vectors.flush()
+        self._keys.flush()
+        index = {
+            'model_id': self.model_id,
+            'dim': self._dim,
+            'max_entries': self.max_entries,
+            'slots': list(self._slots.items()),
+        }
+        tmp_path = self._index_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+        self._dirty_writes = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def stats(self):
+        """Return hit/miss counters and the overall hit rate"""
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            'entries': len(self._slots),
+            'max_entries': self.max_entries,
+            'memory_hits': self.hits_memory,
+            'disk_hits': self.hits_disk,
+            'misses': self.misses,
+            'hit_rate': (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+        }
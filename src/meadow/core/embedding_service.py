@@ -0,0 +1,194 @@
+"""Single long-lived embedding worker shared by every analysis thread"""
+
+import os
+# Set tokenizers parallelism before importing any HuggingFace modules
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Tunable Parameters
+# -----------------
+# How long the worker keeps collecting requests after the first one arrives (seconds)
+BATCH_WINDOW = 0.01
+# Maximum number of texts merged into one model call
+MAX_BATCH_SIZE = 128
+# After a failed model load, requests fail at once for this long before the load is retried (seconds)
+LOAD_RETRY_DELAY = 300
+
+
+class EmbeddingService:
+    """Owns the embedding model on a dedicated thread.
+
+    Any thread can call ``encode``; pending requests that arrive within
+    ``batch_window`` of each other are merged into a single model call, with
+    duplicate texts encoded only once.
+    """
+
+    def __init__(self, model_name, batch_window=BATCH_WINDOW, max_batch_size=MAX_BATCH_SIZE,
+                 model_factory=None, load_retry_delay=LOAD_RETRY_DELAY):
+        self.model_name = model_name
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.load_retry_delay = load_retry_delay
+        self._model_factory = model_factory
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._load_error = None
+        self._load_failed_at = None
+
+        self.requests = 0
+        self.batches = 0
+        self.texts_encoded = 0
+
+    def _load_model(self):
+        """Load the sentence-transformers model (runs on the worker thread)"""
+        if self._model_factory is not None:
+            return self._model_factory()
+        from sentence_transformers import SentenceTransformer
+        print(f"[DEBUG] Initializing sentence-transformers model {self.model_name}")
+        return SentenceTransformer(self.model_name)
+
+    def start(self):
+        """Start the worker thread if it is not already running
+
+        After a failed model load the thread stays down for load_retry_delay
+        seconds, so requests fail at once instead of each retrying the load.
+        """
+        with self._start_lock:
+            if self._load_failed_at is not None and time.monotonic() - self._load_failed_at < self.load_retry_delay:
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._load_failed_at = None
+                self._ready.clear()
+                self._load_error = None
+                self._thread = threading.Thread(target=self._run, name='embedding-service', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Ask the worker to exit after finishing queued requests"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the model is loaded, re-raising any load error"""
+        self.start()
+        self._ready.wait(timeout)
+        if self._load_error is not None:
+            raise self._load_error
+
+    def submit(self, texts):
+        """Queue texts for encoding and return a Future of an (n, dim) array"""
+        future = Future()
+        texts = list(texts)
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self.start()
+        # Under the start lock, so a request is never queued after a failed load has drained the queue
+        with self._start_lock:
+            if self._load_error is not None:
+                future.set_exception(self._load_error)
+            else:
+                self._queue.put((texts, future))
+        return future
+
+    def encode(self, texts, timeout=None):
+        """Encode texts, blocking the calling thread until the batch is done"""
+        return self.submit(texts).result(timeout)
+
+    def _collect_batch(self, first):
+        """Gather requests that arrive within the batch window"""
+        pending = [first]
+        count = len(first[0])
+        stop = False
+        deadline = time.monotonic() + self.batch_window
+        while count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            pending.append(item)
+            count += len(item[0])
+        return pending, stop
+
+    def _run(self):
+        """Worker loop: load the model once, then serve batches until stopped"""
+        try:
+            model = self._load_model()
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] Failed to load embedding model: {e}")
+            with self._start_lock:
+                self._load_error = e
+                self._load_failed_at = time.monotonic()
+                self._ready.set()
+                self._fail_pending(e)
+            return
+        self._ready.set()
+        try:
+            self._serve(model)
+        finally:
+            # Requests queued behind the stop sentinel would otherwise wait forever
+            with self._start_lock:
+                self._fail_pending(RuntimeError("Embedding service stopped"))
+
+    def _serve(self, model):
+        """Encode batches until stopped"""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            pending, stop = self._collect_batch(first)
+
+            # Encode each distinct text once across all merged requests
+            unique = list(dict.fromkeys(text for texts, _ in pending for text in texts))
+            try:
+                vectors = np.asarray(model.encode(unique, convert_to_numpy=True))
+                rows = {text: vectors[i] for i, text in enumerate(unique)}
+            except Exception as e:  # pylint: disable=broad-except
+                for _, future in pending:
+                    future.set_exception(e)
+            else:
+                for texts, future in pending:
+                    future.set_result(np.array([rows[text] for text in texts]))
+                self.requests += len(pending)
+                self.batches += 1
+                self.texts_encoded += len(unique)
+                if len(pending) > 1:
+                    print(f"[DEBUG] Embedding batch merged {len(pending)} requests ({len(unique)} texts)")
+
+            if stop:
+                break
+
+    def _fail_pending(self, error):
+        """Fail every queued request with error"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(error)
+
+    def stats(self):
+        """Return request and batching counters"""
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'texts_encoded': self.texts_encoded,
+            'mean_batch_requests': self.requests / self.batches if self.batches else 0.0,
+        }
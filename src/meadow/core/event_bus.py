@@ -0,0 +1,387 @@
+"""Local publish/subscribe bus between the menubar, analysis worker and web viewer processes
+
+The menubar process runs an EventBroker on a Unix domain socket. Every
+process (the menubar included) talks to it through an EventBus client.
+Messages are JSON lines:
+
+    {"op": "sub", "topics": ["config", "capture.analyzed"]}
+    {"op": "pub", "topic": "capture.analyzed", "data": {...}}
+
+A subscription to "capture" matches "capture" and every "capture.*" topic.
+A request is a publication that also carries "reply_to" (the requesting
+client's "reply.<id>" topic) and "id"; the process that handles the topic
+publishes {"id": ..., "result": ...} or {"id": ..., "error": ...} there.
+Events are notifications, not a log: anything published while the broker
+is unreachable is dropped. Clients reconnect on their own and call their
+on_connect callbacks, so subscribers can re-read whatever state they may
+have missed.
+
+Topics:
+    config.changed    keys of config.json that changed
+    capture.started   a capture entered the analysis pipeline
+    capture.analyzed  a capture finished (kept or not)
+    pipeline.stats    OCR, LLM and prompt cache totals of the analysis worker
+    embed             request: embed {"texts": [...]} in the analysis worker
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Tunable Parameters
+# -----------------
+# Seconds before a client retries the broker, doubled per failure up to BUS_MAX_RECONNECT_DELAY
+BUS_RECONNECT_DELAY = 0.5
+BUS_MAX_RECONNECT_DELAY = 10
+# Seconds a subscriber may block the broker before it is disconnected
+BUS_SEND_TIMEOUT = 2
+# Seconds request() waits for a reply by default
+BUS_REQUEST_TIMEOUT = 30
+
+APP_DIR = os.path.expanduser('~/Library/Application Support/Meadow')
+BUS_SOCKET_PATH = os.path.join(APP_DIR, 'run', 'events.sock')
+
+
+def topic_matches(subscription, topic):
+    """Whether a subscription ("capture") covers a topic ("capture.analyzed")"""
+    return topic == subscription or topic.startswith(subscription + '.')
+
+
+def capture_event(window_info, timestamp, entry=None):
+    """Payload of capture.started and capture.analyzed events"""
+    if not isinstance(timestamp, str):
+        timestamp = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+    event = {
+        'timestamp': timestamp,
+        # Day log the entry goes to, as in log_YYYYMMDD.json
+        'date': timestamp[:10].replace('-', ''),
+        'app': window_info.get('app'),
+        'window': window_info.get('title'),
+        'kept': entry is not None,
+    }
+    if entry:
+        event.update(topic=entry.get('research_topic'), description=entry.get('description'))
+    return event
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+class _Subscriber:
+    """One client connection on the broker side"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.topics = set()
+        self.lock = threading.Lock()
+
+
+class EventBroker:
+    """Forwards each published message to every connection subscribed to its topic"""
+
+    def __init__(self, path=BUS_SOCKET_PATH):
+        self.path = path
+        self._server = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Listen on the socket, replacing one left behind by a previous run"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen()
+        threading.Thread(target=self._accept, daemon=True).start()
+        print(f"[DEBUG] Event bus listening on {self.path}")
+        return self
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            conn.settimeout(BUS_SEND_TIMEOUT)
+            subscriber = _Subscriber(conn)
+            with self._lock:
+                self._subscribers.append(subscriber)
+            threading.Thread(target=self._serve, args=(subscriber,), daemon=True).start()
+
+    def _serve(self, subscriber):
+        """Read one client's subscriptions and publications until it disconnects"""
+        buffer = b''
+        try:
+            while True:
+                try:
+                    chunk = subscriber.conn.recv(65536)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    break
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    try:
+                        message = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if message.get('op') == 'sub':
+                        subscriber.topics.update(message.get('topics', []))
+                    elif message.get('op') == 'pub':
+                        self._forward(message)
+        except OSError:
+            pass
+        self._drop(subscriber)
+
+    def _forward(self, message):
+        line = _encode({key: message[key] for key in ('topic', 'data', 'reply_to', 'id') if key in message})
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if not any(topic_matches(topic, message['topic']) for topic in subscriber.topics):
+                continue
+            try:
+                with subscriber.lock:
+                    subscriber.conn.sendall(line)
+            except OSError:
+                # Gone or too slow; it reconnects and resubscribes by itself
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+        try:
+            subscriber.conn.close()
+        except OSError:
+            pass
+
+    def stop(self):
+        """Close the socket and every client connection"""
+        self._closed = True
+        if self._server is not None:
+            self._server.close()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._drop(subscriber)
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class EventBus:
+    """Client connection to the broker that survives either side restarting"""
+
+    def __init__(self, path=BUS_SOCKET_PATH):
+        self.path = path
+        self._handlers = defaultdict(list)
+        self._on_connect = []
+        self._sock = None
+        self._lock = threading.Lock()
+        self._connected = threading.Event()
+        self._closed = False
+        self._thread = None
+        # Replies to this client's requests arrive on its own topic
+        self._reply_topic = f'reply.{uuid.uuid4().hex[:12]}'
+        self._handlers[self._reply_topic].append(self._on_reply)
+        self._replies = {}
+        self._next_request = 0
+        self._responders = {}
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout=None):
+        """Block until the client is connected; returns whether it is"""
+        return self._connected.wait(timeout)
+
+    def subscribe(self, topic, callback):
+        """Call callback(topic, data) for each message on topic (and its subtopics)
+
+        Callbacks run on the bus reader thread and should return quickly.
+        """
+        with self._lock:
+            new = topic not in self._handlers
+            self._handlers[topic].append(callback)
+            if new and self._sock is not None:
+                self._send_locked({'op': 'sub', 'topics': [topic]})
+
+    def on_connect(self, callback):
+        """Call callback() after every (re)connection, e.g. to reload state missed while apart"""
+        self._on_connect.append(callback)
+
+    def handle(self, topic, handler):
+        """Answer request() calls on topic with handler(data), each on its own thread
+
+        The handler's return value must be JSON serializable; an exception is
+        sent back to the requester as an error.
+        """
+        with self._lock:
+            self._responders[topic] = handler
+            new = topic not in self._handlers
+            self._handlers.setdefault(topic, [])
+            if new and self._sock is not None:
+                self._send_locked({'op': 'sub', 'topics': [topic]})
+
+    def request(self, topic, data=None, timeout=BUS_REQUEST_TIMEOUT):
+        """Send a request to whichever process handles topic and return its result
+
+        Raises TimeoutError if the broker or the handling process does not
+        answer within timeout, and RuntimeError if the handler failed.
+        """
+        if not self.wait_connected(timeout):
+            raise TimeoutError("Event bus is not connected")
+        future = Future()
+        with self._lock:
+            self._next_request += 1
+            request_id = self._next_request
+            self._replies[request_id] = future
+            sent = self._sock is not None and self._send_locked(
+                {'op': 'pub', 'topic': topic, 'data': data, 'reply_to': self._reply_topic, 'id': request_id})
+        try:
+            if not sent:
+                raise TimeoutError("Event bus connection was lost")
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No reply to {topic} within {timeout}s") from None
+        finally:
+            with self._lock:
+                self._replies.pop(request_id, None)
+
+    def _on_reply(self, _topic, reply):
+        with self._lock:
+            future = self._replies.pop(reply.get('id'), None)
+        if future is None:
+            return
+        if 'error' in reply:
+            future.set_exception(RuntimeError(reply['error']))
+        else:
+            future.set_result(reply.get('result'))
+
+    def _respond(self, handler, message):
+        try:
+            reply = {'id': message.get('id'), 'result': handler(message.get('data'))}
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] Handling {message['topic']} request failed: {e}")
+            reply = {'id': message.get('id'), 'error': str(e)}
+        self.publish(message['reply_to'], reply)
+
+    def publish(self, topic, data=None):
+        """Send a message; returns False if the broker is unreachable and it was dropped"""
+        with self._lock:
+            if self._sock is None:
+                return False
+            return self._send_locked({'op': 'pub', 'topic': topic, 'data': data})
+
+    def _send_locked(self, message):
+        try:
+            self._sock.sendall(_encode(message))
+            return True
+        except OSError:
+            # The reader thread notices the broken connection and reconnects
+            return False
+
+    def start(self):
+        """Connect in the background, reconnecting whenever the connection is lost"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        delay = BUS_RECONNECT_DELAY
+        while not self._closed:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                time.sleep(delay)
+                delay = min(delay * 2, BUS_MAX_RECONNECT_DELAY)
+                continue
+            delay = BUS_RECONNECT_DELAY
+            with self._lock:
+                self._sock = sock
+                self._send_locked({'op': 'sub', 'topics': list(self._handlers)})
+            self._connected.set()
+            for callback in list(self._on_connect):
+                self._call(callback)
+            self._read(sock)
+            self._connected.clear()
+            with self._lock:
+                self._sock = None
+            sock.close()
+            if not self._closed:
+                print("[DEBUG] Lost connection to event bus, reconnecting")
+
+    def _read(self, sock):
+        buffer = b''
+        while not self._closed:
+            try:
+                chunk = sock.recv(65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                with self._lock:
+                    handlers = [callback for topic, callbacks in self._handlers.items()
+                                if topic_matches(topic, message['topic']) for callback in callbacks]
+                    responder = self._responders.get(message['topic']) if message.get('reply_to') else None
+                if responder is not None:
+                    threading.Thread(target=self._respond, args=(responder, message), daemon=True).start()
+                for callback in handlers:
+                    self._call(callback, message['topic'], message.get('data'))
+
+    @staticmethod
+    def _call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] Event bus callback failed: {e}")
+
+    def close(self):
+        """Disconnect and stop reconnecting"""
+        self._closed = True
+        with self._lock:
+            sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+# One client per process, connected on first use
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+def get_event_bus():
+    """Get or start this process's bus client"""
+    global _event_bus  # pylint: disable=global-statement
+    with _event_bus_lock:
+        if _event_bus is None:
+            _event_bus = EventBus().start()
+        return _event_bus
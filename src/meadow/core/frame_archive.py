@@ -0,0 +1,257 @@
+"""Keyframe plus tile-delta archive for runs of screenshots of the same window"""
+
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+from meadow.core.markdown_bridge import atomic_write, file_lock
+
+try:
+    import zstandard
+except ImportError:  # zlib is slower and larger but always available
+    zstandard = None
+
+# Tunable Parameters
+# -----------------
+# Edge length of the square tiles compared between consecutive frames (pixels)
+TILE_SIZE = 64
+# Every Nth frame is stored whole, bounding the deltas applied to decode any frame
+KEYFRAME_INTERVAL = 16
+# Compression levels for each codec
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+ARCHIVE_MAGIC = b'MFA1'
+ARCHIVE_EXTENSION = '.mfa'
+# Archived frames are referenced from logs as "<archive path>#<frame index>"
+FRAME_REF_SEPARATOR = '#'
+
+
+def _compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _tile_grid(shape, tile=TILE_SIZE):
+    """Number of tile rows and columns covering an image"""
+    return -(-shape[0] // tile), -(-shape[1] // tile)
+
+
+def _tiles(frame, tile=TILE_SIZE):
+    """Zero-pad a frame to whole tiles and view it as (rows, cols, tile, tile, channels)"""
+    rows, cols = _tile_grid(frame.shape, tile)
+    padded = np.zeros((rows * tile, cols * tile, frame.shape[2]), dtype=np.uint8)
+    padded[:frame.shape[0], :frame.shape[1]] = frame
+    return padded.reshape(rows, tile, cols, tile, -1).swapaxes(1, 2)
+
+
+def tile_delta(previous, current, tile=TILE_SIZE):
+    """Return (changed tile mask, XOR of the changed tiles) between two same-sized frames"""
+    xor = _tiles(previous, tile) ^ _tiles(current, tile)
+    mask = xor.any(axis=(2, 3, 4))
+    return mask, xor[mask]
+
+
+def apply_tile_delta(previous, mask, xor_tiles, tile=TILE_SIZE):
+    """Rebuild a frame from its predecessor and a tile delta"""
+    tiles = _tiles(previous, tile).copy()
+    tiles[mask] ^= xor_tiles
+    rows, cols = mask.shape
+    full = tiles.swapaxes(1, 2).reshape(rows * tile, cols * tile, -1)
+    return full[:previous.shape[0], :previous.shape[1]]
+
+
+def write_archive(path, frames, codec=None):
+    """Write frames (HxWxC uint8 arrays) to an archive and return its size in bytes
+
+    Layout: magic, then one compressed record per frame, then a JSON footer
+    with each record's offset so any frame can be located without scanning,
+    then the footer length and the magic again.
+    """
+    codec = codec or ('zstd' if zstandard is not None else 'zlib')
+    records = []
+    previous = None
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(ARCHIVE_MAGIC)
+        for i, frame in enumerate(frames):
+            frame = np.ascontiguousarray(frame, dtype=np.uint8)
+            if frame.ndim == 2:
+                frame = frame[:, :, None]
+            keyframe = previous is None or previous.shape != frame.shape or i % KEYFRAME_INTERVAL == 0
+            if keyframe:
+                payload = frame.tobytes()
+            else:
+                mask, xor_tiles = tile_delta(previous, frame)
+                payload = np.packbits(mask).tobytes() + xor_tiles.tobytes()
+            data = _compress(payload, codec)
+            records.append({'offset': f.tell(), 'length': len(data), 'key': keyframe,
+                            'shape': list(frame.shape)})
+            f.write(data)
+            previous = frame
+
+        footer = json.dumps({'codec': codec, 'tile': TILE_SIZE, 'frames': records}).encode('utf-8')
+        f.write(footer)
+        f.write(struct.pack('<Q', len(footer)))
+        f.write(ARCHIVE_MAGIC)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class FrameArchive:
+    """Random-access reader for an archive written by ``write_archive``
+
+    Decoding frame i reads its nearest preceding keyframe and applies at most
+    KEYFRAME_INTERVAL - 1 tile deltas. The last decoded frame is kept, so
+    reading frames in order costs one delta each.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(4) != ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is not a frame archive")
+            f.seek(-12, os.SEEK_END)
+            footer_length = struct.unpack('<Q', f.read(8))[0]
+            if f.read(4) != ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is truncated")
+            f.seek(-12 - footer_length, os.SEEK_END)
+            footer = json.loads(f.read(footer_length))
+        self.codec = footer['codec']
+        self.tile = footer['tile']
+        self.records = footer['frames']
+        self._last = (None, None)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _read(self, f, index):
+        record = self.records[index]
+        f.seek(record['offset'])
+        return _decompress(f.read(record['length']), self.codec)
+
+    def frame(self, index):
+        """Decode frame index as an HxWxC uint8 array"""
+        if not 0 <= index < len(self.records):
+            raise IndexError(f"{self.path} has no frame {index}")
+        last_index, last_frame = self._last
+        if last_index == index:
+            return last_frame
+
+        # Resume from the cached frame if it lies between the keyframe and the target
+        start = index
+        while not self.records[start]['key']:
+            start -= 1
+        if last_index is not None and start <= last_index < index:
+            start, frame = last_index + 1, last_frame
+        else:
+            frame = None
+
+        with open(self.path, 'rb') as f:
+            for i in range(start, index + 1):
+                record = self.records[i]
+                payload = self._read(f, i)
+                if record['key']:
+                    frame = np.frombuffer(payload, dtype=np.uint8).reshape(record['shape'])
+                    continue
+                rows, cols = _tile_grid(record['shape'], self.tile)
+                mask_bytes = -(-(rows * cols) // 8)
+                mask = np.unpackbits(np.frombuffer(payload[:mask_bytes], dtype=np.uint8),
+                                     count=rows * cols).astype(bool).reshape(rows, cols)
+                xor_tiles = np.frombuffer(payload[mask_bytes:], dtype=np.uint8).reshape(
+                    -1, self.tile, self.tile, record['shape'][2])
+                frame = apply_tile_delta(frame, mask, xor_tiles, self.tile)
+        self._last = (index, frame)
+        return frame
+
+    def image(self, index):
+        """Decode frame index as a PIL image"""
+        frame = self.frame(index)
+        return Image.fromarray(frame[:, :, 0] if frame.shape[2] == 1 else frame)
+
+
+def parse_ref(image_path):
+    """Split "<archive>#<index>" into (archive path, index); plain paths give index None"""
+    path, sep, index = image_path.rpartition(FRAME_REF_SEPARATOR)
+    if sep and path.endswith(ARCHIVE_EXTENSION) and index.isdigit():
+        return path, int(index)
+    return image_path, None
+
+
+@lru_cache(maxsize=8)
+def _open_archive(path, mtime_ns):
+    """Keep recently used archives open so neighbouring frames reuse decoded state"""
+    return FrameArchive(path)
+
+
+def load_image(image_path):
+    """Open a screenshot from a plain image path or an archive frame reference"""
+    path, index = parse_ref(image_path)
+    if index is None:
+        return Image.open(path)
+    return _open_archive(path, os.stat(path).st_mtime_ns).image(index)
+
+
+def _window_runs(entries):
+    """Group consecutive log entries of the same app and window"""
+    runs = []
+    for entry in entries:
+        key = (entry.get('app'), entry.get('window'))
+        if runs and runs[-1][0] == key:
+            runs[-1][1].append(entry)
+        else:
+            runs.append((key, [entry]))
+    return [run for _, run in runs]
+
+
+def archive_day(log_path, archive_dir, min_run=2):
+    """Move one day's PNG screenshots into per-window-run archives
+
+    Log entries are rewritten to point at their archive frames before the
+    PNGs are deleted. The log is locked throughout so concurrent appends and
+    path rewrites are not lost. Returns (bytes before, bytes after).
+    """
+    with file_lock(log_path):
+        with open(log_path, 'r', encoding='utf-8') as f:
+            logs = json.load(f)
+        candidates = sorted((entry for entry in logs
+                             if (entry.get('image_path') or '').endswith('.png') and os.path.exists(entry['image_path'])),
+                            key=lambda entry: entry['timestamp'])
+
+        before = after = 0
+        replaced = []
+        for run in _window_runs(candidates):
+            if len(run) < min_run:
+                continue
+            frames = []
+            for entry in run:
+                with Image.open(entry['image_path']) as img:
+                    if img.mode not in ('L', 'RGB', 'RGBA'):
+                        img = img.convert('RGBA')
+                    frames.append(np.asarray(img))
+            start = datetime.strptime(run[0]['timestamp'], '%Y-%m-%d %H:%M:%S')
+            archive_path = os.path.join(archive_dir, f"frames_{start.strftime('%Y%m%d_%H%M%S')}{ARCHIVE_EXTENSION}")
+            after += write_archive(archive_path, frames)
+            for i, entry in enumerate(run):
+                before += os.path.getsize(entry['image_path'])
+                replaced.append(entry['image_path'])
+                entry['image_path'] = f"{archive_path}{FRAME_REF_SEPARATOR}{i}"
+
+        if replaced:
+            atomic_write(log_path, json.dumps(logs, indent=2))
+            for path in replaced:
+                os.remove(path)
+    return before, after
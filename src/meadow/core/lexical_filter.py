@@ -0,0 +1,206 @@
+"""Cheap BM25 keyword stage that runs before embedding-based topic matching"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+# Tunable Parameters
+# -----------------
+# Best topic score below which text is rejected without running the embedding model.
+# None (the default) never rejects: screens about a topic in other words (synonyms,
+# paraphrases) share no keywords with it, so only the embedding stage can judge them
+LEXICAL_REJECT_BELOW = None
+# Best topic score at or above which text is accepted without running the embedding model
+LEXICAL_ACCEPT_ABOVE = 10.0
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Chunks assumed to be in the background corpus (without any keyword) before captures are seen
+BACKGROUND_PRIOR_DOCS = 1000
+# Chunks observed before the background counts are halved, so IDF follows recent captures
+BACKGROUND_MAX_DOCS = 20000
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'into', 'is', 'it',
+    'of', 'on', 'or', 'the', 'to', 'with', 'about', 'how', 'what', 'why', 'vs',
+}
+
+# Lazy load nltk only when expanding topics
+wordnet = None
+
+# Counts of how each relevance check was decided
+cascade_stats = Counter()
+
+# Document frequencies of topic keywords over recently scored chunks, used for IDF
+_background_df = Counter()
+_background_docs = 0
+_background_lock = threading.Lock()
+
+
+def stem(word):
+    """Strip common English suffixes so 'planning' and 'planned' share a key"""
+    for suffix in ('ations', 'ation', 'ments', 'ment', 'ings', 'ing', 'ies', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + ('y' if suffix == 'ies' else '')
+            # 'plann' -> 'plan'
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+                word = word[:-1]
+            break
+    return word
+
+
+def tokenize(text):
+    """Lowercase, stemmed word tokens"""
+    return [stem(word) for word in re.findall(r'[a-z0-9]+', text.lower())]
+
+
+def _get_synonyms(word):
+    """Return WordNet synonyms for word, or nothing if nltk is unavailable"""
+    global wordnet
+    try:
+        if wordnet is None:
+            from nltk.corpus import wordnet as wn
+            wn.ensure_loaded()
+            wordnet = wn
+        names = {lemma.name() for synset in wordnet.synsets(word) for lemma in synset.lemmas()}
+    except (ImportError, LookupError):
+        return set()
+    return {name.replace('_', ' ').lower() for name in names}
+
+
+def expand_topic_keywords(topics):
+    """Expand each topic into stemmed keywords, including synonyms when available
+
+    This is meant to run once when topics are saved; the result is stored in
+    the config under 'topic_keywords'.
+    """
+    keywords = {}
+    for topic in topics:
+        terms = set()
+        for word in re.findall(r'[a-z0-9]+', topic.lower()):
+            if word in STOPWORDS:
+                continue
+            terms.add(stem(word))
+            for synonym in _get_synonyms(word):
+                terms.update(t for t in tokenize(synonym) if t not in STOPWORDS)
+        keywords[topic] = sorted(terms)
+    return keywords
+
+
+def keywords_for_topics(topics, stored_keywords=None):
+    """Return keywords for topics, expanding any that were not stored"""
+    stored_keywords = stored_keywords or {}
+    missing = [topic for topic in topics if topic not in stored_keywords]
+    expanded = expand_topic_keywords(missing) if missing else {}
+    return {topic: stored_keywords.get(topic) or expanded.get(topic, []) for topic in topics}
+
+
+def observe_chunks(chunks, terms):
+    """Add chunks to the background corpus used for IDF
+
+    Only ``terms`` (the topic keywords) are counted, and every count is halved
+    once BACKGROUND_MAX_DOCS chunks have been seen, so the corpus stays small.
+    """
+    global _background_docs
+    terms = set(terms)
+    with _background_lock:
+        for chunk in chunks:
+            _background_df.update(terms.intersection(tokenize(chunk)))
+        _background_docs += len(chunks)
+        if _background_docs > BACKGROUND_MAX_DOCS:
+            for term in list(_background_df):
+                _background_df[term] //= 2
+                if not _background_df[term]:
+                    del _background_df[term]
+            _background_docs //= 2
+
+def bm25_chunk_scores(chunks, keywords):
+    """Score each chunk against a keyword query with BM25
+
+    IDF comes from every chunk observed so far plus a prior of keyword-free
+    documents, so a keyword repeated across one capture still counts as rare.
+    """
+    docs = [Counter(tokenize(chunk)) for chunk in chunks]
+    if not docs or not keywords:
+        return [0.0] * len(docs)
+    avg_len = sum(sum(doc.values()) for doc in docs) / len(docs) or 1.0
+    idf = {}
+    with _background_lock:
+        total_docs = BACKGROUND_PRIOR_DOCS + _background_docs + len(docs)
+        for term in keywords:
+            containing = _background_df[term] + sum(1 for doc in docs if term in doc)
+            idf[term] = math.log(1 + (total_docs - containing + 0.5) / (containing + 0.5))
+
+    scores = []
+    for doc in docs:
+        doc_len = sum(doc.values())
+        score = 0.0
+        for term in keywords:
+            freq = doc.get(term, 0)
+            if not freq:
+                continue
+            score += idf[term] * freq * (BM25_K1 + 1) / (freq + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len))
+        scores.append(score)
+    return scores
+
+
+def _topic_matches(chunks, topic_keywords, min_chunks):
+    """(mean score of the best ``min_chunks`` chunks, number of matching chunks) per topic"""
+    matches = {}
+    for topic, keywords in topic_keywords.items():
+        chunk_scores = bm25_chunk_scores(chunks, keywords)
+        best = sorted(chunk_scores, reverse=True)[:max(min_chunks, 1)]
+        matches[topic] = (sum(best) / max(min_chunks, 1), sum(1 for score in chunk_scores if score > 0))
+    return matches
+
+
+def topic_scores(chunks, topic_keywords, min_chunks):
+    """Mean BM25 score of each topic's best ``min_chunks`` chunks"""
+    return {topic: score for topic, (score, _) in _topic_matches(chunks, topic_keywords, min_chunks).items()}
+
+
+def matching_chunks(chunks, topic_keywords, min_chunks):
+    """Chunks containing keywords of the best-scoring topic, best first"""
+    scores = topic_scores(chunks, topic_keywords, min_chunks)
+    if not scores:
+        return []
+    best_topic = max(scores, key=scores.get)
+    chunk_scores = bm25_chunk_scores(chunks, topic_keywords[best_topic])
+    ranked = sorted(zip(chunk_scores, chunks), key=lambda pair: pair[0], reverse=True)
+    return [chunk for score, chunk in ranked if score > 0]
+
+
+def lexical_decision(chunks, topic_keywords, min_chunks,
+                     reject_below=LEXICAL_REJECT_BELOW, accept_above=LEXICAL_ACCEPT_ABOVE):
+    """Classify text as a clear 'reject', a clear 'accept', or None for the embedding stage
+
+    With reject_below=None (the default) text is never rejected here. Text is
+    only accepted for a topic matched by at least ``min_chunks`` chunks, so one
+    keyword-dense chunk cannot skip the embedding check on its own.
+    """
+    matches = _topic_matches(chunks, topic_keywords, min_chunks)
+    observe_chunks(chunks, {term for keywords in topic_keywords.values() for term in keywords})
+    best = max((score for score, _ in matches.values()), default=0.0)
+    accepted = any(score >= accept_above and matched >= min_chunks for score, matched in matches.values())
+    if reject_below is not None and best < reject_below:
+        decision = 'reject'
+    elif accepted:
+        decision = 'accept'
+    else:
+        decision = None
+    cascade_stats[decision or 'embedding'] += 1
+    print(f"[DEBUG] Lexical stage: best topic score {best:.2f} -> {decision or 'ambiguous'}")
+    return decision
+
+
+def get_cascade_stats():
+    """Return how many checks each stage decided and the share that skipped the model"""
+    total = sum(cascade_stats.values())
+    skipped = cascade_stats['reject'] + cascade_stats['accept']
+    return {
+        'lexical_reject': cascade_stats['reject'],
+        'lexical_accept': cascade_stats['accept'],
+        'embedding': cascade_stats['embedding'],
+        'embedding_avoided_rate': skipped / total if total else 0.0,
+    }
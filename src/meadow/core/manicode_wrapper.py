@@ -2,95 +2,244 @@
 Beta version of a Manicode wrapper using PTY to execute Manicode commands.
 """
 
-import os
-import select
-from typing import Dict
 import asyncio
+import codecs
+import os
+from collections import deque
+from typing import Dict, Iterable, Optional
 import ptyprocess
 
+# Tunable Parameters
+# -----------------
+# Stop if nothing has been read for this long (seconds)
+IDLE_TIMEOUT = 30
+# Stop sooner if manicode has not shown any sign of working yet (seconds)
+STARTUP_IDLE_TIMEOUT = 10
+# Maximum characters of output kept in memory (oldest output is dropped)
+MAX_OUTPUT_CHARS = 1_000_000
+# Bytes read from the PTY per readiness callback
+READ_SIZE = 65536
 
-async def execute_manicode(instructions: str, options: Dict[str, str], allow_notes: bool = False) -> str:
-    """Execute a Manicode command using PTY
+COMPLETE_SENTINEL = "Complete!"
+PROGRESS_SENTINELS = ("Wait...", "file:")
+THINKING_SENTINEL = "Thinking..."
+
+
+class SentinelMatcher:
+    """Incrementally detect marker strings in streamed output
+
+    Only the last ``len(longest sentinel) - 1`` characters are kept between
+    feeds, so markers split across reads are still found without rescanning
+    everything read so far.
+    """
+
+    def __init__(self, sentinels: Iterable[str]):
+        self.sentinels = tuple(sentinels)
+        self.seen = set()
+        self._keep = max((len(s) for s in self.sentinels), default=1) - 1
+        self._tail = ""
+
+    def feed(self, text: str) -> set:
+        """Scan new text and return the sentinels seen for the first time"""
+        window = self._tail + text
+        found = {s for s in self.sentinels if s not in self.seen and s in window}
+        self.seen |= found
+        self._tail = window[-self._keep:] if self._keep else ""
+        return found
+
+
+class ManicodeRun:
+    """A shell command on a PTY, driven by event-loop readiness callbacks
+
+    Iterate with ``async for chunk in run`` to stream decoded output. The
+    command is written only when the PTY is writable, output is read only
+    when it is readable, and nothing blocks the loop, so several runs can
+    share one event loop.
+    """
+
+    def __init__(self, command: str, cwd: str, env: Optional[Dict[str, str]] = None,
+                 idle_timeout: float = IDLE_TIMEOUT, startup_idle_timeout: float = STARTUP_IDLE_TIMEOUT,
+                 max_output_chars: int = MAX_OUTPUT_CHARS, shell: str = "bash"):
+        self.command = command
+        self.cwd = cwd
+        self.env = env
+        self.idle_timeout = idle_timeout
+        self.startup_idle_timeout = startup_idle_timeout
+        self.shell = shell
+        self.matcher = SentinelMatcher((COMPLETE_SENTINEL, THINKING_SENTINEL) + PROGRESS_SENTINELS)
+
+        self._max_output_chars = max_output_chars
+        self._output = deque()
+        self._output_chars = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pty = None
+        self._loop = None
+        self._chunks = None
+        self._pending_write = b""
+        self._write_done = None
+        self._eof = False
+        # Outcome, set once the run ends
+        self.timed_out = False
+        self.exit_status = None
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether manicode reported completion or exited with status 0"""
+        return COMPLETE_SENTINEL in self.matcher.seen or (not self.timed_out and self.exit_status == 0)
+
+    @property
+    def output(self) -> str:
+        """Most recent output, up to max_output_chars"""
+        return "".join(self._output)
+
+    def _append_output(self, text):
+        """Add text to the bounded output buffer"""
+        self._output.append(text)
+        self._output_chars += len(text)
+        while self._output_chars > self._max_output_chars and len(self._output) > 1:
+            self._output_chars -= len(self._output.popleft())
+
+    def _on_readable(self):
+        """Reader callback: drain available bytes into the chunk queue"""
+        try:
+            data = os.read(self._pty.fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:  # EIO once the child side of the PTY closes
+            data = b""
+        if not data:
+            self._loop.remove_reader(self._pty.fd)
+            self._chunks.put_nowait(None)
+            return
+        self._chunks.put_nowait(data)
+
+    def _on_writable(self):
+        """Writer callback: send as much pending input as the PTY accepts"""
+        try:
+            sent = os.write(self._pty.fd, self._pending_write)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._loop.remove_writer(self._pty.fd)
+            if not self._write_done.done():
+                self._write_done.set_exception(e)
+            return
+        self._pending_write = self._pending_write[sent:]
+        if not self._pending_write:
+            self._loop.remove_writer(self._pty.fd)
+            if not self._write_done.done():
+                self._write_done.set_result(None)
+
+    def start(self):
+        """Spawn the shell and queue the command for flow-controlled writing"""
+        self._loop = asyncio.get_running_loop()
+        self._chunks = asyncio.Queue()
+        self._write_done = self._loop.create_future()
+        self._pty = ptyprocess.PtyProcess.spawn([self.shell], env=self.env, cwd=self.cwd)
+        os.set_blocking(self._pty.fd, False)
+        self._pending_write = self.command.encode()
+        self._loop.add_reader(self._pty.fd, self._on_readable)
+        self._loop.add_writer(self._pty.fd, self._on_writable)
+        print(f"[DEBUG] Process spawned successfully, writing command (length: {len(self._pending_write)})")
+
+    def close(self):
+        """Stop watching the PTY and terminate the process"""
+        if self._pty is None:
+            return
+        self._loop.remove_reader(self._pty.fd)
+        self._loop.remove_writer(self._pty.fd)
+        if self._write_done is not None and not self._write_done.done():
+            self._write_done.cancel()
+        if self._eof:
+            # Every holder of the PTY has closed it, so the shell is exiting
+            self.exit_status = self._pty.wait()
+        elif self._pty.isalive():
+            self._pty.terminate(force=True)
+        self._pty = None
+
+    def _timeout(self):
+        """Idle time allowed before the next read, depending on progress so far"""
+        if any(s in self.matcher.seen for s in PROGRESS_SENTINELS):
+            return self.idle_timeout
+        return min(self.startup_idle_timeout, self.idle_timeout)
+
+    async def __aiter__(self):
+        if self._pty is None:
+            self.start()
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(self._chunks.get(), timeout=self._timeout())
+                except asyncio.TimeoutError:
+                    print("[DEBUG] Manicode output idle, stopping")
+                    self.timed_out = True
+                    break
+                if data is None:
+                    self._eof = True
+                    break
+                if self._write_done.done() and self._write_done.exception() is not None:
+                    print(f"[ERROR] Failed to write to PTY: {self._write_done.exception()}")
+                    break
+
+                text = self._decoder.decode(data)
+                if not text:
+                    continue
+                self._append_output(text)
+                found = self.matcher.feed(text)
+                if THINKING_SENTINEL in self.matcher.seen:
+                    print(text, end="", flush=True)
+                yield text
+
+                if COMPLETE_SENTINEL in found:
+                    break
+        finally:
+            self.close()
+
+
+def build_manicode_command(instructions: str) -> str:
+    """Shell line that runs manicode with instructions and then exits"""
+    # Escape quotes and newlines for shell
+    escaped_instructions = instructions.replace('"', '\\"').replace('\n', '\\n')
+    return f"manicode . '{escaped_instructions}'; exit\r"
+
+
+def start_manicode(instructions: str, options: Dict[str, str], allow_notes: bool = False) -> ManicodeRun:
+    """Create a manicode run whose output can be streamed with ``async for``
 
     Args:
         instructions: The instructions for Manicode
         options: Dictionary of options including cwd
         allow_notes: Whether to grant access to notes directory
     """
-    output = ""
-    shell = "bash"  # Assuming Unix-like system since PTY is required
-    pty = None
+    env = os.environ.copy()
+    if allow_notes:
+        env["MANICODE_ALLOW_NOTES"] = "1"
+        env["MANICODE_NOTES_DIR"] = options.get("notes_dir", "")
+        print(f"[DEBUG] Notes enabled: {env['MANICODE_NOTES_DIR']}")
+    return ManicodeRun(build_manicode_command(instructions), options["cwd"], env=env)
 
-    try:
-        print("[DEBUG] Starting manicode process...")
-        env = os.environ.copy()
-        if allow_notes:
-            env["MANICODE_ALLOW_NOTES"] = "1"
-            env["MANICODE_NOTES_DIR"] = options.get("notes_dir", "")
-            print(f"[DEBUG] Notes enabled: {env['MANICODE_NOTES_DIR']}")
-        pty = ptyprocess.PtyProcess.spawn([shell], env=env, cwd=options["cwd"])
-        print("[DEBUG] Process spawned successfully")
-        last_read = asyncio.get_event_loop().time()
-        try:
-            # Escape quotes and newlines for shell
-            escaped_instructions = instructions.replace('"', '\\"').replace('\n', '\\n')
-            print("[DEBUG] Writing to PTY (length: {})".format(len(escaped_instructions)))
-
-            # Write command in chunks to avoid buffer overflow
-            chunk_size = 1024
-            command = f"manicode . '{escaped_instructions}'; exit\r"
-            for i in range(0, len(command), chunk_size):
-                chunk = command[i:i + chunk_size]
-                pty.write(chunk.encode())
-                await asyncio.sleep(0.1)  # Give PTY time to process
-            print("[DEBUG] Command sent, waiting for output...")
-        except ptyprocess.PtyProcessError as e:
-            print(f"[ERROR] Failed to write to PTY: {str(e)}")
-            raise
-
-        while True:
-            current_time = asyncio.get_event_loop().time()
-            time_since_last_read = current_time - last_read
-
-            if not pty.isalive():
-                break
-
-            if time_since_last_read > 30: # Unconditional timeout
-                break
-
-            if time_since_last_read > 10 and "Wait..." not in output and "file:" not in output:
-                break
-
-            if not select.select([pty.fd], [], [], 0.1)[0]:
-                await asyncio.sleep(0.1)
-                continue
-
-            try:
-                data = pty.read()
-            except ptyprocess.PtyProcessError as e:
-                print(f"[ERROR] PTY process error: {str(e)}")
-                break
-
-            if not data:
-                continue
-
-            decoded = data.decode()
-            output += decoded
-            if "Thinking..." in output:
-                print(decoded, end="", flush=True)
-            last_read = current_time
-
-            if "Complete!" in output:
-                break
-
-            await asyncio.sleep(0)
-
-    finally:
-        if pty and pty.isalive():
-            pty.terminate()
 
+async def execute_manicode(instructions: str, options: Dict[str, str], allow_notes: bool = False) -> str:
+    """Execute a Manicode command using PTY
+
+    Args:
+        instructions: The instructions for Manicode
+        options: Dictionary of options including cwd
+        allow_notes: Whether to grant access to notes directory
+
+    Raises:
+        RuntimeError: If manicode went idle or exited with a non-zero status;
+            the partial output is not a finished result
+    """
+    print("[DEBUG] Starting manicode process...")
+    run = start_manicode(instructions, options, allow_notes)
+    async for _ in run:
+        pass
+    if not run.succeeded:
+        reason = "went idle" if run.timed_out else f"exited with status {run.exit_status}"
+        raise RuntimeError(f"Manicode {reason} before completing")
     print("[DEBUG] Manicode process complete")
-    return output
+    return run.output
 
 
 async def test():
@@ -106,4 +255,4 @@ async def test():
 
 
 if __name__ == "__main__":
-    asyncio.run(test())
\ No newline at end of file
+    asyncio.run(test())
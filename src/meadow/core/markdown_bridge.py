@@ -1,33 +1,99 @@
+import fcntl
+import hashlib
 import json
 import os
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 
+# Bytes just before a watermark that are checksummed to detect rewritten logs
+WATERMARK_CHECK_BYTES = 4096
+# Number of threads writing markdown files in parallel
+MARKDOWN_WRITE_WORKERS = 4
+
+DEFAULT_MANIFEST_PATH = os.path.expanduser('~/Library/Application Support/Meadow/cache/markdown_manifest.json')
+
+# Serializes manifest read-modify-write cycles between threads
+_manifest_lock = threading.Lock()
+
+
+def _default_mode():
+    """Permissions a plain open() would give a new file under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+# Read once, since changing the umask to read it is not thread safe
+_NEW_FILE_MODE = _default_mode()
+
+def atomic_write(filepath, content):
+    """Write content to filepath via a temp file and rename, so readers never see partial files
+
+    The file keeps its permissions (mkstemp alone would leave it at 0600).
+    """
+    directory = os.path.dirname(filepath)
+    try:
+        mode = stat.S_IMODE(os.stat(filepath).st_mode)
+    except FileNotFoundError:
+        mode = _NEW_FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.md')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(filepath):
+    """Hold an exclusive lock on filepath, shared by every thread and process using it
+
+    The lock lives on a hidden ".<name>.lock" file next to filepath, so it
+    survives filepath itself being replaced by atomic_write.
+    """
+    directory, name = os.path.split(filepath)
+    with open(os.path.join(directory, f'.{name}.lock'), 'a', encoding='utf-8') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
 class MarkdownBridge:
     """Bridge between Application Support logs and Manicode working directory"""
 
-    def __init__(self, notes_dir):
+    def __init__(self, notes_dir, manifest_path=DEFAULT_MANIFEST_PATH):
         self.notes_dir = notes_dir
         self.lognotes_dir = os.path.join(self.notes_dir, '_machine', '_staging', 'lognotes')
+        # Maps each rendered file to the hash of its content, kept outside the synced notes dir
+        self.manifest_path = manifest_path
 
     def prepare_workspace(self):
         """Set up the workspace structure"""
         os.makedirs(self.lognotes_dir, exist_ok=True)
 
-    def convert_logs_to_markdown(self, logs):
-        """Convert JSON log entries to markdown files"""
-        for log in logs:
-            # Create a markdown file for each log entry
-            timestamp = datetime.strptime(log['timestamp'], '%Y-%m-%d %H:%M:%S')
-            filename = f"log_{timestamp.strftime('%Y%m%d_%H%M%S')}.md"
-            filepath = os.path.join(self.lognotes_dir, filename)
+    def render_log(self, log):
+        """Return (filepath, markdown) for a JSON log entry"""
+        timestamp = datetime.strptime(log['timestamp'], '%Y-%m-%d %H:%M:%S')
+        filename = f"log_{timestamp.strftime('%Y%m%d_%H%M%S')}.md"
+        filepath = os.path.join(self.lognotes_dir, filename)
 
-            # TODO: Add proper path escaping for YAML headers to handle special characters
+        # TODO: Add proper path escaping for YAML headers to handle special characters
 
-            # Prepare URL field if available
-            url_field = f"url: {log['url']}\n" if log.get('url') else ""
+        # Prepare URL field if available
+        url_field = f"url: {log['url']}\n" if log.get('url') else ""
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"""---
+        return filepath, f"""---
 timestamp: {log['timestamp']}
 app: {log['app']}
 window: {log['window']}
@@ -51,12 +117,68 @@ continuation: {log['continuation']}
 ```text
 {log['ocr_text']}
 ```
-""")
-        print(f"Saved converted md to {filepath}.")
+"""
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def convert_logs_to_markdown(self, logs, failed=None):
+        """Convert JSON log entries to markdown files
+
+        Files whose rendered content is unchanged since the last write are
+        skipped. The rest are written atomically on a small thread pool.
+        Paths whose write failed are added to the failed set, if given.
+
+        Returns:
+            List of paths that were actually written
+        """
+        rendered = dict(self.render_log(log) for log in logs)
+
+        with _manifest_lock:
+            manifest = self._load_manifest()
+            hashes = {path: hashlib.sha256(content.encode('utf-8')).hexdigest()
+                      for path, content in rendered.items()}
+            changed = [path for path, digest in hashes.items()
+                       if manifest.get(path) != digest or not os.path.exists(path)]
+
+            written = []
+            if changed:
+                with ThreadPoolExecutor(max_workers=MARKDOWN_WRITE_WORKERS) as pool:
+                    futures = {path: pool.submit(atomic_write, path, rendered[path]) for path in changed}
+                for path, future in futures.items():
+                    try:
+                        future.result()
+                    except OSError as e:
+                        print(f"Error writing {path}: {e}")
+                        if failed is not None:
+                            failed.add(path)
+                        continue
+                    manifest[path] = hashes[path]
+                    written.append(path)
+                self._save_manifest(manifest)
+
+        print(f"Saved {len(written)} converted md files to {self.lognotes_dir} "
+              f"({len(rendered) - len(changed)} unchanged).")
+        return written
 
 
 async def process_analysis_result(analysis_result: dict, notes_dir: str):
-    """Process a single analysis result immediately after screenshot analysis"""
+    """Process a single analysis result immediately after screenshot analysis
+
+    Returns:
+        List of markdown files that changed
+    """
     try:
         print("\n[DEBUG] Processing single analysis result...")
 
@@ -65,17 +187,109 @@ async def process_analysis_result(analysis_result: dict, notes_dir: str):
         bridge.prepare_workspace()
 
         # Convert single result to markdown
-        bridge.convert_logs_to_markdown([analysis_result])
+        return bridge.convert_logs_to_markdown([analysis_result])
 
     except OSError as e:
         print(f"Error processing analysis result: {e}")
+        return []
+
+
+def _load_watermarks(path):
+    """Load per-file watermarks for processed logs"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_watermarks(path, watermarks):
+    """Atomically save per-file watermarks"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _checksum(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _entries_end(data):
+    """Byte offset just past the last entry of a JSON array log, or None if malformed"""
+    close = data.rfind(b']')
+    if close < 0:
+        return None
+    return len(data[:close].rstrip())
+
+
+def _make_watermark(stat, data, data_start, entries):
+    """Build a watermark for a log whose bytes from data_start onward are data"""
+    end = _entries_end(data)
+    if end is None:
+        return None
+    offset = data_start + end
+    check_from = max(0, end - WATERMARK_CHECK_BYTES)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'offset': offset,
+        'check_bytes': end - check_from,
+        'checksum': _checksum(data[check_from:end]),
+        'entries': entries,
+    }
+
+
+def read_new_log_entries(log_file, watermark):
+    """Return (entries appended since watermark, new watermark)
+
+    Logs are JSON arrays that only ever grow at the end, so when the bytes just
+    before the watermark are unchanged only the appended tail is read and
+    parsed. A rewritten file falls back to a full parse and resumes from the
+    saved entry index.
+    """
+    stat = os.stat(log_file)
+    if watermark and watermark['size'] == stat.st_size and watermark['mtime'] == stat.st_mtime:
+        return [], watermark
+
+    with open(log_file, 'rb') as f:
+        if watermark and watermark['offset'] <= stat.st_size:
+            start = watermark['offset'] - watermark['check_bytes']
+            f.seek(start)
+            data = f.read()
+            if _checksum(data[:watermark['check_bytes']]) == watermark['checksum']:
+                # The tail is ",\n  {...},\n  {...}\n]", or "{...}\n]" after an empty log
+                tail = data[watermark['check_bytes']:].strip()
+                try:
+                    new_entries = json.loads(b'[' + (tail[1:] if tail.startswith(b',') else tail))
+                except json.JSONDecodeError:
+                    new_entries = None
+                if isinstance(new_entries, list):
+                    new_mark = _make_watermark(stat, data, start, watermark['entries'] + len(new_entries))
+                    if new_mark is not None:
+                        return new_entries, new_mark
+
+        # First run for this file, or it was rewritten: parse it in full
+        f.seek(0)
+        data = f.read()
+
+    logs = json.loads(data)
+    done = watermark['entries'] if watermark else 0
+    # Entries flagged by older versions that rewrote logs in place are skipped
+    new_entries = [log for log in logs[done:] if not log.get('processed', False)]
+    return new_entries, _make_watermark(stat, data, 0, len(logs))
 
 
 async def process_saved_logs(notes_dir: str):
-    """Process saved unprocessed logs from Application Support"""
+    """Process saved unprocessed logs from Application Support
+
+    Returns:
+        List of markdown files that changed
+    """
     # Get logs from Application Support
     app_support_dir = os.path.expanduser('~/Library/Application Support/Meadow')
     log_dir = os.path.join(app_support_dir, 'data', 'logs')
+    watermarks_path = os.path.join(app_support_dir, 'data', 'markdown_watermarks.json')
 
     try:
         print("\n[DEBUG] Processing saved logs...")
@@ -84,28 +298,32 @@ async def process_saved_logs(notes_dir: str):
         bridge = MarkdownBridge(notes_dir)
         bridge.prepare_workspace()
 
-        # Get all unprocessed logs from dated files
+        # Get entries appended to dated files since the last run
+        watermarks = _load_watermarks(watermarks_path)
         unprocessed_logs = []
+        # Maps each log file to (its new entries, its advanced watermark)
+        pending = {}
 
-        for filename in os.listdir(log_dir):
+        for filename in sorted(os.listdir(log_dir)):
             if filename.startswith('log_') and filename.endswith('.json') and len(filename) == 17:  # log_YYYYMMDD.json
                 log_file = os.path.join(log_dir, filename)
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-                    # Filter for unprocessed logs
-                    unprocessed = [log for log in logs if not log.get('processed', False)]
-                    unprocessed_logs.extend(unprocessed)
-
-                    # Update processed status
-                    if unprocessed:
-                        for log in logs:
-                            if log in unprocessed:
-                                log['processed'] = True
-                        with open(log_file, 'w', encoding='utf-8') as f:
-                            json.dump(logs, f, indent=2)
-
-        bridge.convert_logs_to_markdown(unprocessed_logs)
+                new_entries, new_mark = read_new_log_entries(log_file, watermarks.get(filename))
+                unprocessed_logs.extend(new_entries)
+                if new_mark is not None:
+                    pending[filename] = (new_entries, new_mark)
 
+        print(f"[DEBUG] Found {len(unprocessed_logs)} new log entries")
+        failed = set()
+        changed = bridge.convert_logs_to_markdown(unprocessed_logs, failed)
+        # Only advance watermarks once the entries have been written out
+        for filename, (new_entries, new_mark) in pending.items():
+            if any(bridge.render_log(log)[0] in failed for log in new_entries):
+                print(f"[ERROR] Keeping watermark for {filename} until its entries are written")
+                continue
+            watermarks[filename] = new_mark
+        _save_watermarks(watermarks_path, watermarks)
+        return changed
 
     except (FileNotFoundError, json.JSONDecodeError, OSError) as e:
         print(f"Error processing saved logs: {e}")
+        return []
@@ -4,7 +4,6 @@
 import os
 import threading
 import time
-import asyncio
 from datetime import datetime
 from PIL import ImageGrab
 import subprocess
@@ -19,15 +18,11 @@ from Quartz import (
     kCGWindowName,
     CGWindowListCreateImage,
     CGRectNull,
-    NSURL,
     kCGWindowListOptionIncludingWindow,
-    CGImageDestinationCreateWithURL,
-    CGImageDestinationFinalize,
-    CGImageDestinationAddImage,
 )
 
-from meadow.core.screenshot_analyzer import analyze_and_log_screenshot
-from meadow.core.topic_similarity import initialize_model
+from meadow.core.capture import CapturedFrame, capture_backlog
+from meadow.core.usage_ledger import budget_exceeded
 
 def get_browser_url(app_name):
     """Get URL from browser using AppleScript"""
@@ -88,7 +83,7 @@ def get_active_window_info():
     return {'app': 'Unknown App', 'title': 'No Title', 'url': None}
 
 def take_screenshot(data_dir):
-    """Capture and save a screenshot, returns (screenshot, image_path, timestamp, window_info)"""
+    """Capture the active window, returns a CapturedFrame"""
     # Get the active window info
     window_info = get_active_window_info()
     screenshot = None
@@ -116,27 +111,26 @@ def take_screenshot(data_dir):
         screenshot = ImageGrab.grab(all_screens=False)
     timestamp = datetime.now()
     window_info = get_active_window_info()
-    screenshot_dir = os.path.join(data_dir, 'screenshots')
-    os.makedirs(screenshot_dir, exist_ok=True)
-    # Save to temp location first
-    temp_dir = os.path.join(data_dir, 'temp')
-    os.makedirs(temp_dir, exist_ok=True)
-    temp_path = os.path.join(temp_dir, f"temp_{timestamp.strftime('%Y%m%d_%H%M%S')}.png")
-    # Save CGImage directly to PNG
-    destination = CGImageDestinationCreateWithURL(
-            NSURL.fileURLWithPath_(temp_path),
-        "public.png",  # Use the UTI string directly
-        1,
-        None
-    )
-    CGImageDestinationAddImage(destination, screenshot, None)
-    CGImageDestinationFinalize(destination)
-    return screenshot, temp_path, timestamp, window_info
-
-def monitoring_loop(get_config, timer_menu_item, is_monitoring_ref, data_dir, set_title):
-    """Main monitoring loop"""
-    # Initialize model at start of monitoring
-    asyncio.run(initialize_model())
+    # Kept in memory; encoded and written only if the analysis keeps it
+    frame = CapturedFrame(screenshot, timestamp, window_info, data_dir)
+    capture_backlog.add(frame)
+    return frame
+
+def monitoring_loop(get_config, timer_menu_item, is_monitoring_ref, data_dir, set_title, submit=None):
+    """Main monitoring loop
+
+    Args:
+        submit: Called with (frame, log_path) to analyze a capture, e.g.
+            AnalysisWorker.submit; by default it is analyzed on a thread in this process
+    """
+    if submit is None:
+        # pylint: disable=import-outside-toplevel
+        from meadow.core.screenshot_analyzer import analyze_and_log_screenshot
+        from meadow.core.topic_similarity import initialize_model
+        # Initialize model at start of monitoring
+        initialize_model()
+        submit = lambda frame, log_path: threading.Thread(target=analyze_and_log_screenshot,
+                                                          args=(frame, log_path)).start()
 
     config = get_config()
     print(f"[DEBUG] Starting monitoring loop with interval: {config['interval']}")
@@ -156,11 +150,19 @@ def monitoring_loop(get_config, timer_menu_item, is_monitoring_ref, data_dir, se
                 continue
             print(f"[DEBUG] Taking screenshot at {datetime.now().strftime('%H:%M:%S')}")
             config = get_config()  # Get fresh config for screenshot
-            screenshot, image_path, timestamp, window_info = take_screenshot(config['screenshot_dir'])
-            print(f"[DEBUG] Screenshot saved to {image_path}")
+            if budget_exceeded(config):
+                # Background analysis pauses until tomorrow; "Analyze Current Window" still works
+                print(f"[DEBUG] Daily budget of ${config['daily_budget_usd']} reached, skipping capture")
+                set_title("👁️ 💸")
+                next_screenshot = time.time() + config['interval']
+                last_window_info = current_window
+                time.sleep(1)
+                continue
+            frame = take_screenshot(config['screenshot_dir'])
+            print(f"[DEBUG] Captured {frame.window_info['app']} ({len(capture_backlog)} captures in progress)")
             today = datetime.now().strftime('%Y%m%d')
             log_path = os.path.join(data_dir, 'logs', f'log_{today}.json')
-            threading.Thread(target=analyze_and_log_screenshot, args=(screenshot, image_path, timestamp, window_info, log_path)).start()
+            submit(frame, log_path)
             next_screenshot = time.time() + config['interval']
             last_window_info = current_window
 
@@ -0,0 +1,331 @@
+"""Debounced scheduler that feeds only newly staged notes to the note generator"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from meadow.core.manicode_wrapper import execute_manicode
+from meadow.core.markdown_bridge import atomic_write
+
+# Tunable Parameters
+# -----------------
+# Quiet period after the last staged-file event before a batch is considered complete (seconds)
+NOTE_DEBOUNCE_SECONDS = 30
+# Maximum staged files sent to the generator in one run
+MAX_BATCH_FILES = 50
+
+DEFAULT_JOB_STATE_PATH = os.path.expanduser('~/Library/Application Support/Meadow/data/note_jobs.json')
+MANIFEST_FILENAME = '_job_manifest.md'
+
+INSTRUCTIONS_TEMPLATE = """
+1. Read _machine/_staging/{manifest}. It lists the only new staged files for this run; do not scan the rest of _machine/_staging/
+2. Read each staged file listed in the manifest
+3. Update the existing notes listed in the manifest, or create new topic-specific notes in _machine/; do not scan other notes
+4. Link related concepts using [[wiki-style]] links
+5. Update the knowledge files in _machine/ to reflect new information
+"""
+
+
+def _pid_alive(pid):
+    """Check whether a process id is still running"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class NoteJobScheduler:
+    """Collects new files under _machine/_staging and runs the generator on the delta
+
+    The job record at ``state_path`` stores the mtime of every staged file that a
+    successful run consumed and the currently running job, so a restart (or a
+    second app instance) neither reprocesses old files nor overlaps a live run.
+    Runs are serialized: requests made while a job runs are coalesced into one
+    follow-up run over whatever arrived in the meantime.
+    """
+
+    def __init__(self, notes_dir, state_path=DEFAULT_JOB_STATE_PATH, runner=None,
+                 debounce=NOTE_DEBOUNCE_SECONDS, auto_run=False, on_complete=None, notes_index=None):
+        self.notes_dir = notes_dir
+        self.staging_dir = os.path.join(notes_dir, '_machine', '_staging')
+        self.state_path = state_path
+        # async runner(instructions, options, allow_notes) -> output; raises if the run did not complete
+        self.runner = runner or execute_manicode
+        self.debounce = debounce
+        self.auto_run = auto_run
+        # Called with whether anything was generated once requested runs end, or when a request is refused
+        self.on_complete = on_complete
+        # Optional NotesIndex used to list the existing notes each batch is likely to touch
+        self.notes_index = notes_index
+
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._timer = None
+        self._observer = None
+        self._worker = None
+        self._rerun = False
+        self._state = self._load_state()
+
+    def _load_state(self):
+        """Load the persistent job record"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault('consumed', {})
+        state.setdefault('job', None)
+        state.setdefault('history', [])
+        return state
+
+    def _save_state(self):
+        """Persist the job record atomically"""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        atomic_write(self.state_path, json.dumps(self._state, indent=2))
+
+    def _relpath(self, path):
+        return os.path.relpath(path, self.staging_dir)
+
+    def _is_staged_note(self, path):
+        """Only markdown files written by the bridges count as staged material"""
+        name = os.path.basename(path)
+        return name.endswith('.md') and name != MANIFEST_FILENAME and not name.startswith('.')
+
+    def _is_new(self, relpath):
+        """A staged file is new if it was never consumed or changed since"""
+        try:
+            mtime = os.stat(os.path.join(self.staging_dir, relpath)).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        return self._state['consumed'].get(relpath) != mtime
+
+    def scan(self):
+        """Find staged files missed while not watching (e.g. written before startup)"""
+        found = []
+        for root, _, files in os.walk(self.staging_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if self._is_staged_note(path) and self._is_new(self._relpath(path)):
+                    found.append(self._relpath(path))
+        with self._lock:
+            self._pending.update(found)
+        print(f"[DEBUG] Note scheduler found {len(found)} unprocessed staged files")
+        return len(found)
+
+    def pending(self):
+        """Sorted staged files waiting for a run"""
+        with self._lock:
+            return sorted(self._pending)
+
+    def notify(self, path):
+        """Record a created or modified staged file and restart the debounce timer"""
+        if not self._is_staged_note(path):
+            return
+        relpath = self._relpath(path)
+        if relpath.startswith('..'):
+            return
+        with self._lock:
+            self._pending.add(relpath)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._on_batch_ready)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_batch_ready(self):
+        """Debounce timer callback: the staging area has been quiet long enough"""
+        with self._lock:
+            self._timer = None
+            count = len(self._pending)
+        print(f"[DEBUG] Staged batch settled with {count} pending files")
+        if self.auto_run and count:
+            self.request_run()
+
+    def start_watching(self):
+        """Watch the staging tree for new files with watchdog"""
+        # pylint: disable=import-outside-toplevel
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        scheduler = self
+
+        class StagingHandler(FileSystemEventHandler):
+            """Forward staged file writes to the scheduler"""
+            def on_created(self, event):
+                if not event.is_directory:
+                    scheduler.notify(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    scheduler.notify(event.src_path)
+
+            def on_moved(self, event):
+                # Atomic writes land via rename
+                if not event.is_directory:
+                    scheduler.notify(event.dest_path)
+
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.scan()
+        self._observer = Observer()
+        self._observer.schedule(StagingHandler(), self.staging_dir, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        print(f"[DEBUG] Watching {self.staging_dir} for staged notes")
+
+    def stop_watching(self):
+        """Stop the watchdog observer and any pending debounce timer"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def is_running(self):
+        """Whether a job is running here or in another live process"""
+        if self._worker is not None and self._worker.is_alive():
+            return True
+        job = self._load_state().get('job')
+        return bool(job and job.get('pid') != os.getpid() and _pid_alive(job.get('pid', 0)))
+
+    def request_run(self):
+        """Start a generation run, or queue one follow-up run if a job is active
+
+        Returns True if a new run was started. on_complete is called once the
+        runs end, or right away if the request is refused because another
+        process is running a job.
+        """
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                self._rerun = True
+                print("[DEBUG] Note generation already running, queued a follow-up run")
+                return False
+            job = self._load_state().get('job')
+            refused = bool(job and job.get('pid') != os.getpid() and _pid_alive(job.get('pid', 0)))
+            if refused:
+                print(f"[DEBUG] Note generation job {job['id']} is running in process {job['pid']}, skipping")
+            else:
+                self._rerun = False
+                self._worker = threading.Thread(target=self._run_jobs, daemon=True)
+                self._worker.start()
+        if refused:
+            if self.on_complete:
+                self.on_complete(False)
+            return False
+        return True
+
+    def wait(self, timeout=None):
+        """Block until the current worker finishes"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _next_batch(self):
+        """Take up to MAX_BATCH_FILES still-new staged files"""
+        with self._lock:
+            batch = [p for p in sorted(self._pending) if self._is_new(p)][:MAX_BATCH_FILES]
+            self._pending -= set(p for p in self._pending if not self._is_new(p))
+        return batch
+
+    def _related_notes(self, batch):
+        """Existing notes the notes index expects this batch to update"""
+        if self.notes_index is None:
+            return []
+        texts = []
+        for path in batch:
+            try:
+                with open(os.path.join(self.staging_dir, path), 'r', encoding='utf-8', errors='replace') as f:
+                    texts.append(f.read())
+            except OSError:
+                pass
+        try:
+            return self.notes_index.select_notes(texts)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] Could not select related notes: {e}")
+            return []
+
+    def _write_manifest(self, job_id, batch):
+        """Write the delta manifest the generator reads instead of the whole staging tree"""
+        lines = [f"# Staged files for job {job_id}", ""]
+        lines += [f"- _machine/_staging/{path}" for path in batch]
+        related = self._related_notes(batch)
+        if related:
+            lines += ["", "# Existing notes likely to need updates", ""]
+            for relpath in related:
+                try:
+                    links = self.notes_index.entry(relpath)['links']
+                except KeyError:  # Removed by the watcher since it was selected
+                    continue
+                lines.append(f"* {relpath}" + (f" (links: {', '.join(links)})" if links else ""))
+        atomic_write(os.path.join(self.staging_dir, MANIFEST_FILENAME), "\n".join(lines) + "\n")
+
+    def _run_jobs(self):
+        """Worker thread: run batches until nothing new is pending"""
+        generated = False
+        while True:
+            # The watcher reports new files as they arrive; without it, look for them
+            if self._observer is None:
+                self.scan()
+            batch = self._next_batch()
+            if not batch:
+                with self._lock:
+                    if not self._rerun:
+                        break
+                    self._rerun = False
+                continue
+            if not self._run_batch(batch):
+                break
+            generated = True
+        if self.on_complete:
+            self.on_complete(generated)
+
+    def _run_batch(self, batch):
+        """Run the generator on one batch and record the outcome"""
+        # Remember mtimes now so edits made during the run are picked up next time
+        mtimes = {}
+        for path in batch:
+            try:
+                mtimes[path] = os.stat(os.path.join(self.staging_dir, path)).st_mtime_ns
+            except FileNotFoundError:
+                pass
+
+        job_id = uuid.uuid4().hex[:8]
+        self._state = self._load_state()
+        self._state['job'] = {'id': job_id, 'pid': os.getpid(), 'files': batch,
+                              'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        self._save_state()
+        print(f"[DEBUG] Running note generation job {job_id} on {len(batch)} staged files")
+
+        start = time.time()
+        status = 'done'
+        try:
+            self._write_manifest(job_id, batch)
+            asyncio.run(self.runner(INSTRUCTIONS_TEMPLATE.format(manifest=MANIFEST_FILENAME), {
+                "cwd": self.notes_dir,
+                "notes_dir": self.notes_dir
+            }, True))
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] Note generation job {job_id} failed: {e}")
+            status = 'failed'
+
+        self._state = self._load_state()
+        if status == 'done':
+            self._state['consumed'].update(mtimes)
+            with self._lock:
+                self._pending -= set(mtimes)
+        self._state['job'] = None
+        self._state['history'] = (self._state['history'] + [{
+            'id': job_id, 'files': len(batch), 'status': status,
+            'seconds': round(time.time() - start, 1)}])[-20:]
+        self._save_state()
+        print(f"[DEBUG] Note generation job {job_id} {status} in {time.time() - start:.1f}s")
+        return status == 'done'
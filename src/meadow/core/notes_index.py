@@ -0,0 +1,238 @@
+"""Incrementally maintained index of the notes vault for note-generation context"""
+
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from meadow.core.markdown_bridge import atomic_write
+from meadow.core.topic_similarity import get_embeddings
+
+# Tunable Parameters
+# -----------------
+# Number of existing notes handed to the generator per batch
+NOTES_TOP_K = 10
+# Characters of body text (after headings) embedded to represent a note
+SUMMARY_CHARS = 1000
+# Characters of each staged file used to find related notes
+STAGED_QUERY_CHARS = 2000
+# Added to a note's score when a staged file mentions its title verbatim
+TITLE_MENTION_BONUS = 0.1
+
+DEFAULT_NOTES_INDEX_PATH = os.path.expanduser('~/Library/Application Support/Meadow/cache/notes_index.json')
+
+HEADING_RE = re.compile(r'^#{1,6}\s+(.+?)\s*#*\s*$', re.MULTILINE)
+WIKI_LINK_RE = re.compile(r'\[\[([^\]|#]+)')
+FRONTMATTER_RE = re.compile(r'\A---\n.*?\n---\n', re.DOTALL)
+
+
+def parse_note(text):
+    """Extract headings, wiki-link targets and an embedding summary from markdown"""
+    body = FRONTMATTER_RE.sub('', text)
+    headings = HEADING_RE.findall(body)
+    links = sorted(set(link.strip() for link in WIKI_LINK_RE.findall(body)))
+    prose = ' '.join(HEADING_RE.sub('', body).split())[:SUMMARY_CHARS]
+    return {'headings': headings, 'links': links, 'summary': prose}
+
+
+class NotesIndex:
+    """Headings, wiki links, mtimes and embeddings of every note outside the staging area
+
+    Entries are keyed by path relative to ``notes_dir`` and only re-parsed when
+    a file's mtime or size changes, either on ``refresh`` or from watchdog
+    events. Embeddings come from the shared embedding cache, so unchanged
+    notes are never re-encoded.
+    """
+
+    def __init__(self, notes_dir, index_path=DEFAULT_NOTES_INDEX_PATH, embed=None):
+        self.notes_dir = notes_dir
+        self.index_path = index_path
+        # embed(texts) -> list of vectors
+        self.embed = embed or get_embeddings
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._vectors = {}
+        self._observer = None
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Load the persisted index, if it belongs to this notes dir"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('notes_dir') == self.notes_dir:
+                self._entries = data.get('entries', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def save(self):
+        """Persist the index if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({'notes_dir': self.notes_dir, 'entries': self._entries})
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        atomic_write(self.index_path, payload)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_indexed_path(self, relpath):
+        """Markdown notes outside hidden folders and the staging area"""
+        parts = relpath.split(os.sep)
+        if not relpath.endswith('.md') or relpath.startswith('..'):
+            return False
+        if any(part.startswith('.') for part in parts):
+            return False
+        return parts[:2] != ['_machine', '_staging']
+
+    def update_path(self, path):
+        """Re-parse one note if it changed since it was indexed"""
+        relpath = os.path.relpath(path, self.notes_dir)
+        if not self._is_indexed_path(relpath):
+            return False
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return self.remove_path(path)
+        entry = self._entries.get(relpath)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return False
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                parsed = parse_note(f.read())
+        except OSError:
+            return False
+        parsed.update(mtime=stat.st_mtime_ns, size=stat.st_size)
+        with self._lock:
+            self._entries[relpath] = parsed
+            self._vectors.pop(relpath, None)
+            self._dirty = True
+        return True
+
+    def remove_path(self, path):
+        """Drop a deleted note"""
+        relpath = os.path.relpath(path, self.notes_dir)
+        with self._lock:
+            if self._entries.pop(relpath, None) is None:
+                return False
+            self._vectors.pop(relpath, None)
+            self._dirty = True
+        return True
+
+    def refresh(self):
+        """Stat every note and re-parse only changed ones"""
+        seen = set()
+        changed = 0
+        for root, dirs, files in os.walk(self.notes_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, self.notes_dir)
+                if self._is_indexed_path(relpath):
+                    seen.add(relpath)
+                    changed += self.update_path(path)
+        for relpath in set(self._entries) - seen:
+            changed += self.remove_path(os.path.join(self.notes_dir, relpath))
+        self.save()
+        print(f"[DEBUG] Notes index refreshed: {len(self._entries)} notes, {changed} changed")
+        return changed
+
+    def start_watching(self):
+        """Keep the index current from watchdog events"""
+        # pylint: disable=import-outside-toplevel
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        index = self
+
+        class NotesHandler(FileSystemEventHandler):
+            """Forward note changes to the index"""
+            def on_created(self, event):
+                if not event.is_directory:
+                    index.update_path(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    index.update_path(event.src_path)
+
+            def on_deleted(self, event):
+                if not event.is_directory:
+                    index.remove_path(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    index.remove_path(event.src_path)
+                    index.update_path(event.dest_path)
+
+        os.makedirs(self.notes_dir, exist_ok=True)
+        self.refresh()
+        self._observer = Observer()
+        self._observer.schedule(NotesHandler(), self.notes_dir, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        print(f"[DEBUG] Watching {self.notes_dir} for note changes")
+
+    def stop_watching(self):
+        """Stop the watchdog observer and persist the index"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        self.save()
+
+    def _note_text(self, relpath, entry):
+        """Text embedded to represent a note"""
+        title = os.path.splitext(os.path.basename(relpath))[0]
+        return ' '.join([title] + entry['headings'] + [entry['summary']])
+
+    def _note_vectors(self, relpaths):
+        """Normalized embeddings for relpaths, encoding only notes not seen since they changed"""
+        with self._lock:
+            missing = [p for p in relpaths if p not in self._vectors]
+            texts = [self._note_text(p, self._entries[p]) for p in missing]
+        if missing:
+            for relpath, vector in zip(missing, self.embed(texts)):
+                vector = np.asarray(vector, dtype=np.float32)
+                with self._lock:
+                    self._vectors[relpath] = vector / max(np.linalg.norm(vector), 1e-12)
+        with self._lock:
+            return np.stack([self._vectors[p] for p in relpaths])
+
+    def entry(self, relpath):
+        """Indexed fields of one note"""
+        with self._lock:
+            return dict(self._entries[relpath])
+
+    def select_notes(self, staged_texts, k=NOTES_TOP_K):
+        """Return the k notes most likely to need updating for the staged texts
+
+        Each note is scored by its best cosine similarity to any staged text,
+        plus a bonus when a staged text mentions its title.
+        """
+        if self._observer is None:
+            self.refresh()
+        with self._lock:
+            relpaths = sorted(self._entries)
+        staged_texts = [text[:STAGED_QUERY_CHARS] for text in staged_texts if text.strip()]
+        if not relpaths or not staged_texts:
+            return []
+
+        queries = np.asarray(self.embed(staged_texts), dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = (self._note_vectors(relpaths) @ queries.T).max(axis=1)
+
+        staged_lower = ' '.join(staged_texts).lower()
+        for i, relpath in enumerate(relpaths):
+            title = os.path.splitext(os.path.basename(relpath))[0].lower()
+            if len(title) > 3 and title in staged_lower:
+                scores[i] += TITLE_MENTION_BONUS
+
+        top = np.argsort(-scores)[:k]
+        self.save()
+        print(f"[DEBUG] Selected {len(top)} of {len(relpaths)} notes for {len(staged_texts)} staged files")
+        return [relpaths[i] for i in top]
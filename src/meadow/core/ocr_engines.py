@@ -0,0 +1,198 @@
+"""OCR engines behind one interface: pixels in, positioned text out"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+# Engines tried in order when config has no 'ocr_engines' list
+DEFAULT_OCR_ENGINES = ['vision', 'easyocr'] if sys.platform == 'darwin' else ['tesseract', 'easyocr']
+
+CONFIG_PATH = os.path.join(os.path.expanduser('~/Library/Application Support/Meadow'), 'config', 'config.json')
+
+
+class OCREngine:
+    """Base class for OCR engines
+
+    ``load`` does the one-time setup (model weights, framework handles) and
+    ``read`` turns an HxWxC uint8 array into (x, y, w, h, text) observations in
+    pixel coordinates. Engines with ``in_process = False`` are heavy enough to
+    run in the OCR worker pool.
+    """
+    name = None
+    in_process = False
+
+    def load(self):
+        """Prepare the engine; called once before the first read"""
+
+    def read(self, frame):
+        """Return (x, y, w, h, text) observations for an image array"""
+        raise NotImplementedError
+
+    @classmethod
+    def available(cls):
+        """Whether the engine's dependencies are importable here"""
+        return False
+
+
+class VisionEngine(OCREngine):
+    """macOS Vision framework text recognition"""
+    name = 'vision'
+    in_process = True
+
+    @classmethod
+    def available(cls):
+        try:
+            # pylint: disable=import-outside-toplevel,unused-import
+            import Vision
+        except ImportError:
+            return False
+        return True
+
+    def read(self, frame):
+        return self.read_cgimage(array_to_cgimage(frame))
+
+    def read_cgimage(self, cg_image, top=None, bottom=None):
+        """Recognize text in a CGImage, optionally only between pixel rows top and bottom"""
+        # pylint: disable=import-outside-toplevel,no-member
+        import Quartz
+        import Vision
+        width = Quartz.CGImageGetWidth(cg_image)
+        height = Quartz.CGImageGetHeight(cg_image)
+        offset = 0
+        if top is not None:
+            cg_image = Quartz.CGImageCreateWithImageInRect(cg_image, Quartz.CGRectMake(0, top, width, bottom - top))
+            offset, height = top, bottom - top
+
+        request = Vision.VNRecognizeTextRequest.alloc().init()
+        handler = Vision.VNImageRequestHandler.alloc().initWithCGImage_options_(cg_image, None)
+        handler.performRequests_error_([request], None)
+
+        observations = []
+        for observation in request.results() or []:
+            # Vision boxes are normalized with the origin at the bottom left
+            box = observation.boundingBox()
+            x = box.origin.x * width
+            y = offset + (1 - box.origin.y - box.size.height) * height
+            observations.append((x, y, box.size.width * width, box.size.height * height, observation.text()))
+        return observations
+
+
+class EasyOCREngine(OCREngine):
+    """EasyOCR (PyTorch) reader, cross-platform"""
+    name = 'easyocr'
+
+    def __init__(self):
+        self._reader = None
+
+    @classmethod
+    def available(cls):
+        try:
+            # pylint: disable=import-outside-toplevel,unused-import
+            import easyocr
+        except ImportError:
+            return False
+        return True
+
+    def load(self):
+        # pylint: disable=import-outside-toplevel
+        import easyocr
+        self._reader = easyocr.Reader(['en'])
+
+    def read(self, frame):
+        observations = []
+        for box, text, _ in self._reader.readtext(frame):
+            xs = [point[0] for point in box]
+            ys = [point[1] for point in box]
+            observations.append((float(min(xs)), float(min(ys)), float(max(xs) - min(xs)),
+                                 float(max(ys) - min(ys)), text))
+        return observations
+
+
+class TesseractEngine(OCREngine):
+    """Tesseract through pytesseract, usable on Linux"""
+    name = 'tesseract'
+
+    @classmethod
+    def available(cls):
+        try:
+            # pylint: disable=import-outside-toplevel
+            import pytesseract
+            pytesseract.get_tesseract_version()
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    def read(self, frame):
+        # pylint: disable=import-outside-toplevel
+        import pytesseract
+        data = pytesseract.image_to_data(frame, output_type=pytesseract.Output.DICT)
+        observations = []
+        for i, text in enumerate(data['text']):
+            if text.strip() and float(data['conf'][i]) >= 0:
+                observations.append((float(data['left'][i]), float(data['top'][i]),
+                                     float(data['width'][i]), float(data['height'][i]), text))
+        return observations
+
+
+ENGINES = {engine.name: engine for engine in (VisionEngine, EasyOCREngine, TesseractEngine)}
+
+
+def get_engine(name):
+    """Create an engine by name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine {name!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[name]()
+
+
+def load_engine(name):
+    """Create and load an engine and return its read function (used by worker processes)"""
+    engine = get_engine(name)
+    engine.load()
+    return engine.read
+
+
+def configured_engines():
+    """Engine names in the order set by config 'ocr_engines'"""
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            engines = json.load(f).get('ocr_engines')
+    except (FileNotFoundError, json.JSONDecodeError):
+        engines = None
+    engines = [name for name in (engines or DEFAULT_OCR_ENGINES) if name in ENGINES]
+    return engines or DEFAULT_OCR_ENGINES
+
+
+def cgimage_to_array(cg_image):
+    """Copy a CGImage's pixel buffer into an HxWx3 RGB array (a view, not contiguous)"""
+    # pylint: disable=import-outside-toplevel,no-member
+    import Quartz
+    width = Quartz.CGImageGetWidth(cg_image)
+    height = Quartz.CGImageGetHeight(cg_image)
+    bytes_per_row = Quartz.CGImageGetBytesPerRow(cg_image)
+    channels = Quartz.CGImageGetBitsPerPixel(cg_image) // 8
+    data = Quartz.CGDataProviderCopyData(Quartz.CGImageGetDataProvider(cg_image))
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(height, bytes_per_row)
+    pixels = rows[:, :width * channels].reshape(height, width, channels)
+    if channels != 4:
+        return pixels[:, :, :3]
+    # Screen captures are usually 32-bit little endian with alpha first, i.e. BGRA in memory
+    if Quartz.CGImageGetBitmapInfo(cg_image) & Quartz.kCGBitmapByteOrderMask == Quartz.kCGBitmapByteOrder32Little:
+        pixels = pixels[:, :, ::-1]
+    alpha_first = Quartz.CGImageGetAlphaInfo(cg_image) in (
+        Quartz.kCGImageAlphaPremultipliedFirst, Quartz.kCGImageAlphaFirst, Quartz.kCGImageAlphaNoneSkipFirst)
+    return pixels[:, :, 1:4] if alpha_first else pixels[:, :, :3]
+
+
+def array_to_cgimage(frame):
+    """Wrap an RGB array as a CGImage for Vision"""
+    # pylint: disable=import-outside-toplevel,no-member
+    import Quartz
+    frame = np.ascontiguousarray(frame[:, :, :3] if frame.ndim == 3 else np.stack([frame] * 3, axis=2))
+    height, width, _ = frame.shape
+    data = frame.tobytes()
+    provider = Quartz.CGDataProviderCreateWithData(None, data, len(data), None)
+    return Quartz.CGImageCreate(width, height, 8, 24, width * 3, Quartz.CGColorSpaceCreateDeviceRGB(),
+                                Quartz.kCGBitmapByteOrderDefault, provider, None, False,
+                                Quartz.kCGRenderingIntentDefault)
@@ -0,0 +1,211 @@
+"""Pool of OCR worker processes that keep a warm reader and read frames from shared memory"""
+
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from meadow.core.ocr_engines import load_engine
+
+# Tunable Parameters
+# -----------------
+# Number of worker processes per engine
+OCR_WORKERS = 2
+# Seconds allowed for a worker to load its reader
+OCR_STARTUP_TIMEOUT = 120
+# Seconds allowed per frame, by engine; a worker that exceeds it is killed and replaced
+OCR_TIMEOUTS = {'easyocr': 30, 'tesseract': 20}
+DEFAULT_OCR_TIMEOUT = 30
+
+
+def _worker_main(loader, conn):
+    """Worker process: load the engine once, then OCR frames named by the parent"""
+    try:
+        read = loader()
+    except Exception as e:  # pylint: disable=broad-except
+        conn.send(('error', f"Failed to load OCR engine: {e}"))
+        return
+    conn.send(('ready', None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        name, shape, dtype = task
+        shm = shared_memory.SharedMemory(name=name)
+        frame = None
+        try:
+            frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            conn.send(('ok', read(frame)))
+        except Exception as e:  # pylint: disable=broad-except
+            conn.send(('error', str(e)))
+        finally:
+            del frame
+            shm.close()
+
+
+class _Worker:
+    """One worker process and the parent end of its pipe"""
+
+    def __init__(self, context, loader):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(loader, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class OCRWorkerPool:
+    """Runs an OCR engine in worker processes, one frame per worker at a time
+
+    Frames are copied once into a shared memory block that the worker maps,
+    instead of being pickled through the pipe. Each worker loads its reader
+    once at startup. A worker that crashes or exceeds the engine timeout is
+    killed and replaced, and the caller gets an exception.
+    """
+
+    def __init__(self, engine='easyocr', workers=OCR_WORKERS, timeout=None, loader=None):
+        self.engine = engine
+        self.timeout = timeout or OCR_TIMEOUTS.get(engine, DEFAULT_OCR_TIMEOUT)
+        # The loader runs in the worker and returns its read function
+        self._loader = loader or partial(load_engine, engine)
+        # Spawn, because forking a process that holds PyTorch or Objective-C state is unsafe
+        self._context = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # Frames read, time spent reading them and workers replaced since startup
+        self._stats = {'frames': 0, 'seconds': 0.0, 'restarts': 0}
+        for _ in range(workers):
+            self._add_worker()
+        print(f"[DEBUG] Started {workers} {engine} OCR workers")
+
+    def _add_worker(self):
+        worker = _Worker(self._context, self._loader)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker):
+        """Kill a failed worker and start a fresh one in its place"""
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            closed = self._closed
+            self._stats['restarts'] += 1
+        if not closed:
+            print(f"[DEBUG] Restarting {self.engine} OCR worker")
+            self._add_worker()
+
+    def _receive(self, worker, timeout):
+        """Wait for one message from a worker, replacing it on timeout or crash"""
+        try:
+            finished = worker.conn.poll(timeout)
+            if finished:
+                status, value = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._replace(worker)
+            raise RuntimeError(f"{self.engine} OCR worker crashed") from e
+        if not finished:
+            self._replace(worker)
+            raise TimeoutError(f"{self.engine} OCR did not finish within {timeout}s")
+        return status, value
+
+    def run(self, frame, wait=None):
+        """OCR an HxWxC uint8 array and return (x, y, w, h, text) observations
+
+        Args:
+            frame: Pixel array to read
+            wait: Seconds to wait for an idle worker (default: the engine timeout)
+        """
+        if self._closed:
+            raise RuntimeError("OCR pool is closed")
+        # Copy the frame before taking a worker, so a failed copy cannot lose the worker
+        frame = np.ascontiguousarray(frame)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+        try:
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+            try:
+                worker = self._idle.get(timeout=wait if wait is not None else self.timeout)
+            except queue.Empty as e:
+                raise TimeoutError(f"No idle {self.engine} OCR worker") from e
+
+            if not worker.ready:
+                status, value = self._receive(worker, OCR_STARTUP_TIMEOUT)
+                if status != 'ready':
+                    self._replace(worker)
+                    raise RuntimeError(value)
+                worker.ready = True
+
+            start = time.perf_counter()
+            try:
+                worker.conn.send((shm.name, frame.shape, frame.dtype.str))
+            except (BrokenPipeError, OSError) as e:
+                self._replace(worker)
+                raise RuntimeError(f"{self.engine} OCR worker crashed") from e
+            status, value = self._receive(worker, self.timeout)
+            self._idle.put(worker)
+            if status != 'ok':
+                raise RuntimeError(value)
+            with self._lock:
+                self._stats['frames'] += 1
+                self._stats['seconds'] += time.perf_counter() - start
+            return value
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def stats(self):
+        """Frames read, mean seconds per frame and worker restarts since startup"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['mean_seconds'] = stats.pop('seconds') / max(1, stats['frames'])
+        return stats
+
+    def close(self):
+        """Stop all workers"""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=2)
+            worker.kill()
+
+
+# Pools are created lazily, one per engine
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_ocr_pool(engine='easyocr'):
+    """Get or start the worker pool for an engine"""
+    with _pools_lock:
+        if engine not in _pools:
+            _pools[engine] = OCRWorkerPool(engine)
+            atexit.register(_pools[engine].close)
+        return _pools[engine]
+
+def get_ocr_pool_stats():
+    """stats() of each pool started in this process, by engine"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {engine: pool.stats() for engine, pool in pools.items()}
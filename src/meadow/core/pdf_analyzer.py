@@ -3,12 +3,19 @@
 import json
 import os
 import base64
-import pymupdf  # PyMuPDF
-from anthropic import Anthropic, AnthropicError
+import hashlib
+import time
+
+from meadow.core.prompts import pdf_page_suffix, pdf_system, record_cache_usage
+from meadow.core.usage_ledger import record_call
+
+PDF_MODEL = "claude-3-5-sonnet-20241022"
 
 class PDFAnalyzer:
     """Class for analyzing PDF documents using Claude API and extracting structured information."""
     def __init__(self):
+        # Imported here so importing this module (e.g. in the web viewer) stays cheap
+        from anthropic import Anthropic  # pylint: disable=import-outside-toplevel
         # Use config API key if available, otherwise fall back to environment variable
         api_key = None
         self.app_dir = os.path.join(os.path.expanduser('~/Library/Application Support/Meadow'))
@@ -24,10 +31,15 @@ class PDFAnalyzer:
 
     def analyze_pdf(self, pdf_base64):
         """Analyze PDF using Claude API. Returns tuple of (analysis_results, page_images)"""
+        # pylint: disable=import-outside-toplevel
+        import pymupdf  # PyMuPDF
+        from anthropic import AnthropicError
         print("[DEBUG] Received pdf to analyze.")
         try:
             # Decode base64 PDF
             pdf_bytes = base64.b64decode(pdf_base64)
+            # Same hash the viewer uses for the page cache, so ledger rows match cached pages
+            pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()[:12]
 
             # Open PDF with PyMuPDF
             doc = pymupdf.Document(stream=pdf_bytes, filetype="pdf")
@@ -49,32 +61,14 @@ class PDFAnalyzer:
                 img_base64 = base64.b64encode(img_data).decode()
                 print(f"[DEBUG] Converted {page_num + 1} of {total_pages}. Sending to Claude")
 
-                prompt = f"""
-Analyze this page (Page {page_num + 1} of {total_pages}) from the PDF document.
-
-Please:
-1. Summarize any typed text present
-2. Extract and transcribe any handwritten notes
-3. Note any highlighted sections
-4. Organize the information in markdown format
-
-Return your analysis in the following structure:
-# Page {page_num + 1}
-## Text Summary
-[Your summary of typed text]
-
-## Handwritten Notes
-[Transcription of any handwritten notes]
-
-## Highlights
-[Description of highlighted sections]
-
----
-"""
+                # Instructions are a cached prefix shared by every page
+                prompt = pdf_page_suffix(page_num + 1, total_pages)
 
+                start = time.perf_counter()
                 message = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
+                    model=PDF_MODEL,
                     max_tokens=1500,
+                    system=pdf_system(),
                     messages=[{
                         "role": "user",
                         "content": [
@@ -94,6 +88,10 @@ Return your analysis in the following structure:
                     }]
                 )
 
+                usage = getattr(message, 'usage', None)
+                record_cache_usage(usage)
+                record_call('pdf', pdf_hash, PDF_MODEL, usage, time.perf_counter() - start,
+                            image_bytes=len(img_data), page=page_num + 1)
                 analysis_results.append(message.content[0].text)
 
             # Return both analysis results and page images
@@ -0,0 +1,324 @@
+"""Claude prompts split into a cached static prefix and a small per-call suffix
+
+The prefix (instructions, research topics, output format) goes in the system
+prompt with cache_control, so repeated calls read it from Anthropic's prompt
+cache instead of paying for it again. It must be byte-identical between calls:
+nothing per-call (window names, page numbers, previous actions) belongs in it.
+The prefix only changes when PROMPT_VERSION or the topic set changes, and both
+are written into it so a changed prefix is easy to spot in logs.
+
+Anthropic only caches prefixes above a minimum length (PROMPT_CACHE_MIN_TOKENS
+for Sonnet). Both prefixes carry a full output guide and a worked example,
+which puts them over the minimum. A prefix that falls below it is sent without
+cache_control and listed as uncacheable in get_cache_stats().
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter
+from functools import lru_cache
+
+# Bump whenever the static instructions below change
+PROMPT_VERSION = 3
+
+# Tunable Parameters
+# -----------------
+# Shortest prefix Anthropic caches (Sonnet; Haiku needs 2048)
+PROMPT_CACHE_MIN_TOKENS = 1024
+# Characters per token of English text, for estimating prefix length without a tokenizer
+CHARS_PER_TOKEN = 4
+
+SCREENSHOT_INSTRUCTIONS = """You watch a researcher's screen and log what they are doing.
+Each message shows one capture of their active window: either the screenshot, crops of the
+parts of the window with relevant content, or the text read from the screen. It also gives the
+window name, URL if any, and the researcher's previous action.
+
+Active research topics:
+{topics}
+
+Return your response in XML format with the following tags, in this order:
+<action>Brief description of main user action, starting with an active verb</action>
+<topic>Which research topic this relates to, or "none" if not relevant.</topic>
+<summary>If relevant, one paragraph summary of the relevant content. If not relevant, leave empty.</summary>
+<continuation>true/false: The current action is essentially the same as the previous action.</continuation>
+
+How to read the input:
+- With a screenshot or crops, read the content itself; the window name only tells you where it is.
+- With screen text, the text was read by OCR: it may be out of order, split mid-sentence or
+  contain misread characters. Reconstruct the meaning and ignore stray fragments.
+- Text from toolbars, tabs, sidebars and other windows is context, not the content being read.
+
+Guidelines for each tag:
+
+<action>
+- One sentence of at most 15 words, starting with an active verb in the present tense
+  ("Reads", "Compares", "Drafts", "Searches for", "Annotates").
+- Name the concrete object of the action: the article, document, dataset, query or person.
+- Describe what the researcher is doing, not what the application is.
+- Do not mention the screenshot, the capture, the OCR text or yourself.
+
+<topic>
+- Copy one research topic exactly as it is written in the list above, or write "none".
+- Choose a topic only when the visible content itself is about it. An application or website
+  that is often used for research (a browser, a PDF reader, a notes app) is not enough.
+- If the content touches several topics, pick the one it is most directly about.
+- Email, chat, calendars, settings, file browsers and entertainment are "none" unless the
+  message or document shown is itself about a topic.
+- Related terms listed next to a topic are hints, not requirements: content can be about a
+  topic in entirely different words, and a page can use a related term without being about it.
+
+<summary>
+- Only when the topic is not "none"; otherwise leave the tag empty.
+- One paragraph of two to five sentences about the content, not about the researcher:
+  claims, findings, figures, names, dates and sources that would be worth finding again.
+- Quote short key phrases exactly when they matter. Never add details that are not visible.
+- Prefer specific facts over general description. Skip navigation, menus, ads and boilerplate.
+- When only part of a document is visible, summarize that part; do not guess the rest.
+
+<continuation>
+- "true" if the researcher is still doing the same thing as in the previous action: the same
+  document, page, thread or search, even after scrolling or switching back to it.
+- "false" if the activity, the document or the topic changed, or there is no previous
+  action (it is given as "N/A").
+
+Examples (the topics in them are illustrations; only use topics from the list above):
+
+Window: Safari - Council passes zoning reform, URL https://news.example.com/zoning-vote
+Previous action: Searches for "upzoning near transit" in "Safari - Google Search"
+<action>Reads a news article on the city council's zoning reform vote</action>
+<topic>urban planning</topic>
+<summary>The city council approved a zoning reform allowing four-story apartment buildings
+within half a mile of rail stations, passing 7-2 after a year of hearings. The ordinance
+removes parking minimums near transit and takes effect in March. Opponents cited
+infrastructure costs; supporters pointed to a projected 12,000 additional homes over a
+decade.</summary>
+<continuation>false</continuation>
+
+Window: Preview - regional_transit_report_2023.pdf
+Previous action: Reads the executive summary of a regional transit ridership report in
+"Preview - regional_transit_report_2023.pdf"
+<action>Reviews ridership tables in the regional transit report</action>
+<topic>urban planning</topic>
+<summary>Table 4 shows weekday rail ridership at 81% of 2019 levels, with weekend ridership
+fully recovered. Bus ridership fell on routes that lost frequency in the 2022 service cuts,
+while the two new rapid bus lines exceeded their forecasts by about 20%.</summary>
+<continuation>true</continuation>
+
+Window: Firefox - Participatory budgeting and civic trust, URL https://journals.example.org/article/481
+Previous action: N/A in "N/A - N/A"
+<action>Reads a journal article on participatory budgeting and civic trust</action>
+<topic>civic government</topic>
+<summary>A study of 42 municipalities finds that residents who voted in participatory
+budgeting rounds reported 9 points higher trust in local government two years later,
+with the largest effect among first-time voters. The authors caution that cities which
+adopted the process already had above-average turnout.</summary>
+<continuation>false</continuation>
+
+Window: Slack - #general
+Previous action: Reviews ridership tables in "Preview - regional_transit_report_2023.pdf"
+<action>Reads team announcements about an office move</action>
+<topic>none</topic>
+<summary></summary>
+<continuation>false</continuation>"""
+
+PDF_INSTRUCTIONS = """You analyze PDF documents one page at a time. Each message shows one page
+as an image and gives its page number.
+
+Please:
+1. Summarize any typed text present
+2. Extract and transcribe any handwritten notes
+3. Note any highlighted sections
+4. Organize the information in markdown format
+
+Return your analysis in the following structure, with N replaced by the page number:
+# Page N
+## Text Summary
+[Your summary of typed text]
+
+## Handwritten Notes
+[Transcription of any handwritten notes]
+
+## Highlights
+[Description of highlighted sections]
+
+---
+
+How to read the page:
+- The page is a scan or a rendering of a printed document, often annotated by hand. Typed text,
+  handwriting and highlighting can overlap; treat each as its own layer.
+- Read columns, footnotes, captions and sidebars in the order a reader would, not line by line
+  across the page.
+- Running headers, footers, page numbers and journal mastheads are not content. Leave them out
+  unless they are the only thing identifying the document.
+- A page can be blank, a cover or a table of contents. Say so briefly in the Text Summary
+  rather than inventing content.
+
+Guidelines for each section:
+
+## Text Summary
+- One to three paragraphs about what the page says: its argument, findings, figures, names,
+  dates and cited sources. Prefer specific facts over general description.
+- Keep the terms the document uses. Quote short key phrases exactly when they matter.
+- For tables and charts, state what they measure and the values or trends that stand out.
+- For equations, give them in plain text or LaTeX and say what they express.
+- When a sentence or paragraph continues from the previous page or onto the next one,
+  summarize the visible part and do not guess the rest.
+
+## Handwritten Notes
+- Transcribe every handwritten note word for word, keeping the writer's abbreviations.
+- Put each note on its own line, starting with where it is on the page (margin, top, bottom,
+  between lines) and, if clear, the typed passage it refers to.
+- Mark words you cannot read as [illegible] and uncertain readings with a question mark, e.g.
+  "trans[it?] costs". Never guess a whole note.
+- Symbols count as notes: underlines, circles, arrows, stars, ticks and question marks next to
+  a passage show what the reader reacted to. Describe them and the passage they mark.
+- If there are no handwritten notes, write "None".
+
+## Highlights
+- List each highlighted, underlined or boxed passage, quoting it exactly when it is short and
+  summarizing it when it is long. Include the highlight colour if more than one is used.
+- Keep the order in which the passages appear on the page.
+- If nothing is highlighted, write "None".
+
+General rules:
+- Always include all three sections, in this order, even when one of them is "None".
+- Write in the language of the document. Keep transcriptions in the language they were written in.
+- Do not add commentary about the scan quality, the document as a whole or what the reader might
+  want; only describe what is on this page.
+- Do not repeat the page number or the document title inside the sections.
+- Use markdown bullet lists for notes and highlights, and plain paragraphs for the summary.
+  Do not add headings of your own inside the sections.
+- End the analysis with the "---" separator line so pages can be joined into one file.
+
+Example of a page with typed text, margin notes and a highlight:
+
+# Page 7
+## Text Summary
+The section compares ridership before and after the 2022 service changes. Weekday rail
+ridership recovered to 81% of 2019 levels, while weekend ridership fully recovered. Table 3
+shows bus routes that lost frequency fell a further 6-11%, and the two new rapid bus lines
+carried about 20% more riders than forecast. The authors attribute the difference to
+frequency rather than fares, citing Walker (2012).
+
+## Handwritten Notes
+- Right margin, next to Table 3: "frequency > coverage? check 2019 network redesign"
+- Bottom of page: "ask [illegible] about weekend data source"
+- Question mark beside the sentence attributing the change to frequency
+
+## Highlights
+- Yellow: "carried about 20% more riders than forecast"
+- Yellow: the last row of Table 3 (route 12, -11%)
+
+---
+
+Example of a cover page without annotations:
+
+# Page 1
+## Text Summary
+Cover page of "Regional Transit Ridership Report 2023", published by the Metropolitan
+Planning Council in June 2023, with a note that figures are preliminary until the
+audited counts are released.
+
+## Handwritten Notes
+None
+
+## Highlights
+None
+
+---"""
+
+# Prompt cache token totals since startup
+cache_stats = Counter()
+_cache_stats_lock = threading.Lock()
+
+
+def topic_set_version(topics, topic_keywords=None):
+    """Short hash identifying a topic set (and its keywords), independent of order"""
+    topic_keywords = topic_keywords or {}
+    key = json.dumps([[topic, sorted(topic_keywords.get(topic) or [])] for topic in sorted(topics)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+
+
+def estimate_tokens(text):
+    """Approximate token count of English text"""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _cached_block(text):
+    """System prompt block, marked for caching only if it is long enough to be cached"""
+    block = {"type": "text", "text": text}
+    if estimate_tokens(text) >= PROMPT_CACHE_MIN_TOKENS:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+@lru_cache(maxsize=8)
+def _screenshot_prefix(topics_json):
+    topics, topic_keywords = json.loads(topics_json)
+    lines = []
+    for topic in sorted(topics):
+        keywords = sorted(topic_keywords.get(topic) or [])
+        lines.append(f"- {topic}" + (f" (related terms: {', '.join(keywords)})" if keywords else ""))
+    version = topic_set_version(topics, topic_keywords)
+    header = f"[prompt v{PROMPT_VERSION}, topic set {version}]\n"
+    return header + SCREENSHOT_INSTRUCTIONS.format(topics='\n'.join(lines))
+
+
+def screenshot_system(topics, topic_keywords=None):
+    """Cached system prompt for screenshot analysis"""
+    topic_keywords = {topic: (topic_keywords or {}).get(topic) or [] for topic in topics}
+    return _cached_block(_screenshot_prefix(json.dumps([sorted(topics), topic_keywords], sort_keys=True)))
+
+
+def screenshot_suffix(window_info, previous, subject, screen_text=""):
+    """Per-call part of the screenshot prompt
+
+    Args:
+        window_info: Dict with 'app', 'title' and optional 'url'
+        previous: (description, app, window) of the previous log entry
+        subject: What the attached content is, e.g. "the screenshot"
+        screen_text: OCR text, sent instead of an image in text mode
+    """
+    prev_description, prev_app, prev_window = previous
+    url_info = f"\nURL: {window_info['url']}" if window_info.get('url') else ""
+    screen_text = f"\n<screen_text>\n{screen_text}\n</screen_text>" if screen_text else ""
+    return (f"Name of active window: {window_info['app']} - {window_info['title']}{url_info}\n"
+            f"Previous action: {prev_description} in \"{prev_app} - {prev_window}\"{screen_text}\n"
+            f"Analyze {subject}.")
+
+
+def pdf_system():
+    """Cached system prompt for PDF page analysis"""
+    return _cached_block(f"[prompt v{PROMPT_VERSION}]\n" + PDF_INSTRUCTIONS)
+
+
+def pdf_page_suffix(page_number, total_pages):
+    """Per-page part of the PDF prompt"""
+    return f"Analyze this page (Page {page_number} of {total_pages}) from the PDF document."
+
+
+def record_cache_usage(usage):
+    """Add a response's prompt cache reads and writes to the totals"""
+    read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    written = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    with _cache_stats_lock:
+        cache_stats.update(calls=1, cache_read_tokens=read, cache_write_tokens=written,
+                           uncached_input_tokens=getattr(usage, 'input_tokens', 0) or 0)
+    if read or written:
+        print(f"[DEBUG] Prompt cache: {read} tokens read, {written} tokens written")
+    return read, written
+
+
+def get_cache_stats():
+    """Prompt cache totals and the share of input tokens served from the cache"""
+    with _cache_stats_lock:
+        stats = dict(cache_stats)
+    total = sum(stats.get(key, 0) for key in ('cache_read_tokens', 'cache_write_tokens', 'uncached_input_tokens'))
+    prefixes = {'screenshot': screenshot_system([])[0], 'pdf': pdf_system()[0]}
+    return {
+        **stats,
+        'cache_hit_rate': stats.get('cache_read_tokens', 0) / max(1, total),
+        # Prefixes under PROMPT_CACHE_MIN_TOKENS, which are never cached
+        'uncacheable_prefixes': sorted(name for name, block in prefixes.items() if 'cache_control' not in block),
+    }
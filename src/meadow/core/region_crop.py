@@ -0,0 +1,94 @@
+"""Find the parts of a window that hold the relevant text, so only those are sent to Claude"""
+
+import re
+
+# Tunable Parameters
+# -----------------
+# Pixels of context added around each crop
+CROP_MARGIN = 32
+# Boxes closer than this vertically (pixels) end up in the same crop
+CROP_MERGE_GAP = 64
+# Maximum number of crops sent; further regions are merged into the nearest crop
+MAX_CROPS = 3
+# Send the whole window if the crops would cover more than this fraction of it
+CROP_MAX_AREA_FRACTION = 0.6
+# Number of leading chunk words used to find where a chunk starts on screen
+ANCHOR_WORDS = 4
+
+
+def _tokens(text):
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def locate_chunks(chunks, observations):
+    """Boxes of the observations that make up each chunk
+
+    Chunks come from the joined OCR text, so they are found again by matching
+    their leading words against the word stream of the observations.
+
+    Args:
+        chunks: Text chunks, e.g. the chunks that matched a topic
+        observations: (x, y, w, h, text) OCR observations in reading order
+
+    Returns:
+        List of (x, y, w, h) boxes, one per observation covered by a chunk
+    """
+    stream = []
+    for index, obs in enumerate(observations):
+        stream.extend((token, index) for token in _tokens(obs[4]))
+    words = [token for token, _ in stream]
+
+    covered = set()
+    for chunk in chunks:
+        chunk_tokens = _tokens(chunk)
+        anchor = chunk_tokens[:ANCHOR_WORDS]
+        if not anchor:
+            continue
+        for start in range(len(words) - len(anchor) + 1):
+            if words[start:start + len(anchor)] == anchor:
+                end = min(len(stream), start + len(chunk_tokens))
+                covered.update(index for _, index in stream[start:end])
+                break
+    return [tuple(observations[i][:4]) for i in sorted(covered)]
+
+
+def _union(a, b):
+    x, y = min(a[0], b[0]), min(a[1], b[1])
+    return (x, y, max(a[0] + a[2], b[0] + b[2]) - x, max(a[1] + a[3], b[1] + b[3]) - y)
+
+
+def merge_boxes(boxes, gap=CROP_MERGE_GAP, max_crops=MAX_CROPS):
+    """Merge boxes into at most max_crops regions, joining vertical neighbours first"""
+    regions = []
+    for box in sorted(boxes, key=lambda b: b[1]):
+        if regions and box[1] - (regions[-1][1] + regions[-1][3]) <= gap:
+            regions[-1] = _union(regions[-1], box)
+        else:
+            regions.append(box)
+    while len(regions) > max_crops:
+        # Join the pair of adjacent regions with the smallest gap
+        gaps = [regions[i + 1][1] - (regions[i][1] + regions[i][3]) for i in range(len(regions) - 1)]
+        i = gaps.index(min(gaps))
+        regions[i:i + 2] = [_union(regions[i], regions[i + 1])]
+    return regions
+
+
+def relevant_crops(chunks, observations, width, height, margin=CROP_MARGIN):
+    """Pixel rectangles (x, y, w, h) to send instead of the whole window
+
+    Returns an empty list when the relevant chunks cannot be located or the
+    crops would cover most of the window anyway.
+    """
+    boxes = locate_chunks(chunks, observations or [])
+    if not boxes:
+        return []
+    crops = []
+    for x, y, w, h in merge_boxes(boxes):
+        left, top = max(0, int(x - margin)), max(0, int(y - margin))
+        right, bottom = min(width, int(x + w + margin + 1)), min(height, int(y + h + margin + 1))
+        if right > left and bottom > top:
+            crops.append((left, top, right - left, bottom - top))
+    area = sum(w * h for _, _, w, h in crops)
+    if not crops or area > CROP_MAX_AREA_FRACTION * width * height:
+        return []
+    return crops
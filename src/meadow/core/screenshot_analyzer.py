@@ -1,53 +1,135 @@
 """Module for analyzing screenshots using Claude API"""
 
+import asyncio
 import base64
 import re
 import json
 import os
 import queue
 import threading
-import asyncio
-
-import Vision
-from anthropic import Anthropic, AnthropicError
-
-# Lazy load easyocr only when needed
-easyocr = None
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from meadow.core.claude_stream import extract_tag, stream_tags
+from meadow.core.markdown_bridge import file_lock
+from meadow.core.ocr_engines import VisionEngine, cgimage_to_array, configured_engines
+from meadow.core.ocr_pool import get_ocr_pool
+from meadow.core.prompts import record_cache_usage, screenshot_suffix, screenshot_system
+from meadow.core.region_crop import relevant_crops
+from meadow.core.tile_ocr import IncrementalOCR, get_ocr_stats
+from meadow.core.usage_ledger import domain_of, record_call
+
+# Tunable Parameters
+# -----------------
+# Maximum frames waiting for or running fallback OCR; further frames are rejected
+OCR_MAX_PENDING = 4
+# Seconds a frame may wait for a place in the OCR backlog
+OCR_ADMISSION_TIMEOUT = 5
+# Text mode: send only the OCR text to Claude when the screen is mostly readable text.
+# Minimum characters of OCR text
+TEXT_MODE_MIN_CHARS = 400
+# Minimum fraction of the window covered by text boxes
+TEXT_MODE_MIN_COVERAGE = 0.2
+# Minimum fraction of OCR tokens that look like real words (a local proxy for OCR confidence)
+TEXT_MODE_MIN_WORD_RATIO = 0.75
+# OCR text beyond this is cut off in the prompt
+TEXT_MODE_MAX_CHARS = 12000
+
+# Token usage and latency of Claude calls, by input mode ('image', 'crop' or 'text')
+llm_stats = Counter()
+_llm_stats_lock = threading.Lock()
+# Serializes day log read-modify-write between analysis threads and batch results
+_log_lock = threading.Lock()
 
 class OCRProcessor:
     """Handles OCR processing with fallback options"""
     def __init__(self):
-        self._ocr_reader = None
-        self._ocr_queue = queue.Queue()
-        self._ocr_lock = threading.Lock()
-
-    def _get_easyocr_reader(self):
-        """Get or initialize the OCR reader singleton"""
-        with self._ocr_lock:
-            if self._ocr_reader is None:
-                global easyocr
-                if easyocr is None:
-                    import easyocr
-                self._ocr_reader = easyocr.Reader(['en'])
-        return self._ocr_reader
-
-    def get_text_from_image(self, cg_image, image_path):
-        """Extract text from image, trying Vision first then EasyOCR
+        # Bounded admission: each put is a frame in flight on the EasyOCR worker pool
+        self._ocr_queue = queue.Queue(maxsize=OCR_MAX_PENDING)
+        self._incremental = IncrementalOCR()
+        self._vision = VisionEngine()
+
+    def get_text_from_image(self, cg_image, image_path, window_key=None):
+        """Extract text from image with the configured engines, in order
+
+        Vision is tried first by default, then EasyOCR (Tesseract first off macOS);
+        config 'ocr_engines' overrides the order.
 
         Args:
-            cg_image: CGImage object for Vision OCR
-            image_path: Path to saved PNG for EasyOCR fallback
+            cg_image: CGImage object for Vision OCR; the other engines read its pixels
+            image_path: Path to a PNG, used by the other engines when there is no CGImage
+            window_key: If given, only regions that changed since the last frame
+                of this window are OCR'd and the rest of its text is reused
         """
-        try:
-            print("[DEBUG] Using Vision OCR")
-            return self._get_vision_text(cg_image)
-        except Exception as e:
-            print(f"[DEBUG] Vision OCR failed, falling back to EasyOCR: {e}")
-            return self._get_easyocr_text(image_path)
+        engines = configured_engines()
+        for i, engine in enumerate(engines):
+            try:
+                if engine == 'vision':
+                    print("[DEBUG] Using Vision OCR")
+                    if window_key is not None:
+                        return self._get_incremental_text(cg_image, image_path, window_key)
+                    return self._get_vision_text(cg_image)
+                print(f"[DEBUG] Using {engine} OCR")
+                if window_key is not None:
+                    return self._get_incremental_text(cg_image, image_path, window_key, engine)
+                if engine == 'easyocr':
+                    return self._get_easyocr_text(image_path, cg_image)
+                return self._get_pool_text(engine, image_path, cg_image)
+            except Exception as e:
+                if window_key is not None:
+                    self._incremental.forget(window_key)
+                if i == len(engines) - 1:
+                    raise
+                print(f"[DEBUG] {engine} OCR failed, falling back to {engines[i + 1]}: {e}")
+        raise ValueError("No OCR engines configured")
+
+    def get_observations(self, window_key):
+        """(x, y, w, h, text) observations behind the window's last OCR text, if known"""
+        return self._incremental.observations(window_key)
+
+    def _get_incremental_text(self, cg_image, image_path, window_key, engine='vision'):
+        """Run OCR only on the tile bands that changed since this window's last frame"""
+        frame = self._frame_pixels(cg_image, image_path)
+        if engine == 'vision':
+            ocr_full = lambda: self._get_vision_observations(cg_image)
+            ocr_region = lambda top, bottom: self._get_vision_observations(cg_image, top, bottom)
+        else:
+            ocr_full = lambda: self._run_pool(engine, frame)
+            ocr_region = lambda top, bottom: [(x, y + top, w, h, text) for x, y, w, h, text
+                                              in self._run_pool(engine, frame[top:bottom])]
+        observations = self._incremental.run(window_key, frame, ocr_full, ocr_region)
+        stats = get_ocr_stats()
+        print(f"[DEBUG] Tile OCR: {stats['tile_change_rate']:.1%} of tiles changed, "
+              f"{stats['observation_reuse_rate']:.1%} of text reused")
+        if not observations:
+            raise ValueError(f"No text extracted by {engine}")
+        return ' '.join(obs[4] for obs in observations)
+
+    def _frame_pixels(self, cg_image, image_path):
+        """Pixel array used to diff frames, read from the CGImage buffer when possible"""
+        if cg_image is not None:
+            try:
+                return cgimage_to_array(cg_image)
+            except (TypeError, ValueError):
+                pass
+        with Image.open(image_path) as img:
+            return np.asarray(img.convert('RGB'))
+
+    def _get_vision_observations(self, cg_image, top=None, bottom=None):
+        """Return (x, y, w, h, text) Vision observations in whole-image pixel coordinates
+
+        If top and bottom are given, only those pixel rows are recognized.
+        """
+        return self._vision.read_cgimage(cg_image, top, bottom)
 
     def _get_vision_text(self, cg_image):
         """Extract text using macOS Vision framework"""
-        # pylint: disable=no-member
+        # pylint: disable=import-outside-toplevel,no-member
+        import Vision
         request = Vision.VNRecognizeTextRequest.alloc().init()
         handler = Vision.VNImageRequestHandler.alloc().initWithCGImage_options_(cg_image, None)
         handler.performRequests_error_([request], None)
@@ -63,24 +145,134 @@ class OCRProcessor:
             raise ValueError("No text extracted from Vision framework")
         return ' '.join(text)
 
-    def _get_easyocr_text(self, image_path):
-        """Extract text using EasyOCR as fallback"""
-        reader = self._get_easyocr_reader()
-        self._ocr_queue.put(True)
+    def _get_easyocr_text(self, image_path, cg_image=None):
+        """Extract text using EasyOCR as fallback, in a warm worker process"""
+        return self._get_pool_text('easyocr', image_path, cg_image)
+
+    def _get_pool_text(self, engine, image_path, cg_image=None):
+        """Extract text with an engine from the worker pool"""
+        frame = self._frame_pixels(cg_image, image_path)
+        return ' '.join(obs[4] for obs in self._run_pool(engine, frame))
+
+    def _run_pool(self, engine, frame):
+        """OCR a frame on the engine's worker pool, subject to bounded admission"""
+        try:
+            self._ocr_queue.put(True, timeout=OCR_ADMISSION_TIMEOUT)
+        except queue.Full as e:
+            raise TimeoutError("OCR backlog is full, dropping frame") from e
         try:
-            result = reader.readtext(image_path)
-            text_results = [text for _, text, _ in result]
-            return ' '.join(text_results)
+            return get_ocr_pool(engine).run(frame)
         finally:
             self._ocr_queue.get()
 
 # Create singleton OCR processor
 ocr_processor = OCRProcessor()
 
-def analyze_and_log_screenshot(screenshot, image_path, timestamp, window_info, log_path):
-    """Analyze screenshot using OCR and Claude API, then log the results"""
+WORD_PATTERN = re.compile(r"^[(\"']?([A-Za-z][a-z]*(?:'[a-z]+)?|[A-Z]+|(?:[A-Za-z]\.)+|\$?[0-9][0-9.,:%/-]*)[)\"'.,;:!?%]*$")
+
+def text_dominance(ocr_text, observations, width, height):
+    """Measure how much of a screen is readable text
+
+    Returns (coverage, word_ratio): the fraction of the window covered by
+    OCR text boxes, and the fraction of tokens that look like words or numbers.
+    Garbled OCR of images and icons produces few word-like tokens.
+    """
+    area = max(1, width * height)
+    coverage = min(1.0, sum(w * h for _, _, w, h, _ in observations or []) / area)
+    tokens = ocr_text.split()
+    word_ratio = sum(1 for token in tokens if WORD_PATTERN.match(token)) / max(1, len(tokens))
+    return coverage, word_ratio
+
+def choose_llm_mode(ocr_text, observations, width, height, configured='auto'):
+    """Pick 'text' (OCR text only) or 'image' input for the Claude call
+
+    Args:
+        configured: Config 'llm_input_mode'; 'image' or 'text' force that mode, 'auto' decides locally
+    """
+    if configured in ('image', 'text'):
+        return configured
+    if len(ocr_text) < TEXT_MODE_MIN_CHARS or not observations:
+        return 'image'
+    coverage, word_ratio = text_dominance(ocr_text, observations, width, height)
+    print(f"[DEBUG] Text coverage {coverage:.1%}, word-like tokens {word_ratio:.1%}")
+    if coverage >= TEXT_MODE_MIN_COVERAGE and word_ratio >= TEXT_MODE_MIN_WORD_RATIO:
+        return 'text'
+    return 'image'
+
+def record_llm_call(mode, usage, latency, aborted=False):
+    """Add one Claude call to the per-mode token and latency totals"""
+    with _llm_stats_lock:
+        llm_stats.update({
+            f'{mode}_calls': 1,
+            f'{mode}_aborted': int(aborted),
+            f'{mode}_input_tokens': getattr(usage, 'input_tokens', 0) or 0,
+            f'{mode}_output_tokens': getattr(usage, 'output_tokens', 0) or 0,
+            f'{mode}_latency': latency,
+        })
+
+def get_llm_stats():
+    """Average tokens and latency per Claude call, by input mode"""
+    with _llm_stats_lock:
+        stats = dict(llm_stats)
+    result = {}
+    for mode in ('image', 'crop', 'text'):
+        calls = stats.get(f'{mode}_calls', 0)
+        result[mode] = {
+            'calls': calls,
+            'avg_input_tokens': stats.get(f'{mode}_input_tokens', 0) / max(1, calls),
+            'avg_output_tokens': stats.get(f'{mode}_output_tokens', 0) / max(1, calls),
+            'avg_latency': stats.get(f'{mode}_latency', 0) / max(1, calls),
+            'aborted': stats.get(f'{mode}_aborted', 0),
+        }
+    return result
+
+def _make_client():
+    """Anthropic client with the config API key if available, otherwise the environment variable"""
+    # anthropic (and its httpx/pydantic stack) is only imported once a capture needs Claude
+    from anthropic import Anthropic  # pylint: disable=import-outside-toplevel
+    api_key = None
+    config_path = os.path.join(os.path.expanduser('~/Library/Application Support/Meadow'), 'config', 'config.json')
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+            api_key = config.get('anthropic_api_key')
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return Anthropic(api_key=api_key) if api_key else Anthropic()
+
+# Deferred analysis queue, created on first use
+_batch_queue = None
+_batch_queue_lock = threading.Lock()
+
+def get_batch_queue():
+    """Get the deferred analysis queue, starting its submit/poll thread"""
+    global _batch_queue  # pylint: disable=global-statement
+    with _batch_queue_lock:
+        if _batch_queue is None:
+            from meadow.core.batch_queue import BatchQueue
+            _batch_queue = BatchQueue(_make_client, complete_deferred_analysis)
+            _batch_queue.start()
+        return _batch_queue
+
+def analyze_and_log_screenshot(frame, log_path, on_update=None, deferred=None):
+    """Analyze a CapturedFrame using OCR and Claude API, then log the results
+
+    The frame stays in memory until the analysis keeps it; only then is it
+    written to the screenshots folder. Irrelevant frames are never written.
+
+    Args:
+        on_update: Called with the tags parsed so far once Claude's action and
+            topic arrive, before the summary is complete
+        deferred: Queue relevant captures for batch analysis instead of calling
+            Claude now (default: config 'analysis_mode' == 'deferred'). The
+            entry is logged when the batch result comes back; returns None.
+    """
+    from anthropic import AnthropicError  # pylint: disable=import-outside-toplevel
+    timestamp = frame.timestamp
+    window_info = frame.window_info
     try:
-        ocr_text = ocr_processor.get_text_from_image(screenshot, image_path)
+        window_key = (window_info['app'], window_info['title'])
+        ocr_text = ocr_processor.get_text_from_image(frame.cg_image, None, window_key)
         print(f"[DEBUG] Extracted text length: {len(ocr_text)} characters")
         print("[DEBUG] First 200 characters of extracted text:", ocr_text[:200])
 
@@ -90,152 +282,254 @@ def analyze_and_log_screenshot(screenshot, image_path, timestamp, window_info, l
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
                 research_topics = config.get('research_topics', ['civic government'])
+                topic_keywords = config.get('topic_keywords')
+                llm_input_mode = config.get('llm_input_mode', 'auto')
+                analysis_mode = config.get('analysis_mode', 'interactive')
         except (FileNotFoundError, json.JSONDecodeError):
             research_topics = ['civic government']
+            topic_keywords = None
+            llm_input_mode = 'auto'
+            analysis_mode = 'interactive'
+        if deferred is None:
+            deferred = analysis_mode == 'deferred'
 
         print(f"[DEBUG] Checking relevance against topics: {research_topics}")
 
         # Check topic relevance
         from meadow.core.topic_similarity import check_topic_relevance
-        if not asyncio.run(check_topic_relevance(ocr_text, research_topics)):
+        relevant, matched_chunks = check_topic_relevance(ocr_text, research_topics, topic_keywords=topic_keywords,
+                                                         return_chunks=True)
+        if not relevant:
             print("Content not relevant to research topics")
-            try:
-                os.remove(image_path)  # Clean up irrelevant screenshot
-            except OSError:
-                pass  # Ignore cleanup errors
+            frame.discard()
             return None
 
-        # Read the saved PNG for Claude API
-        with open(image_path, 'rb') as f:
-            img_str = base64.b64encode(f.read()).decode()
-
-        # Use config API key if available, otherwise fall back to environment variable
-        api_key = None
-        config_path = os.path.join(os.path.expanduser('~/Library/Application Support/Meadow'), 'config', 'config.json')
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                api_key = config.get('anthropic_api_key')
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
-
-        client = Anthropic(api_key=api_key) if api_key else Anthropic()
-
         # Get previous action for context
         try:
             with open(log_path, 'r', encoding='utf-8') as f:
                 logs = json.load(f)
-                prev_app = logs[-1]['app'] if logs else "N/A"
-                prev_window = logs[-1]['window'] if logs else "N/A"
-                prev_description = logs[-1]['description'] if logs else "N/A"
-        except (FileNotFoundError, json.JSONDecodeError, IndexError):
+            # Batch results are appended when they arrive, so the last entry is not always the latest
+            latest = max(logs, key=lambda e: e.get('timestamp', ''))
+            prev_app = latest['app']
+            prev_window = latest['window']
+            prev_description = latest['description']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
             prev_app = "N/A"
             prev_window = "N/A"
             prev_description = "N/A"
 
-        # Include URL in prompt if available
-        url_info = f"\nURL: {window_info['url']}" if window_info.get('url') else ""
-
-        prompt = f"""
-Name of active window: {window_info['app']} - {window_info['title']}{url_info}
-Previous action: {prev_description} in "{prev_app} - {prev_window}"
-Active research topics: {', '.join(research_topics)}
-Analyze the screenshot and return your response in XML format with the following tags:
-<action>Brief description of main user action, starting with an active verb</action>
-<topic>Which research topic this relates to, or "none" if not relevant.</topic>
-<summary>If relevant, one paragraph summary of the relevant content. If not relevant, leave empty.</summary>
-<continuation>true/false: The current action is essentially the same as the previous action.</continuation>
-"""
-
-        print("[DEBUG] Sending to Claude")
-
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1000,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/png",
-                            "data": img_str
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
+        observations = ocr_processor.get_observations(window_key)
+        mode = choose_llm_mode(ocr_text, observations, frame.width, frame.height, llm_input_mode)
+        crops = []
+        if mode == 'image' and llm_input_mode != 'image':
+            # Only the regions holding the matched text, instead of the whole window
+            crops = relevant_crops(matched_chunks, observations, frame.width, frame.height)
+        if mode == 'text':
+            subject = "the screen text"
+            screen_text = ocr_text[:TEXT_MODE_MAX_CHARS]
+            content = []
+        elif crops:
+            mode = 'crop'
+            subject = "the screenshot crops (the parts of the window with the relevant content)"
+            screen_text = ""
+            content = [{
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": "image/png",
+                    "data": base64.b64encode(frame.crop_png(rect)).decode()
+                }
+            } for rect in crops]
+            print(f"[DEBUG] Sending {len(crops)} crops covering "
+                  f"{sum(w * h for _, _, w, h in crops) / (frame.width * frame.height):.1%} of the window")
+        else:
+            subject = "the screenshot"
+            screen_text = ""
+            # First PNG encode of the frame; reused if the frame is saved
+            img_str = base64.b64encode(frame.png_bytes()).decode()
+            content = [{
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": "image/png",
+                    "data": img_str
+                }
             }]
-        )
 
-        response = message.content[0].text if message.content else "<action>No description available</action><topic>none</topic><summary></summary>"
-        print("[DEBUG] Received Claude response")
-        try:
-            def extract_tag(tag, text):
-                """Extract and unescape content from XML tag"""
-                match = re.search(f'<{tag}>(.*?)</{tag}>', text, re.DOTALL)
-                if not match:
-                    return None
-                return match.group(1).replace('<', '<').replace('>', '>').replace('&amp;', '&').strip()
-
-            action = extract_tag('action', response) or "Error parsing response"
-            topic = extract_tag('topic', response)
-            summary = extract_tag('summary', response) if topic != "none" else None
-            continuation = bool(extract_tag('continuation', response))
-        except (AttributeError, ValueError):
-            action = "Error parsing response"
-            summary = None
-
-        entry = {
+        # Static instructions and topics are a cached prefix; only the suffix changes per call
+        prompt = screenshot_suffix(window_info, (prev_description, prev_app, prev_window), subject, screen_text)
+
+        params = {
+            'model': "claude-3-5-sonnet-20241022",
+            'max_tokens': 1000,
+            'system': screenshot_system(research_topics, topic_keywords),
+            'messages': [{
+                "role": "user",
+                "content": content + [{"type": "text", "text": prompt}]
+            }]
+        }
+        meta = {
             'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            'image_path': image_path,
-            'app': window_info['app'],
-            'window': window_info['title'],
-            'url': window_info.get('url'),  # Include URL in log entry
-            'description': action,
-            'research_topic': topic,
-            'research_summary': summary,
+            'window_info': window_info,
             'ocr_text': ocr_text,
-            'continuation': continuation,
-            'processed': False
+            'llm_mode': mode,
+            'image_crops': crops,
+            'model': params['model'],
+            'image_bytes': sum(len(block['source']['data']) * 3 // 4 for block in content),
+            'data_dir': frame.data_dir,
+            'log_path': log_path,
         }
 
-        # Skip if no research content
-        if summary is None:
-            print("Took a screenshot, but it was irrelevant to research.")
-            try:
-                os.remove(image_path)  # Clean up irrelevant screenshot
-            except OSError:
-                pass  # Ignore cleanup errors
+        if deferred:
+            # Keep the capture on disk until its batch result says whether it is relevant
+            custom_id = f"capture_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}"
+            meta['pending_image'] = os.path.join(frame.data_dir, 'pending', f'{custom_id}.png')
+            frame.save(meta['pending_image'])
+            get_batch_queue().enqueue(custom_id, params, meta)
             return None
 
-        # Move relevant screenshot to permanent storage
-        screenshot_dir = os.path.dirname(os.path.dirname(image_path))
-        perm_path = os.path.join(screenshot_dir, 'screenshots', f"screenshot_{timestamp.strftime('%Y%m%d_%H%M%S')}.png")
-        os.makedirs(os.path.dirname(perm_path), exist_ok=True)
-        os.rename(image_path, perm_path)
-        entry['image_path'] = perm_path  # Update path in log entry
+        print(f"[DEBUG] Sending to Claude ({mode} mode)")
+
+        partial = {}
+        def on_tag(tag, value):
+            partial[tag] = value
+            # Action and topic reach the UI before the summary is written
+            if on_update and tag in ('action', 'topic'):
+                on_update(dict(partial))
+
+        start = time.perf_counter()
+        response, usage, aborted = stream_tags(
+            _make_client(),
+            on_tag=on_tag,
+            # Nothing after <topic>none</topic> is used
+            abort=lambda tag, value: tag == 'topic' and (value or '').lower() == 'none',
+            **params
+        )
+        latency = time.perf_counter() - start
+        record_llm_call(mode, usage, latency, aborted)
+        print(f"[DEBUG] Claude {mode} call: {getattr(usage, 'input_tokens', '?')} input tokens, "
+              f"{getattr(usage, 'output_tokens', '?')} output tokens, {latency:.2f}s"
+              f"{' (stopped at topic none)' if aborted else ''}")
+        return _log_analysis(meta, response, usage, latency, frame.save, frame.discard)
+
+    except (AnthropicError, IOError, ValueError, RuntimeError) as e:
+        print(f"Error in analyze_image: {str(e)}")
+        frame.discard()
+        return None
+
+def complete_deferred_analysis(meta, message):
+    """Log a capture whose batch result arrived (message is None if it never succeeded)"""
+    pending_image = meta['pending_image']
 
-        # Use dated log file
-        log_dir = os.path.dirname(log_path)
-        dated_log = os.path.join(log_dir, f"log_{timestamp.strftime('%Y%m%d')}.json")
+    def keep(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(pending_image, path)
 
+    def drop():
+        try:
+            os.remove(pending_image)
+        except OSError:
+            pass
+
+    if message is None:
+        drop()
+        return None
+    response = message.content[0].text if message.content else ""
+    entry = _log_analysis(meta, response, getattr(message, 'usage', None), None, keep, drop)
+    if entry:
+        # Batch results are logged long after the capture, so tell the viewer when one lands
+        from meadow.core.event_bus import capture_event, get_event_bus
+        get_event_bus().publish('capture.analyzed', capture_event(meta['window_info'], meta['timestamp'], entry))
+        if entry.get('research_summary'):
+            # Export to markdown as the menubar does for captures analyzed right away
+            from meadow.core.config import Config
+            from meadow.core.markdown_bridge import process_analysis_result
+            asyncio.run(process_analysis_result(entry, Config().get('notes_dir')))
+    return entry
+
+def _log_analysis(meta, response, usage, latency, keep_image, drop_image):
+    """Parse Claude's response and append the entry to the day log
+
+    Args:
+        keep_image: Function writing the capture to the given permanent path
+        drop_image: Function discarding the capture
+    """
+    cache_read, cache_write = record_cache_usage(usage)
+    response = response or "<action>No description available</action><topic>none</topic><summary></summary>"
+    print("[DEBUG] Received Claude response")
+    try:
+        action = extract_tag('action', response) or "Error parsing response"
+        topic = extract_tag('topic', response)
+        summary = extract_tag('summary', response) if topic != "none" else None
+        continuation = bool(extract_tag('continuation', response))
+    except (AttributeError, ValueError):
+        action = "Error parsing response"
+        summary = None
+
+    window_info = meta['window_info']
+    ledger = record_call('capture', meta['timestamp'], meta.get('model'), usage, latency,
+                         image_bytes=meta.get('image_bytes', 0), batch='pending_image' in meta,
+                         app=window_info['app'], domain=domain_of(window_info.get('url')),
+                         topic=topic if topic != 'none' else None, mode=meta['llm_mode'])
+    entry = {
+        'timestamp': meta['timestamp'],
+        'image_path': None,
+        'app': window_info['app'],
+        'window': window_info['title'],
+        'url': window_info.get('url'),  # Include URL in log entry
+        'description': action,
+        'research_topic': topic,
+        'research_summary': summary,
+        'ocr_text': meta['ocr_text'],
+        'continuation': continuation,
+        'llm_mode': meta['llm_mode'],
+        'image_crops': meta['image_crops'],
+        'input_tokens': getattr(usage, 'input_tokens', None),
+        'output_tokens': getattr(usage, 'output_tokens', None),
+        'llm_latency': round(latency, 3) if latency is not None else None,
+        'cache_read_tokens': cache_read,
+        'cache_write_tokens': cache_write,
+        'batched': 'pending_image' in meta,
+        'cost_usd': ledger['usd'],
+        'processed': False
+    }
+
+    # Skip if no research content
+    if summary is None:
+        print("Took a screenshot, but it was irrelevant to research.")
+        drop_image()
+        return None
+
+    # Write the kept screenshot to permanent storage
+    timestamp = datetime.strptime(meta['timestamp'], '%Y-%m-%d %H:%M:%S')
+    perm_path = os.path.join(meta['data_dir'], 'screenshots', f"screenshot_{timestamp.strftime('%Y%m%d_%H%M%S')}.png")
+    keep_image(perm_path)
+    entry['image_path'] = perm_path  # Update path in log entry
+
+    # Use dated log file
+    log_dir = os.path.dirname(meta['log_path'])
+    dated_log = os.path.join(log_dir, f"log_{timestamp.strftime('%Y%m%d')}.json")
+
+    # The storage manager rewrites day logs from the menubar process under the same file lock
+    with _log_lock, file_lock(dated_log):
         try:
             with open(dated_log, 'r', encoding='utf-8') as f:
                 logs = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             logs = []
 
+        # Appended even when a batch result arrives late: the markdown export reads
+        # day logs as append-only, so earlier entries must never move
         logs.append(entry)
 
         with open(dated_log, 'w', encoding='utf-8') as f:
             json.dump(logs, f, indent=2)
 
-        return entry
+    # Make the capture findable through semantic search
+    from meadow.core.semantic_search import index_entry
+    try:
+        index_entry(entry)
+    except (OSError, ValueError) as e:
+        print(f"[DEBUG] Failed to index capture for search: {e}")
 
-    except (AnthropicError, IOError, ValueError) as e:
-        print(f"Error in analyze_image: {str(e)}")
-        return None
+    return entry
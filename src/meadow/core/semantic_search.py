@@ -0,0 +1,94 @@
+"""Semantic search over the OCR chunks of every relevant capture"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from meadow.core.topic_similarity import get_embedding, get_embeddings, split_into_chunks
+from meadow.core.vector_index import VectorIndex
+
+APP_DIR = os.path.expanduser('~/Library/Application Support/Meadow')
+INDEX_DIR = os.path.join(APP_DIR, 'data', 'vector_index')
+LOG_DIR = os.path.join(APP_DIR, 'data', 'logs')
+
+# Initialize index as None for lazy loading
+vector_index = None
+_index_lock = threading.Lock()
+
+def get_vector_index():
+    """Get or open the capture vector index"""
+    global vector_index
+    with _index_lock:
+        if vector_index is None:
+            vector_index = VectorIndex(INDEX_DIR)
+    return vector_index
+
+def index_entry(entry):
+    """Append the chunk embeddings of a logged capture to the index"""
+    chunks = split_into_chunks(entry.get('ocr_text') or '')
+    if not chunks:
+        return 0
+    # These were usually just embedded by the relevance check, so this is mostly cache hits
+    vectors = get_embeddings(chunks)
+    # Timestamps have one-second resolution, so the window tells same-second captures apart
+    ids = [{'timestamp': entry['timestamp'], 'app': entry.get('app'), 'window': entry.get('window'), 'chunk': i}
+           for i in range(len(chunks))]
+    get_vector_index().add(vectors, ids)
+    print(f"[DEBUG] Indexed {len(chunks)} chunks for semantic search")
+    return len(chunks)
+
+def _entry_key(record):
+    """Identify a capture by timestamp and window (records indexed before windows were stored have neither)"""
+    return record['timestamp'], record.get('app'), record.get('window')
+
+def _load_entry(record, log_cache):
+    """Find the log entry an index record belongs to, reading each day log at most once"""
+    day = datetime.strptime(record['timestamp'], '%Y-%m-%d %H:%M:%S').strftime('%Y%m%d')
+    if day not in log_cache:
+        entries = {}
+        try:
+            with open(os.path.join(LOG_DIR, f'log_{day}.json'), 'r', encoding='utf-8') as f:
+                for entry in json.load(f):
+                    entries[_entry_key(entry)] = entry
+                    entries.setdefault((entry['timestamp'], None, None), entry)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        log_cache[day] = entries
+    return log_cache[day].get(_entry_key(record))
+
+def semantic_search(query, k=10):
+    """Return the k captures whose chunks best match query, best first
+
+    Each result holds the entry fields needed for display plus the matching
+    chunk as a snippet.
+    """
+    index = get_vector_index()
+    index.refresh()
+    # Over-fetch chunks, since several chunks of one capture may match
+    hits = index.search(get_embedding(query), k=k * 4)
+
+    results = []
+    seen = set()
+    log_cache = {}
+    for score, record in hits:
+        if _entry_key(record) in seen:
+            continue
+        entry = _load_entry(record, log_cache)
+        if entry is None:
+            continue
+        seen.add(_entry_key(record))
+        chunks = split_into_chunks(entry.get('ocr_text') or '')
+        results.append({
+            'score': score,
+            'timestamp': entry['timestamp'],
+            'app': entry.get('app'),
+            'window': entry.get('window'),
+            'url': entry.get('url'),
+            'description': entry.get('description'),
+            'research_topic': entry.get('research_topic'),
+            'snippet': chunks[record['chunk']] if record['chunk'] < len(chunks) else '',
+        })
+        if len(results) >= k:
+            break
+    return results
@@ -0,0 +1,273 @@
+"""Disk budget enforcement for screenshots and caches"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from meadow.core.frame_archive import parse_ref
+from meadow.core.markdown_bridge import atomic_write, file_lock
+
+# Tunable Parameters
+# -----------------
+# Default disk budget for screenshots and caches (megabytes), overridden by config 'storage_budget_mb'
+STORAGE_BUDGET_MB = 5000
+# Screenshots older than this are recompressed, overridden by config 'compress_after_days'
+COMPRESS_AFTER_DAYS = 7
+# WebP quality and maximum width of recompressed screenshots
+WEBP_QUALITY = 70
+COMPRESSED_MAX_WIDTH = 1600
+# Seconds between background compaction passes
+COMPACTION_INTERVAL = 3600
+
+# Tiers counted against the budget; logs and the embedding cache are reported but not budgeted
+BUDGET_TIERS = ('screenshots', 'archive', 'frame_archives', 'thumbnails', 'pdf_pages')
+
+APP_DIR = os.path.expanduser('~/Library/Application Support/Meadow')
+
+SCREENSHOT_RE = re.compile(r'^screenshot_(\d{8})_\d{6}\.(png|webp)$')
+# Archived screenshots and frame archives (one per run of captures of a window), by start time
+ARCHIVED_RE = re.compile(r'^(?:screenshot|frames)_(\d{8})_(\d{6})\.(?:webp|mfa)$')
+
+
+def _dir_usage(path, suffixes=None):
+    """Total bytes and file count under path, optionally only files with the given suffixes"""
+    total = count = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if suffixes and not name.endswith(suffixes):
+                continue
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+                count += 1
+            except OSError:
+                pass
+    return total, count
+
+
+def _last_used(path):
+    """Approximate last use: reads update atime where the filesystem tracks it"""
+    stat = os.stat(path)
+    return max(stat.st_atime, stat.st_mtime)
+
+
+class StorageManager:
+    """Keeps screenshots and caches under a byte budget
+
+    Tiers, from most to least valuable:
+      - screenshots: full-resolution PNGs of recent relevant captures
+      - archive: older screenshots recompressed to downscaled WebP
+      - frame_archives: older screenshots packed into .mfa keyframe/delta archives
+      - pdf_pages / thumbnails: regenerable caches, evicted least recently used first
+
+    Compaction first recompresses screenshots older than ``compress_after_days``,
+    then evicts cache files while over budget, and finally deletes the oldest
+    archived screenshots and frame archives. Every move or deletion is written
+    back to the ``image_path`` of the matching log entry. Archived screenshots are only
+    deleted if that is enough to get back under budget; when recent
+    screenshots alone exceed it, the archive is kept and a warning printed.
+    """
+
+    def __init__(self, app_dir=APP_DIR, get_config=None):
+        self.app_dir = app_dir
+        self.screenshot_dir = os.path.join(app_dir, 'data', 'screenshots')
+        self.log_dir = os.path.join(app_dir, 'data', 'logs')
+        self.cache_dirs = {
+            'thumbnails': os.path.join(app_dir, 'cache', 'thumbnails'),
+            'pdf_pages': os.path.join(app_dir, 'cache', 'pdf_pages'),
+        }
+        self.get_config = get_config or (lambda: {})
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _settings(self):
+        """Budget in bytes and compression age in days from config"""
+        config = self.get_config()
+        budget_mb = config.get('storage_budget_mb', STORAGE_BUDGET_MB)
+        # Never touch today's log, which the analyzer is appending to
+        days = max(1, int(config.get('compress_after_days', COMPRESS_AFTER_DAYS)))
+        return int(budget_mb * 1024 * 1024), days
+
+    def usage(self):
+        """Bytes and file counts per tier"""
+        tiers = {}
+        tiers['screenshots'] = _dir_usage(self.screenshot_dir, ('.png',))
+        tiers['archive'] = _dir_usage(self.screenshot_dir, ('.webp',))
+        tiers['frame_archives'] = _dir_usage(self.screenshot_dir, ('.mfa',))
+        for tier, path in self.cache_dirs.items():
+            tiers[tier] = _dir_usage(path)
+        tiers['embeddings'] = _dir_usage(os.path.join(self.app_dir, 'cache', 'embeddings'))
+        tiers['logs'] = _dir_usage(self.log_dir)
+        budget, _ = self._settings()
+        return {
+            'tiers': {tier: {'bytes': size, 'files': count, 'budgeted': tier in BUDGET_TIERS}
+                      for tier, (size, count) in tiers.items()},
+            'total_bytes': sum(size for size, _ in tiers.values()),
+            'budgeted_bytes': sum(tiers[tier][0] for tier in BUDGET_TIERS),
+            'budget_bytes': budget,
+        }
+
+    def _screenshots(self, extension):
+        """(day, path) of screenshots with extension, oldest first"""
+        found = []
+        try:
+            names = os.listdir(self.screenshot_dir)
+        except FileNotFoundError:
+            return []
+        for name in sorted(names):
+            match = SCREENSHOT_RE.match(name)
+            if match and match.group(2) == extension:
+                found.append((match.group(1), os.path.join(self.screenshot_dir, name)))
+        return found
+
+    def _archived(self):
+        """(day, path) of archived screenshots and frame archives, oldest first"""
+        try:
+            names = os.listdir(self.screenshot_dir)
+        except FileNotFoundError:
+            return []
+        found = []
+        for name in names:
+            match = ARCHIVED_RE.match(name)
+            if match:
+                found.append((match.group(1), match.group(2), os.path.join(self.screenshot_dir, name)))
+        return [(day, path) for day, _, path in sorted(found)]
+
+    def _update_log_paths(self, day, moves):
+        """Rewrite image_path in one day log; moves maps old path to new path or None
+
+        A frame archive path in moves also matches its "<archive>#<index>" references.
+        """
+        log_path = os.path.join(self.log_dir, f'log_{day}.json')
+        # The analysis worker appends to day logs under the same lock
+        with file_lock(log_path):
+            try:
+                with open(log_path, 'r', encoding='utf-8') as f:
+                    logs = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return
+            changed = False
+            for entry in logs:
+                path, index = parse_ref(entry.get('image_path') or '')
+                if path in moves and (index is None or moves[path] is None):
+                    entry['image_path'] = moves[path]
+                    changed = True
+            if changed:
+                atomic_write(log_path, json.dumps(logs, indent=2))
+
+    def compress_old_screenshots(self, now=None):
+        """Recompress PNG screenshots older than the configured age to WebP"""
+        _, days = self._settings()
+        cutoff = ((now or datetime.now()) - timedelta(days=days)).strftime('%Y%m%d')
+        moves_by_day = {}
+        saved = 0
+        for day, path in self._screenshots('png'):
+            if day >= cutoff:
+                break
+            webp_path = os.path.splitext(path)[0] + '.webp'
+            try:
+                with Image.open(path) as img:
+                    if img.width > COMPRESSED_MAX_WIDTH:
+                        img.thumbnail((COMPRESSED_MAX_WIDTH, COMPRESSED_MAX_WIDTH * img.height // img.width))
+                    img.convert('RGB').save(webp_path + '.tmp', 'WEBP', quality=WEBP_QUALITY)
+                os.replace(webp_path + '.tmp', webp_path)
+                saved += os.path.getsize(path) - os.path.getsize(webp_path)
+                moves_by_day.setdefault(day, {})[path] = webp_path
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] Could not compress {path}: {e}")
+
+        # Point the logs at the WebP copies before removing the originals
+        for day, moves in moves_by_day.items():
+            self._update_log_paths(day, moves)
+            for path in moves:
+                os.remove(path)
+        count = sum(len(moves) for moves in moves_by_day.values())
+        if count:
+            print(f"[DEBUG] Compressed {count} screenshots, saved {saved / 1e6:.1f} MB")
+        return count
+
+    def evict_caches(self, excess):
+        """Delete least recently used cache files until excess bytes are freed"""
+        files = []
+        for path in self.cache_dirs.values():
+            for root, _, names in os.walk(path):
+                for name in names:
+                    file_path = os.path.join(root, name)
+                    try:
+                        files.append((_last_used(file_path), os.path.getsize(file_path), file_path))
+                    except OSError:
+                        pass
+        freed = 0
+        for _, size, file_path in sorted(files):
+            if freed >= excess:
+                break
+            try:
+                os.remove(file_path)
+                freed += size
+            except OSError:
+                pass
+        if freed:
+            print(f"[DEBUG] Evicted {freed / 1e6:.1f} MB of cached files")
+        return freed
+
+    def evict_archive(self, excess):
+        """Delete the oldest archived screenshots and frame archives until excess bytes are freed"""
+        freed = 0
+        moves_by_day = {}
+        for day, path in self._archived():
+            if freed >= excess:
+                break
+            freed += os.path.getsize(path)
+            moves_by_day.setdefault(day, {})[path] = None
+        for day, moves in moves_by_day.items():
+            self._update_log_paths(day, moves)
+            for path in moves:
+                os.remove(path)
+        if freed:
+            print(f"[DEBUG] Deleted {freed / 1e6:.1f} MB of the oldest archived screenshots")
+        return freed
+
+    def compact(self, now=None):
+        """Run one compaction pass and return the resulting usage"""
+        with self._lock:
+            self.compress_old_screenshots(now)
+            budget, _ = self._settings()
+            usage = self.usage()
+            excess = usage['budgeted_bytes'] - budget
+            if excess > 0:
+                excess -= self.evict_caches(excess)
+            archived = usage['tiers']['archive']['bytes'] + usage['tiers']['frame_archives']['bytes']
+            if excess > archived:
+                # Deleting the whole archive would still leave us over budget
+                print(f"[ERROR] Recent screenshots exceed the storage budget by {excess / 1e6:.1f} MB "
+                      f"even without the archive; keeping archived screenshots")
+            elif excess > 0:
+                self.evict_archive(excess)
+            return self.usage()
+
+    def start(self):
+        """Run compaction in the background every COMPACTION_INTERVAL seconds"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.compact()
+                except OSError as e:
+                    print(f"[ERROR] Storage compaction failed: {e}")
+                self._stop.wait(COMPACTION_INTERVAL)
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background compaction thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
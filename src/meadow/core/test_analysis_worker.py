@@ -0,0 +1,113 @@
+"""Unit tests for the supervised analysis worker process"""
+
+import os
+import threading
+import time
+import unittest
+from datetime import datetime
+from multiprocessing import shared_memory
+from unittest.mock import patch
+
+import numpy as np
+
+from meadow.core.analysis_worker import AnalysisWorker
+
+def fake_worker(jobs, events):
+    """Stands in for the analysis pipeline: reports the pixel sum, or crashes on request"""
+    events.put(('ready', None, os.getpid()))
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        if job['window_info'].get('crash'):
+            os._exit(1)
+        shm = shared_memory.SharedMemory(name=job['shm_name'])
+        total = int(np.ndarray(job['shape'], dtype=np.uint8, buffer=shm.buf).sum())
+        shm.close()
+        events.put(('received', job['id'], None))
+        events.put(('update', job['id'], {'topic': 'testing'}))
+        events.put(('done', job['id'], {'sum': total, 'app': job['window_info']['app']}))
+
+class BrokenQueue:
+    """Event queue whose reads fail at once, as after the worker died mid-write"""
+
+    def __init__(self):
+        self.reads = 0
+
+    def get(self, timeout=None):
+        self.reads += 1
+        raise EOFError
+
+class StubFrame:
+    """CapturedFrame stand-in whose cg_image is already a pixel array"""
+
+    def __init__(self, pixels, window_info):
+        self.cg_image = pixels
+        self.timestamp = datetime.now()
+        self.window_info = window_info
+        self.data_dir = '/tmp'
+        self.discarded = False
+
+    def discard(self):
+        self.discarded = True
+
+@patch('meadow.core.analysis_worker.cgimage_to_array', lambda pixels: pixels)
+class TestAnalysisWorker(unittest.TestCase):
+    def setUp(self):
+        self.worker = AnalysisWorker(target=fake_worker)
+        self.worker._restart_delay = 0
+        self.worker.start()
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def analyze(self, window_info, pixels=None):
+        """Submit one frame and wait for its result"""
+        done = threading.Event()
+        results = {'updates': []}
+        def on_done(result):
+            results['result'] = result
+            done.set()
+        frame = StubFrame(np.full((4, 5, 3), 2, dtype=np.uint8) if pixels is None else pixels, window_info)
+        self.assertTrue(self.worker.submit(frame, '/tmp/log.json', on_update=results['updates'].append,
+                                           on_done=on_done))
+        self.assertTrue(frame.discarded)
+        self.assertTrue(done.wait(60))
+        return results
+
+    def test_frame_round_trip(self):
+        """Pixels reach the worker through shared memory and events come back"""
+        results = self.analyze({'app': 'Safari'})
+        self.assertEqual(results['result'], {'sum': 4 * 5 * 3 * 2, 'app': 'Safari'})
+        self.assertEqual(results['updates'], [{'topic': 'testing'}])
+        self.assertEqual(self.worker.pending_count(), 0)
+
+    def test_restart_after_crash(self):
+        """A crash finishes in-flight captures with None and a new worker takes over"""
+        self.assertIsNone(self.analyze({'app': 'Safari', 'crash': True})['result'])
+        self.assertEqual(self.analyze({'app': 'Preview'})['result']['app'], 'Preview')
+        self.assertEqual(self.worker.restarts, 1)
+
+    def test_broken_event_queue_does_not_spin(self):
+        """A failing event queue is retried with a delay and the dead worker is restarted"""
+        broken = BrokenQueue()
+        self.worker._events = broken
+        time.sleep(0.5)
+        self.assertLess(broken.reads, 5)
+
+        self.worker._process.terminate()
+        deadline = time.time() + 10
+        while self.worker.restarts == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.worker.restarts, 1)
+        self.assertEqual(self.analyze({'app': 'Preview'})['result']['app'], 'Preview')
+
+    def test_backed_up_worker_drops_frames(self):
+        """Captures beyond WORKER_MAX_PENDING are dropped instead of queued"""
+        with patch('meadow.core.analysis_worker.WORKER_MAX_PENDING', 0):
+            frame = StubFrame(np.zeros((2, 2, 3), dtype=np.uint8), {'app': 'Safari'})
+            self.assertFalse(self.worker.submit(frame, '/tmp/log.json'))
+            self.assertTrue(frame.discarded)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Unit tests for the deferred Message Batches queue"""
+
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from meadow.core import batch_queue
+from meadow.core.batch_queue import BatchQueue
+
+class FakeBatchServer:
+    """Local stand-in for the Message Batches API
+
+    Batches stay 'in_progress' until finish() is called. Requests whose text
+    contains 'fail' come back errored.
+    """
+
+    def __init__(self):
+        self.batches = {}
+        self.messages = SimpleNamespace(batches=self)
+
+    def create(self, requests):
+        batch_id = f'msgbatch_{len(self.batches)}'
+        self.batches[batch_id] = {'requests': requests, 'status': 'in_progress'}
+        return SimpleNamespace(id=batch_id, processing_status='in_progress')
+
+    def retrieve(self, batch_id):
+        return SimpleNamespace(id=batch_id, processing_status=self.batches[batch_id]['status'])
+
+    def finish(self):
+        for batch in self.batches.values():
+            batch['status'] = 'ended'
+
+    def results(self, batch_id):
+        for request in self.batches[batch_id]['requests']:
+            text = request['params']['messages'][0]['content']
+            if 'fail' in text:
+                result = SimpleNamespace(type='errored')
+            else:
+                message = SimpleNamespace(content=[SimpleNamespace(text=f'<summary>{text}</summary>')])
+                result = SimpleNamespace(type='succeeded', message=message)
+            yield SimpleNamespace(custom_id=request['custom_id'], result=result)
+
+class TestBatchQueue(unittest.TestCase):
+    """Test queueing, submission, reconciliation and retries"""
+
+    def setUp(self):
+        self.queue_dir = tempfile.mkdtemp()
+        self.server = FakeBatchServer()
+        self.results = []
+        self.queue = self.make_queue()
+
+    def tearDown(self):
+        shutil.rmtree(self.queue_dir)
+
+    def make_queue(self):
+        return BatchQueue(lambda: self.server, lambda meta, message: self.results.append((meta, message)),
+                          queue_dir=self.queue_dir)
+
+    def enqueue(self, custom_id, text):
+        self.queue.enqueue(custom_id, {'model': 'm', 'max_tokens': 10,
+                                       'messages': [{'role': 'user', 'content': text}]}, {'id': custom_id})
+
+    def test_submit_and_reconcile(self):
+        """Queued requests go out as one batch and results come back with their meta"""
+        self.enqueue('a', 'first')
+        self.enqueue('b', 'second')
+        batch_id = self.queue.submit()
+        self.assertEqual(len(self.server.batches[batch_id]['requests']), 2)
+        self.assertEqual(self.queue.pending_count(), 0)
+        self.assertIsNone(self.queue.submit())
+
+        self.assertEqual(self.queue.poll(), 0)
+        self.server.finish()
+        self.assertEqual(self.queue.poll(), 2)
+        self.assertEqual(sorted(meta['id'] for meta, _ in self.results), ['a', 'b'])
+        self.assertEqual(self.queue.poll(), 0)
+
+    def test_queue_survives_restart(self):
+        """Pending requests and submitted batches are picked up by a new queue"""
+        self.enqueue('a', 'first')
+        self.queue.submit()
+        self.enqueue('b', 'second')
+
+        restarted = self.make_queue()
+        self.server.finish()
+        self.assertEqual(restarted.poll(), 1)
+        restarted.submit()
+        self.server.finish()
+        restarted.poll()
+        self.assertEqual(sorted(meta['id'] for meta, _ in self.results), ['a', 'b'])
+
+    def test_errored_requests_retried_then_dropped(self):
+        """Errored results are resubmitted until BATCH_MAX_ATTEMPTS, then reported with no message"""
+        self.enqueue('bad', 'fail please')
+        for _ in range(batch_queue.BATCH_MAX_ATTEMPTS):
+            self.assertIsNotNone(self.queue.submit())
+            self.server.finish()
+            self.queue.poll()
+        self.assertEqual(self.queue.pending_count(), 0)
+        self.assertEqual(self.results, [({'id': 'bad'}, None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Unit tests for the in-memory capture backlog"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from meadow.core import capture
+from meadow.core.capture import CaptureBacklog, CapturedFrame
+
+class FakeFrame:
+    """Frame with a fixed size that records when it is spilled"""
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+        self.spilled = False
+
+    def spill(self):
+        self.spilled = True
+
+class TestCaptureBacklog(unittest.TestCase):
+    """Test spilling past the memory limit and releasing frames"""
+
+    def test_spills_oldest_frames_past_limit(self):
+        """Older frames are spilled until the in-memory total fits; the newest stays"""
+        backlog = CaptureBacklog(limit_bytes=250)
+        frames = [FakeFrame(100) for _ in range(4)]
+        for frame in frames:
+            backlog.add(frame)
+
+        self.assertEqual([f.spilled for f in frames], [True, True, False, False])
+        self.assertEqual(backlog.in_memory_bytes(), 200)
+        self.assertEqual(len(backlog), 4)
+
+    def test_newest_frame_never_spilled(self):
+        """A single frame larger than the limit stays in memory for OCR"""
+        backlog = CaptureBacklog(limit_bytes=10)
+        frame = FakeFrame(100)
+        backlog.add(frame)
+        self.assertFalse(frame.spilled)
+
+    def test_release_frees_budget(self):
+        """Released frames no longer count toward the limit"""
+        backlog = CaptureBacklog(limit_bytes=250)
+        first, second = FakeFrame(100), FakeFrame(100)
+        backlog.add(first)
+        backlog.add(second)
+        backlog.release(first)
+        backlog.add(FakeFrame(100))
+        self.assertFalse(second.spilled)
+        self.assertEqual(len(backlog), 2)
+
+class TestCapturedFrame(unittest.TestCase):
+    """Test spill files across save and discard"""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        patches = [mock.patch.object(capture, 'encode_png', return_value=b'png'),
+                   mock.patch.object(capture, 'cgimage_geometry', return_value=(1, 1, 4))]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def temp_files(self):
+        temp_dir = os.path.join(self.data_dir, 'temp')
+        return os.listdir(temp_dir) if os.path.isdir(temp_dir) else []
+
+    def test_no_spill_after_discard(self):
+        """A frame discarded before the backlog spills it leaves no temp file"""
+        frame = CapturedFrame(object(), datetime(2024, 11, 1, 10, 0, 0), {}, self.data_dir)
+        frame.discard()
+        frame.spill()
+        self.assertEqual(self.temp_files(), [])
+
+    def test_save_moves_spill_file(self):
+        """Saving a spilled frame moves its temp file instead of leaving it behind"""
+        frame = CapturedFrame(object(), datetime(2024, 11, 1, 10, 0, 0), {}, self.data_dir)
+        frame.spill()
+        self.assertEqual(len(self.temp_files()), 1)
+        path = os.path.join(self.data_dir, 'screenshots', 'screenshot.png')
+        frame.save(path)
+        frame.discard()
+        self.assertEqual(self.temp_files(), [])
+        self.assertTrue(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
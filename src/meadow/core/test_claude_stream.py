@@ -0,0 +1,78 @@
+"""Unit tests for streaming Claude responses with incremental tag parsing"""
+
+import unittest
+from types import SimpleNamespace
+
+from meadow.core.claude_stream import TagStreamParser, extract_tag, stream_tags
+
+class FakeStream:
+    """Stands in for the SDK's MessageStream, yielding fixed text deltas"""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.sent = 0
+        self.closed = False
+        self.current_message_snapshot = SimpleNamespace(usage=SimpleNamespace(input_tokens=100, output_tokens=1))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    @property
+    def text_stream(self):
+        for delta in self.deltas:
+            self.sent += 1
+            yield delta
+
+    def get_final_message(self):
+        return SimpleNamespace(usage=SimpleNamespace(input_tokens=100, output_tokens=len(self.deltas)))
+
+class FakeClient:
+    """Client whose messages.stream returns a FakeStream"""
+
+    def __init__(self, deltas):
+        self.stream = FakeStream(deltas)
+        self.messages = SimpleNamespace(stream=lambda **request: self.stream)
+
+class TestClaudeStream(unittest.TestCase):
+    """Test tag parsing across deltas and early abort"""
+
+    def setUp(self):
+        self.deltas = ['<action>Reading', ' an article</act', 'ion>\n<topic>', 'none</topic>\n<summary>',
+                       'Long text', ' nobody needs</summary>']
+
+    def test_parser_reports_tags_as_they_close(self):
+        """Tags split across deltas are reported once, when their closing tag arrives"""
+        parser = TagStreamParser()
+        reported = [parser.feed(delta) for delta in self.deltas]
+        self.assertEqual(reported[1], [])
+        self.assertEqual(reported[2], [('action', 'Reading an article')])
+        self.assertEqual(reported[3], [('topic', 'none')])
+        self.assertEqual(reported[5], [('summary', 'Long text nobody needs')])
+        self.assertEqual(parser.tags['action'], extract_tag('action', parser.text))
+
+    def test_abort_on_irrelevant_topic(self):
+        """The stream is closed as soon as the abort condition holds"""
+        client = FakeClient(self.deltas)
+        seen = []
+        text, usage, aborted = stream_tags(client, on_tag=lambda tag, value: seen.append(tag),
+                                           abort=lambda tag, value: tag == 'topic' and value == 'none')
+        self.assertTrue(aborted)
+        self.assertTrue(client.stream.closed)
+        self.assertEqual(client.stream.sent, 4)
+        self.assertEqual(seen, ['action', 'topic'])
+        self.assertNotIn('Long text', text)
+        self.assertEqual(usage.output_tokens, 1)
+
+    def test_full_response_without_abort(self):
+        """Without an abort the whole response and final usage are returned"""
+        client = FakeClient(self.deltas)
+        text, usage, aborted = stream_tags(client)
+        self.assertFalse(aborted)
+        self.assertEqual(text, ''.join(self.deltas))
+        self.assertEqual(usage.output_tokens, len(self.deltas))
+
+if __name__ == '__main__':
+    unittest.main()
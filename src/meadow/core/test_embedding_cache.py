@@ -0,0 +1,78 @@
+"""Unit tests for the persistent embedding cache"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from meadow.core.embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test the memory LRU, disk persistence and eviction"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.vector = np.arange(8, dtype=np.float32) / 8
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_round_trip(self):
+        """Stored embeddings come back as float32 with float16 precision"""
+        cache = EmbeddingCache(self.cache_dir, 'test-model')
+        self.assertIsNone(cache.get('hello'))
+        cache.put('hello', self.vector)
+        np.testing.assert_allclose(cache.get('hello'), self.vector, atol=1e-3)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+
+    def test_persists_across_instances(self):
+        """A flushed cache is readable from a fresh process"""
+        cache = EmbeddingCache(self.cache_dir, 'test-model')
+        cache.put('hello', self.vector)
+        cache.flush()
+
+        reopened = EmbeddingCache(self.cache_dir, 'test-model')
+        np.testing.assert_allclose(reopened.get('hello'), self.vector, atol=1e-3)
+        self.assertEqual(reopened.stats()['disk_hits'], 1)
+
+    def test_model_change_invalidates(self):
+        """Embeddings from another model are never served"""
+        cache = EmbeddingCache(self.cache_dir, 'test-model')
+        cache.put('hello', self.vector)
+        cache.flush()
+
+        other = EmbeddingCache(self.cache_dir, 'other-model')
+        self.assertIsNone(other.get('hello'))
+
+    def test_lru_eviction(self):
+        """The disk tier never grows past max_entries"""
+        cache = EmbeddingCache(self.cache_dir, 'test-model', max_entries=2, memory_entries=1)
+        cache.put('a', self.vector)
+        cache.put('b', self.vector)
+        cache.get('a')  # 'b' is now least recently used
+        cache.put('c', self.vector)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_reused_row_after_crash(self):
+        """A row reused after the last index flush is not served under its old key"""
+        cache = EmbeddingCache(self.cache_dir, 'test-model', max_entries=2)
+        cache.put('one', self.vector)
+        cache.put('two', self.vector)
+        cache.flush()
+        # Evicts 'one' and overwrites its row; the on-disk index still maps 'one' to it
+        cache.put('three', -self.vector)
+        cache._vectors.flush()
+        cache._keys.flush()
+
+        reopened = EmbeddingCache(self.cache_dir, 'test-model', max_entries=2)
+        self.assertIsNone(reopened.get('one'))
+        np.testing.assert_allclose(reopened.get('two'), self.vector, atol=1e-3)
+
+if __name__ == '__main__':
+    unittest.main()
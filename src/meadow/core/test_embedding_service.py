@@ -0,0 +1,95 @@
+"""Unit tests for the shared embedding worker"""
+
+import threading
+import unittest
+
+import numpy as np
+
+from meadow.core.embedding_service import EmbeddingService
+
+class FakeModel:
+    """Stand-in for SentenceTransformer that records each encode call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+class TestEmbeddingService(unittest.TestCase):
+    """Test request batching on the embedding worker"""
+
+    def setUp(self):
+        self.model = FakeModel()
+        self.service = EmbeddingService('fake', batch_window=0.2, model_factory=lambda: self.model)
+        self.service.wait_until_ready()
+
+    def tearDown(self):
+        self.service.stop()
+
+    def test_encode(self):
+        """Results keep the order of the request"""
+        vectors = self.service.encode(['a', 'abc'])
+        np.testing.assert_array_equal(vectors[:, 0], [1, 3])
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Requests from several threads arriving together are merged"""
+        results = {}
+        def worker(i):
+            results[i] = self.service.encode(['shared text', f'text {i}'])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 4)
+        self.assertLess(len(self.model.calls), 4)
+        # Duplicate texts across requests are encoded once per batch
+        for call in self.model.calls:
+            self.assertEqual(len(call), len(set(call)))
+
+    def test_model_error_is_raised_to_caller(self):
+        """Encoding errors surface on the calling thread"""
+        self.model.encode = lambda texts, convert_to_numpy=True: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            self.service.encode(['boom'])
+
+class TestEmbeddingServiceLoadFailure(unittest.TestCase):
+    """Test that a failed model load never leaves callers waiting"""
+
+    def test_requests_fail_after_load_error(self):
+        """Requests racing with or following a failed load raise instead of blocking"""
+        def fail():
+            raise OSError("model files missing")
+        service = EmbeddingService('fake', model_factory=fail)
+        futures = [service.submit([f'text {i}']) for i in range(20)]
+        for future in futures:
+            with self.assertRaises(OSError):
+                future.result(timeout=5)
+        with self.assertRaises(OSError):
+            service.encode(['later'], timeout=5)
+
+    def test_failed_load_not_retried_until_delay(self):
+        """After a failed load, requests fail without loading again until the retry delay passes"""
+        loads = []
+        def fail():
+            loads.append(1)
+            raise OSError("model files missing")
+        service = EmbeddingService('fake', model_factory=fail)
+        with self.assertRaises(OSError):
+            service.encode(['first'], timeout=5)
+        for i in range(5):
+            with self.assertRaises(OSError):
+                service.encode([f'text {i}'], timeout=5)
+        self.assertEqual(len(loads), 1)
+
+        service.load_retry_delay = 0
+        with self.assertRaises(OSError):
+            service.encode(['retry'], timeout=5)
+        self.assertEqual(len(loads), 2)
+
+if __name__ == '__main__':
+    unittest.main()
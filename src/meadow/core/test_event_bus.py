@@ -0,0 +1,110 @@
+"""Unit tests for the cross-process event bus"""
+
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+
+from meadow.core import event_bus
+from meadow.core.event_bus import EventBroker, EventBus
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'events.sock')
+        self.original_delay = event_bus.BUS_RECONNECT_DELAY
+        event_bus.BUS_RECONNECT_DELAY = 0.05
+        self.broker = EventBroker(self.path).start()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.broker.stop()
+        event_bus.BUS_RECONNECT_DELAY = self.original_delay
+        shutil.rmtree(self.temp_dir)
+
+    def client(self):
+        client = EventBus(self.path)
+        self.clients.append(client)
+        return client
+
+    def test_topic_prefix_subscription(self):
+        """A subscription to 'capture' gets capture.* events but not other topics"""
+        received = queue.Queue()
+        subscriber = self.client()
+        subscriber.subscribe('capture', lambda topic, data: received.put((topic, data)))
+        subscriber.start()
+        publisher = self.client().start()
+        self.assertTrue(subscriber.wait_connected(5) and publisher.wait_connected(5))
+
+        # Give the broker a moment to register the subscription before publishing
+        for _ in range(50):
+            publisher.publish('config.changed', {'keys': ['interval']})
+            publisher.publish('capture.analyzed', {'app': 'Safari'})
+            try:
+                topic, data = received.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        self.assertEqual((topic, data), ('capture.analyzed', {'app': 'Safari'}))
+        while not received.empty():
+            self.assertTrue(received.get()[0].startswith('capture'))
+
+    def test_reconnect_after_broker_restart(self):
+        """Clients reconnect and resubscribe when the broker comes back"""
+        connects = queue.Queue()
+        received = queue.Queue()
+        subscriber = self.client()
+        subscriber.subscribe('config', lambda topic, data: received.put(data))
+        subscriber.on_connect(lambda: connects.put(True))
+        subscriber.start()
+        connects.get(timeout=5)
+
+        self.broker.stop()
+        self.broker = EventBroker(self.path).start()
+        connects.get(timeout=5)
+
+        publisher = self.client().start()
+        self.assertTrue(publisher.wait_connected(5))
+        for _ in range(50):
+            publisher.publish('config.changed', {'keys': ['interval']})
+            try:
+                self.assertEqual(received.get(timeout=0.1), {'keys': ['interval']})
+                return
+            except queue.Empty:
+                continue
+        self.fail("No event after the broker restarted")
+
+    def test_request_reply(self):
+        """A request reaches the process handling its topic and the reply comes back"""
+        server = self.client()
+        server.handle('embed', lambda data: [len(text) for text in data['texts']])
+        server.handle('fail', lambda data: 1 / 0)
+        server.start()
+        requester = self.client().start()
+        self.assertTrue(server.wait_connected(5) and requester.wait_connected(5))
+
+        # Retry until the broker has registered the server's subscription
+        for _ in range(50):
+            try:
+                result = requester.request('embed', {'texts': ['ab', 'abc']}, timeout=0.1)
+                break
+            except TimeoutError:
+                continue
+        self.assertEqual(result, [2, 3])
+        with self.assertRaises(RuntimeError):
+            requester.request('fail', timeout=5)
+        with self.assertRaises(TimeoutError):
+            requester.request('nobody.listens', timeout=0.2)
+
+    def test_publish_without_broker_is_dropped(self):
+        """Publishing while disconnected returns False instead of blocking"""
+        self.broker.stop()
+        client = self.client().start()
+        self.assertFalse(client.wait_connected(0.2))
+        self.assertFalse(client.publish('capture.started', {}))
+
+if __name__ == '__main__':
+    unittest.main()
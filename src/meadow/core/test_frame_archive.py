@@ -0,0 +1,83 @@
+"""Unit tests for the keyframe+delta screenshot archive"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from meadow.core import frame_archive
+from meadow.core.frame_archive import FrameArchive, archive_day, load_image, write_archive
+
+def reading_session(count, height=300, width=500, seed=0):
+    """Frames of one window where a small region changes each capture"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 256, size=(height, width, 4), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = frame.copy()
+        top = (10 + 7 * i) % (height - 20)
+        frame[top:top + 20, 20:90] = rng.integers(0, 256, size=(20, 70, 4), dtype=np.uint8)
+        frames.append(frame)
+    return frames
+
+class TestFrameArchive(unittest.TestCase):
+    """Test lossless round trips, random access and log migration"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'frames.mfa')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_random_access(self):
+        """Every frame decodes exactly, in any order"""
+        frames = reading_session(40)
+        write_archive(self.path, frames)
+        archive = FrameArchive(self.path)
+        self.assertEqual(len(archive), 40)
+        for i in [39, 3, 17, 16, 0, 18, 25]:
+            np.testing.assert_array_equal(archive.frame(i), frames[i])
+
+    def test_deltas_smaller_than_independent_frames(self):
+        """Mostly identical frames compress far better than keyframes alone"""
+        frames = reading_session(20)
+        size = write_archive(self.path, frames)
+        keyframes_only = sum(len(frame_archive._compress(f.tobytes(), 'zlib')) for f in frames)
+        self.assertLess(size * 5, keyframes_only)
+
+    def test_resize_forces_keyframe(self):
+        """A frame of another size is stored whole"""
+        frames = reading_session(3) + reading_session(2, height=200, seed=1)
+        write_archive(self.path, frames)
+        archive = FrameArchive(self.path)
+        self.assertTrue(archive.records[3]['key'])
+        np.testing.assert_array_equal(archive.frame(4), frames[4])
+
+    def test_archive_day_repoints_logs(self):
+        """Runs of one window move into an archive and the logs follow"""
+        frames = reading_session(3)
+        entries = []
+        for i, frame in enumerate(frames):
+            png = os.path.join(self.temp_dir, f'screenshot_20240601_12000{i}.png')
+            Image.fromarray(frame).save(png)
+            entries.append({'timestamp': f'2024-06-01 12:00:0{i}', 'app': 'Preview',
+                            'window': 'budget.pdf', 'image_path': png})
+        log_path = os.path.join(self.temp_dir, 'log_20240601.json')
+        with open(log_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+
+        before, after = archive_day(log_path, self.temp_dir)
+        self.assertGreater(before, after)
+        with open(log_path, encoding='utf-8') as f:
+            paths = [entry['image_path'] for entry in json.load(f)]
+        self.assertTrue(all('.mfa#' in path for path in paths))
+        self.assertFalse(any(name.endswith('.png') for name in os.listdir(self.temp_dir)))
+        np.testing.assert_array_equal(np.asarray(load_image(paths[2])), frames[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Unit tests for the BM25 keyword stage"""
+
+import unittest
+
+from meadow.core.lexical_filter import bm25_chunk_scores, expand_topic_keywords, lexical_decision, matching_chunks
+
+class TestLexicalFilter(unittest.TestCase):
+    """Test keyword expansion and cascade decisions"""
+
+    def setUp(self):
+        self.keywords = {'urban planning': ['plan', 'urban', 'zon'], 'civic government': ['civic', 'govern']}
+        self.related = [
+            'The urban planning committee reviewed zoning changes downtown today.',
+            'Planners said urban zoning would change near the transit hub.',
+            'Residents asked the planning board about zoning for urban housing.',
+        ]
+        self.unrelated = [
+            'A recipe for chocolate cake requires flour, sugar and eggs.',
+            'Mix well and bake at 350 degrees for thirty minutes or so.',
+            'Let the cake cool before adding the frosting on top of it.',
+        ]
+
+    def test_expand_keywords_stems(self):
+        """Topic words are stemmed and stopwords dropped"""
+        keywords = expand_topic_keywords(['Urban Planning of the city'])
+        self.assertIn('plan', keywords['Urban Planning of the city'])
+        self.assertNotIn('the', keywords['Urban Planning of the city'])
+
+    def test_bm25_ranks_matching_chunks(self):
+        """Chunks with keywords score above chunks without"""
+        scores = bm25_chunk_scores(self.related[:1] + self.unrelated[:1], ['plan', 'zon'])
+        self.assertGreater(scores[0], 0)
+        self.assertEqual(scores[1], 0)
+
+    def test_clear_negative_rejected(self):
+        """Text with no topic keywords is rejected without embedding when a reject threshold is set"""
+        self.assertEqual(lexical_decision(self.unrelated, self.keywords, 3, reject_below=0.01), 'reject')
+
+    def test_no_keywords_deferred_by_default(self):
+        """By default text without keywords still reaches the embedding stage (it may be a paraphrase)"""
+        self.assertIsNone(lexical_decision(self.unrelated, self.keywords, 3))
+
+    def test_clear_positive_accepted(self):
+        """Keyword-dense text is accepted without embedding"""
+        self.assertEqual(lexical_decision(self.related, self.keywords, 3), 'accept')
+
+    def test_matching_chunks(self):
+        """Only chunks with the winning topic's keywords are returned"""
+        chunks = self.unrelated[:1] + self.related
+        matched = matching_chunks(chunks, self.keywords, 3)
+        self.assertEqual(sorted(matched), sorted(self.related))
+
+    def test_ambiguous_deferred(self):
+        """Text in the middle band goes to the embedding stage"""
+        chunks = self.unrelated[:2] + self.related[:1]
+        self.assertIsNone(lexical_decision(chunks, self.keywords, 3))
+
+    def test_single_dense_chunk_not_accepted(self):
+        """Fewer than min_chunks matching chunks never skip the embedding stage"""
+        chunks = self.unrelated[:2] + [' '.join(self.related)]
+        self.assertIsNone(lexical_decision(chunks, self.keywords, 3, accept_above=0.01))
+        self.assertEqual(lexical_decision(chunks, self.keywords, 1, accept_above=0.01), 'accept')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Unit tests for the event-driven manicode PTY wrapper"""
+
+import asyncio
+import tempfile
+import unittest
+
+from meadow.core.manicode_wrapper import ManicodeRun, SentinelMatcher
+
+class TestSentinelMatcher(unittest.TestCase):
+    """Test incremental sentinel detection"""
+
+    def test_sentinel_split_across_reads(self):
+        """Markers split between chunks are still found exactly once"""
+        matcher = SentinelMatcher(["Complete!", "Wait..."])
+        self.assertEqual(matcher.feed("working... Comp"), set())
+        self.assertEqual(matcher.feed("lete! done"), {"Complete!"})
+        self.assertEqual(matcher.feed("Complete!"), set())
+        self.assertEqual(matcher.seen, {"Complete!"})
+
+class TestManicodeRun(unittest.TestCase):
+    """Test streaming a command's output through the event loop"""
+
+    def setUp(self):
+        self.cwd = tempfile.gettempdir()
+
+    def test_streams_until_complete(self):
+        """Output is streamed and the run stops at the completion marker"""
+        async def run():
+            # Quoting keeps the echoed command line from matching the marker
+            command = ManicodeRun("echo 'Comp''lete!'; sleep 30\r", self.cwd, idle_timeout=5)
+            chunks = [chunk async for chunk in command]
+            return command, chunks
+
+        command, chunks = asyncio.run(run())
+        self.assertTrue(chunks)
+        self.assertIn("Complete!", command.output)
+
+    def test_runs_share_one_loop(self):
+        """Several runs progress concurrently on the same loop"""
+        async def collect(marker):
+            command = ManicodeRun(f"sleep 0.5; echo {marker}'Comp''lete!'\r", self.cwd, idle_timeout=5)
+            async for _ in command:
+                pass
+            return command.output
+
+        async def run_both():
+            # A ticker on the same loop keeps running only if the runs never block it
+            ticks = 0
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.05)
+                    ticks += 1
+            ticker = asyncio.ensure_future(tick())
+            start = asyncio.get_running_loop().time()
+            outputs = await asyncio.gather(collect("a"), collect("b"))
+            elapsed = asyncio.get_running_loop().time() - start
+            ticker.cancel()
+            return outputs, ticks, elapsed
+
+        outputs, ticks, elapsed = asyncio.run(run_both())
+        self.assertIn("aComplete!", outputs[0])
+        self.assertIn("bComplete!", outputs[1])
+        self.assertGreater(ticks, elapsed / 0.05 / 2)
+
+    def test_idle_and_failed_runs_do_not_succeed(self):
+        """Going idle or exiting non-zero is a failure; exiting 0 is a success"""
+        async def run(command, **kwargs):
+            run = ManicodeRun(command, self.cwd, **kwargs)
+            async for _ in run:
+                pass
+            return run
+
+        idle = asyncio.run(run("echo Wait...; sleep 30\r", idle_timeout=0.5))
+        self.assertTrue(idle.timed_out)
+        self.assertFalse(idle.succeeded)
+        failed = asyncio.run(run("exit 3\r", idle_timeout=5))
+        self.assertEqual(failed.exit_status, 3)
+        self.assertFalse(failed.succeeded)
+        self.assertTrue(asyncio.run(run("exit 0\r", idle_timeout=5)).succeeded)
+
+    def test_output_is_bounded(self):
+        """Only the most recent output is kept"""
+        async def run():
+            command = ManicodeRun("yes x | head -c 200000; echo 'Comp''lete!'\r", self.cwd,
+                                  idle_timeout=5, max_output_chars=10000)
+            async for _ in command:
+                pass
+            return command.output
+
+        output = asyncio.run(run())
+        self.assertLess(len(output), 10000 + 65536)
+        self.assertIn("Complete!", output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Unit tests for incremental log processing in the markdown bridge"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from meadow.core.markdown_bridge import MarkdownBridge, atomic_write, read_new_log_entries
+
+class TestReadNewLogEntries(unittest.TestCase):
+    """Test watermark-based reads of day logs"""
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.log_dir, 'log_20241101.json')
+        self.logs = []
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def append(self, count):
+        """Append entries the way the screenshot analyzer does"""
+        for _ in range(count):
+            i = len(self.logs)
+            self.logs.append({'timestamp': f'2024-11-01 10:00:{i:02d}', 'ocr_text': 'text ' * i, 'processed': False})
+        with open(self.log_file, 'w', encoding='utf-8') as f:
+            json.dump(self.logs, f, indent=2)
+
+    def test_only_new_entries_returned(self):
+        """Each read returns just the entries appended since the last one"""
+        self.append(3)
+        entries, mark = read_new_log_entries(self.log_file, None)
+        self.assertEqual(len(entries), 3)
+
+        entries, mark = read_new_log_entries(self.log_file, mark)
+        self.assertEqual(entries, [])
+
+        self.append(2)
+        entries, mark = read_new_log_entries(self.log_file, mark)
+        self.assertEqual([e['timestamp'] for e in entries], [l['timestamp'] for l in self.logs[3:]])
+        self.assertEqual(mark['entries'], 5)
+
+    def test_empty_log(self):
+        """A log that starts empty is picked up once entries arrive"""
+        self.append(0)
+        entries, mark = read_new_log_entries(self.log_file, None)
+        self.assertEqual(entries, [])
+        self.append(1)
+        entries, mark = read_new_log_entries(self.log_file, mark)
+        self.assertEqual(len(entries), 1)
+
+    def test_rewritten_log_resumes_from_entry_index(self):
+        """Editing earlier entries falls back to a full parse without repeats"""
+        self.append(3)
+        _, mark = read_new_log_entries(self.log_file, None)
+        self.logs[0]['ocr_text'] = 'edited'
+        self.append(1)
+        entries, mark = read_new_log_entries(self.log_file, mark)
+        self.assertEqual([e['timestamp'] for e in entries], [self.logs[3]['timestamp']])
+
+    def test_legacy_processed_flag(self):
+        """Entries marked processed by older versions are skipped"""
+        self.append(2)
+        self.logs[0]['processed'] = True
+        self.append(0)
+        entries, _ = read_new_log_entries(self.log_file, None)
+        self.assertEqual(len(entries), 1)
+
+class TestConvertLogsToMarkdown(unittest.TestCase):
+    """Test manifest-based skipping of unchanged markdown files"""
+
+    def setUp(self):
+        self.notes_dir = tempfile.mkdtemp()
+        self.bridge = MarkdownBridge(self.notes_dir, manifest_path=os.path.join(self.notes_dir, 'manifest.json'))
+        self.bridge.prepare_workspace()
+        self.log = {
+            'timestamp': '2024-11-01 10:00:00', 'app': 'Safari', 'window': 'City Council',
+            'research_topic': 'civic government', 'image_path': '/tmp/x.png', 'continuation': False,
+            'description': 'Reading minutes', 'research_summary': 'Budget vote', 'ocr_text': 'text',
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.notes_dir)
+
+    def test_unchanged_entries_skipped(self):
+        """Only new or changed entries are written and reported"""
+        written = self.bridge.convert_logs_to_markdown([self.log])
+        self.assertEqual(len(written), 1)
+        self.assertTrue(os.path.exists(written[0]))
+        mtime = os.stat(written[0]).st_mtime_ns
+
+        self.assertEqual(self.bridge.convert_logs_to_markdown([self.log]), [])
+        self.assertEqual(os.stat(written[0]).st_mtime_ns, mtime)
+
+        self.log['research_summary'] = 'Budget vote passed'
+        self.assertEqual(self.bridge.convert_logs_to_markdown([self.log]), written)
+
+    def test_deleted_file_rewritten(self):
+        """A file removed by the user is written again"""
+        written = self.bridge.convert_logs_to_markdown([self.log])
+        os.remove(written[0])
+        self.assertEqual(self.bridge.convert_logs_to_markdown([self.log]), written)
+
+    def test_failed_write_reported(self):
+        """A failed write is reported and not recorded as written"""
+        failed = set()
+        with patch('meadow.core.markdown_bridge.atomic_write', side_effect=OSError('disk full')):
+            self.assertEqual(self.bridge.convert_logs_to_markdown([self.log], failed), [])
+        self.assertEqual(failed, {self.bridge.render_log(self.log)[0]})
+        self.assertEqual(len(self.bridge.convert_logs_to_markdown([self.log])), 1)
+
+    def test_no_temp_files_left(self):
+        """Atomic writes leave no temp files behind"""
+        self.bridge.convert_logs_to_markdown([self.log])
+        self.assertEqual([f for f in os.listdir(self.bridge.lognotes_dir) if f.startswith('.tmp_')], [])
+
+class TestAtomicWrite(unittest.TestCase):
+    """Test replacing files in place"""
+
+    def test_keeps_file_mode(self):
+        """A rewritten file keeps its permissions instead of mkstemp's 0600"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'log_20241101.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[]')
+        os.chmod(path, 0o644)
+        atomic_write(path, '[{}]')
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '[{}]')
+
+if __name__ == '__main__':
+    unittest.main()
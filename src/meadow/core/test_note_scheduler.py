@@ -0,0 +1,133 @@
+"""Unit tests for the staged-note job scheduler"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from meadow.core.note_scheduler import MANIFEST_FILENAME, NoteJobScheduler
+
+class TestNoteJobScheduler(unittest.TestCase):
+    """Test delta manifests, persistence and run serialization"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.notes_dir = os.path.join(self.temp_dir, 'notes')
+        self.staging_dir = os.path.join(self.notes_dir, '_machine', '_staging', 'lognotes')
+        os.makedirs(self.staging_dir)
+        self.state_path = os.path.join(self.temp_dir, 'note_jobs.json')
+        self.manifests = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def stage(self, name):
+        with open(os.path.join(self.staging_dir, name), 'w', encoding='utf-8') as f:
+            f.write(f'# {name}\n')
+
+    async def runner(self, instructions, options, allow_notes):
+        """Record the manifest each run receives"""
+        self.assertIn(MANIFEST_FILENAME, instructions)
+        self.assertTrue(allow_notes)
+        with open(os.path.join(options['cwd'], '_machine', '_staging', MANIFEST_FILENAME), encoding='utf-8') as f:
+            self.manifests.append([line[2:] for line in f.read().splitlines() if line.startswith('- ')])
+        self.release.wait(5)
+        return ''
+
+    def make_scheduler(self, **kwargs):
+        return NoteJobScheduler(self.notes_dir, state_path=self.state_path, runner=self.runner, **kwargs)
+
+    def test_only_new_files_are_sent(self):
+        """A second run only receives files staged after the first"""
+        self.stage('a.md')
+        self.stage('b.md')
+        scheduler = self.make_scheduler()
+        scheduler.request_run()
+        scheduler.wait(5)
+        self.assertEqual(self.manifests, [['_machine/_staging/lognotes/a.md', '_machine/_staging/lognotes/b.md']])
+
+        self.stage('c.md')
+        # A fresh scheduler reads the persistent record instead of reprocessing a and b
+        scheduler = self.make_scheduler()
+        scheduler.request_run()
+        scheduler.wait(5)
+        self.assertEqual(self.manifests[1], ['_machine/_staging/lognotes/c.md'])
+
+        with open(self.state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        self.assertIsNone(state['job'])
+        self.assertEqual(len(state['consumed']), 3)
+
+    def test_runs_do_not_overlap(self):
+        """Requests during a run are coalesced into one follow-up run"""
+        self.stage('a.md')
+        self.release.clear()
+        scheduler = self.make_scheduler()
+        self.assertTrue(scheduler.request_run())
+        while not self.manifests:
+            time.sleep(0.01)
+        self.stage('b.md')
+        self.assertFalse(scheduler.request_run())
+        self.assertFalse(scheduler.request_run())
+        self.release.set()
+        scheduler.wait(5)
+        self.assertEqual(self.manifests, [['_machine/_staging/lognotes/a.md'], ['_machine/_staging/lognotes/b.md']])
+
+    def test_failed_run_keeps_files_pending(self):
+        """Files are only marked consumed when the generator succeeds"""
+        async def failing_runner(*_):
+            raise OSError('pty failed')
+
+        self.stage('a.md')
+        scheduler = NoteJobScheduler(self.notes_dir, state_path=self.state_path, runner=failing_runner)
+        scheduler.request_run()
+        scheduler.wait(5)
+        self.assertEqual(scheduler.pending(), ['lognotes/a.md'])
+
+    def test_removed_note_skipped_in_manifest(self):
+        """A related note removed before the manifest is written does not stop the run"""
+        class VanishingIndex:
+            def select_notes(self, texts):
+                return ['topics/gone.md']
+
+            def entry(self, relpath):
+                raise KeyError(relpath)
+
+        self.stage('a.md')
+        completed = []
+        scheduler = self.make_scheduler(on_complete=completed.append, notes_index=VanishingIndex())
+        scheduler.request_run()
+        scheduler.wait(5)
+        self.assertEqual(self.manifests, [['_machine/_staging/lognotes/a.md']])
+        self.assertEqual(completed, [True])
+        self.assertEqual(scheduler.pending(), [])
+
+    def test_refused_run_completes(self):
+        """A request refused because another process runs a job still calls on_complete"""
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump({'job': {'id': 'other', 'pid': os.getppid()}}, f)
+        completed = []
+        scheduler = self.make_scheduler(on_complete=completed.append)
+        self.assertFalse(scheduler.request_run())
+        self.assertEqual(completed, [False])
+
+    def test_debounced_auto_run(self):
+        """Bursts of staged files become one batch after the quiet period"""
+        scheduler = self.make_scheduler(debounce=0.2, auto_run=True)
+        for name in ('a.md', 'b.md', 'c.md'):
+            self.stage(name)
+            scheduler.notify(os.path.join(self.staging_dir, name))
+        deadline = time.time() + 5
+        while not self.manifests and time.time() < deadline:
+            time.sleep(0.01)
+        scheduler.wait(5)
+        self.assertEqual(len(self.manifests), 1)
+        self.assertEqual(len(self.manifests[0]), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Unit tests for the notes vault index"""
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from meadow.core.notes_index import NotesIndex, parse_note
+
+VOCABULARY = ['budget', 'fiscal', 'zoning', 'housing', 'transit', 'bus', 'recipe', 'cake']
+
+def fake_embed(texts):
+    """Bag-of-words vectors over a tiny vocabulary"""
+    vectors = []
+    for text in texts:
+        words = re.findall(r'[a-z]+', text.lower())
+        vectors.append(np.array([words.count(w) for w in VOCABULARY] + [0.01], dtype=np.float32))
+    return vectors
+
+class TestNotesIndex(unittest.TestCase):
+    """Test parsing, incremental refresh and note selection"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.notes_dir = os.path.join(self.temp_dir, 'notes')
+        self.index_path = os.path.join(self.temp_dir, 'notes_index.json')
+        self.embedded = []
+        self.write('_machine/city/budget.md', '---\ncreated: now\n---\n# City Budget\n\nFiscal budget details. [[Zoning]]\n')
+        self.write('_machine/city/zoning.md', '# Zoning\n\nZoning and housing rules.\n')
+        self.write('research/transit.md', '# Transit\n\nBus transit routes.\n')
+        self.write('_machine/_staging/lognotes/log_1.md', '# Staged\n\nbudget budget fiscal\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, relpath, text):
+        path = os.path.join(self.notes_dir, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return fake_embed(texts)
+
+    def make_index(self):
+        return NotesIndex(self.notes_dir, index_path=self.index_path, embed=self.embed)
+
+    def test_parse_note(self):
+        """Frontmatter is skipped and headings and links extracted"""
+        parsed = parse_note('---\na: b\n---\n# Title\ntext [[Other|alias]] and [[Third#part]]\n## Sub ##\n')
+        self.assertEqual(parsed['headings'], ['Title', 'Sub'])
+        self.assertEqual(parsed['links'], ['Other', 'Third'])
+        self.assertEqual(parsed['summary'], 'text [[Other|alias]] and [[Third#part]]')
+
+    def test_refresh_skips_staging_and_unchanged(self):
+        """Only notes outside staging are indexed, and unchanged ones are not re-parsed"""
+        index = self.make_index()
+        self.assertEqual(index.refresh(), 3)
+        self.assertEqual(index.entry(os.path.join('_machine', 'city', 'budget.md'))['links'], ['Zoning'])
+
+        reloaded = self.make_index()
+        self.assertEqual(reloaded.refresh(), 0)
+        os.remove(os.path.join(self.notes_dir, 'research', 'transit.md'))
+        self.assertEqual(reloaded.refresh(), 1)
+        self.assertEqual(len(reloaded), 2)
+
+    def test_select_notes(self):
+        """The most related notes are selected and note embeddings are reused"""
+        index = self.make_index()
+        selected = index.select_notes(['budget and fiscal planning'], k=1)
+        self.assertEqual(selected, [os.path.join('_machine', 'city', 'budget.md')])
+
+        selected = index.select_notes(['more bus transit news', 'cake recipe'], k=2)
+        self.assertEqual(selected[0], os.path.join('research', 'transit.md'))
+        # Three notes plus three queries, no note embedded twice
+        self.assertEqual(len(self.embedded), 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Unit tests for OCR engine selection"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from meadow.core import ocr_engines
+from meadow.core.ocr_engines import DEFAULT_OCR_ENGINES, configured_engines, get_engine
+
+class TestOCREngines(unittest.TestCase):
+    """Test the engine registry and config-driven engine order"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.test_dir, 'config.json')
+        self.patcher = patch.object(ocr_engines, 'CONFIG_PATH', self.config_path)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.test_dir)
+
+    def write_config(self, config):
+        with open(self.config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+    def test_get_engine(self):
+        """Engines are created by name and unknown names are rejected"""
+        self.assertEqual(get_engine('tesseract').name, 'tesseract')
+        with self.assertRaises(ValueError):
+            get_engine('nonexistent')
+
+    def test_default_order_without_config(self):
+        """Missing config falls back to the platform default order"""
+        self.assertEqual(configured_engines(), DEFAULT_OCR_ENGINES)
+
+    def test_config_order_skips_unknown_engines(self):
+        """Config order is respected and unknown names are dropped"""
+        self.write_config({'ocr_engines': ['easyocr', 'bogus', 'tesseract']})
+        self.assertEqual(configured_engines(), ['easyocr', 'tesseract'])
+
+        self.write_config({'ocr_engines': ['bogus']})
+        self.assertEqual(configured_engines(), DEFAULT_OCR_ENGINES)
+
+if __name__ == '__main__':
+    unittest.main()
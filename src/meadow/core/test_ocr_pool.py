@@ -0,0 +1,67 @@
+"""Unit tests for the OCR worker process pool"""
+
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from meadow.core.ocr_pool import OCRWorkerPool
+
+def load_fake_engine():
+    """Engine that reports the frame's shape and sum, or misbehaves on request"""
+    def read(frame):
+        marker = int(frame[0, 0, 0])
+        if marker == 1:
+            time.sleep(10)
+        if marker == 2:
+            os._exit(1)
+        return [(0.0, 0.0, float(frame.shape[1]), float(frame.shape[0]), f'sum={int(frame.sum())} pid={os.getpid()}')]
+    return read
+
+class TestOCRWorkerPool(unittest.TestCase):
+    """Test shared-memory transfer, timeouts and worker restarts"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = OCRWorkerPool('fake', workers=1, timeout=2, loader=load_fake_engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def frame(self, marker=0):
+        frame = np.ones((120, 160, 3), dtype=np.uint8)
+        frame[0, 0, 0] = marker
+        return frame
+
+    def test_frame_reaches_worker(self):
+        """The worker sees the exact pixels, in another process"""
+        frame = self.frame()
+        text = self.pool.run(frame)[0][4]
+        self.assertIn(f'sum={int(frame.sum())}', text)
+        self.assertNotIn(f'pid={os.getpid()}', text)
+        self.assertGreaterEqual(self.pool.stats()['frames'], 1)
+
+    def test_timeout_restarts_worker(self):
+        """A hung worker is replaced and the pool keeps working"""
+        with self.assertRaises(TimeoutError):
+            self.pool.run(self.frame(marker=1))
+        self.assertTrue(self.pool.run(self.frame()))
+
+    def test_crash_restarts_worker(self):
+        """A crashed worker is replaced and the pool keeps working"""
+        with self.assertRaises(RuntimeError):
+            self.pool.run(self.frame(marker=2))
+        self.assertTrue(self.pool.run(self.frame()))
+
+    def test_failed_copy_keeps_worker(self):
+        """A frame that cannot be copied to shared memory does not use up a worker"""
+        with patch('meadow.core.ocr_pool.shared_memory.SharedMemory', side_effect=OSError('no memory')):
+            with self.assertRaises(OSError):
+                self.pool.run(self.frame())
+        self.assertTrue(self.pool.run(self.frame(), wait=1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Unit tests for the cached prompt prefix"""
+
+import json
+import unittest
+from types import SimpleNamespace
+
+from meadow.core.claude_stream import stream_tags
+from meadow.core.prompts import (PROMPT_CACHE_MIN_TOKENS, estimate_tokens, get_cache_stats, pdf_system,
+                                 record_cache_usage, screenshot_suffix, screenshot_system, topic_set_version)
+
+class StubStream:
+    """Streaming response that always answers the same"""
+
+    def __init__(self):
+        self.text_stream = ['<action>Reading</action><topic>none</topic>']
+        self.current_message_snapshot = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_final_message(self):
+        return SimpleNamespace(usage=SimpleNamespace(input_tokens=50, output_tokens=10))
+
+class StubClient:
+    """Records each streaming request"""
+
+    def __init__(self):
+        self.requests = []
+        self.messages = SimpleNamespace(stream=self.stream)
+
+    def stream(self, **request):
+        self.requests.append(request)
+        return StubStream()
+
+class TestPrompts(unittest.TestCase):
+    """Test that the prefix is stable and the suffix carries per-call values"""
+
+    def setUp(self):
+        self.topics = ['urban planning', 'civic government']
+        self.keywords = {'urban planning': ['zon', 'plan']}
+        self.client = StubClient()
+
+    def call(self, window, previous, topics=None):
+        stream_tags(self.client, model='stub', max_tokens=10,
+                    system=screenshot_system(topics or self.topics, self.keywords),
+                    messages=[{"role": "user", "content": screenshot_suffix(window, previous, "the screenshot")}])
+
+    def test_prefix_bytes_identical_across_calls(self):
+        """Different windows and previous actions leave the system prefix untouched"""
+        self.call({'app': 'Safari', 'title': 'Zoning news', 'url': 'https://example.com'}, ('Browsing', 'Mail', 'Inbox'))
+        self.call({'app': 'Preview', 'title': 'budget.pdf'}, ('Reading', 'Safari', 'Zoning news'))
+        self.call({'app': 'Notes', 'title': 'Todo'}, ('N/A', 'N/A', 'N/A'), topics=list(reversed(self.topics)))
+
+        prefixes = [json.dumps(r['system'], sort_keys=True).encode('utf-8') for r in self.client.requests]
+        self.assertEqual(len(set(prefixes)), 1)
+        self.assertEqual(self.client.requests[0]['system'][-1]['cache_control'], {'type': 'ephemeral'})
+        suffixes = [r['messages'][0]['content'] for r in self.client.requests]
+        self.assertIn('Zoning news', suffixes[0])
+        self.assertNotIn('Zoning news', prefixes[0].decode('utf-8'))
+
+    def test_topic_change_changes_prefix(self):
+        """A different topic set gets a different version and prefix"""
+        other = ['housing policy']
+        self.assertNotEqual(topic_set_version(self.topics), topic_set_version(other))
+        self.assertEqual(topic_set_version(self.topics), topic_set_version(list(reversed(self.topics))))
+        self.assertNotEqual(screenshot_system(self.topics), screenshot_system(other))
+        self.assertNotEqual(topic_set_version(self.topics, self.keywords), topic_set_version(self.topics))
+
+    def test_pdf_prefix_has_no_page_numbers(self):
+        """The PDF prefix is the same for every page"""
+        self.assertEqual(pdf_system(), pdf_system())
+        self.assertNotIn('of 3', pdf_system()[0]['text'])
+
+    def test_cache_control_only_above_minimum(self):
+        """Both prefixes are long enough to be cached"""
+        for block in (screenshot_system(self.topics)[0], pdf_system()[0]):
+            self.assertGreaterEqual(estimate_tokens(block['text']), PROMPT_CACHE_MIN_TOKENS)
+            self.assertIn('cache_control', block)
+        self.assertEqual(get_cache_stats()['uncacheable_prefixes'], [])
+
+    def test_cache_usage_recorded(self):
+        """Cache reads and writes are added to the totals"""
+        before = get_cache_stats().get('cache_read_tokens', 0)
+        usage = SimpleNamespace(input_tokens=50, cache_read_input_tokens=1200, cache_creation_input_tokens=0)
+        self.assertEqual(record_cache_usage(usage), (1200, 0))
+        self.assertEqual(get_cache_stats()['cache_read_tokens'] - before, 1200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Unit tests for cropping the API image to the relevant text"""
+
+import unittest
+
+from meadow.core.region_crop import locate_chunks, merge_boxes, relevant_crops
+
+class TestRegionCrop(unittest.TestCase):
+    """Test locating matched chunks on screen and building crops"""
+
+    def setUp(self):
+        # A sidebar of links on the left and an article in the middle of a 1200x1000 window
+        self.observations = [(10, 100 + 30 * i, 150, 20, f'Sidebar link number {i}') for i in range(5)]
+        article = [
+            'The council approved the zoning plan for the',
+            'downtown district after a long public hearing.',
+            'Residents asked about parking and transit changes',
+            'near the new housing development on Main Street.',
+        ]
+        self.observations += [(300, 400 + 30 * i, 600, 20, line) for i, line in enumerate(article)]
+        self.observations.append((300, 900, 200, 20, 'Advertisement buy now'))
+        self.chunk = ' '.join(article[:2])
+
+    def test_locate_chunk_lines(self):
+        """A chunk maps to the lines it spans, across line breaks"""
+        boxes = locate_chunks([self.chunk], self.observations)
+        self.assertEqual(boxes, [(300, 400, 600, 20), (300, 430, 600, 20)])
+        self.assertEqual(locate_chunks(['text that is not on screen'], self.observations), [])
+
+    def test_crop_excludes_sidebar_and_ads(self):
+        """The crop covers the chunk plus margin and nothing else"""
+        crops = relevant_crops([self.chunk], self.observations, 1200, 1000)
+        self.assertEqual(len(crops), 1)
+        x, y, w, h = crops[0]
+        self.assertLessEqual(x, 300)
+        self.assertGreater(x, 160)
+        self.assertLessEqual(y, 400)
+        self.assertLess(y + h, 900)
+
+    def test_whole_window_when_crops_too_large(self):
+        """Crops covering most of the window are not worth it"""
+        observations = [(0, 20 * i, 1200, 20, f'line {i} of the text here') for i in range(50)]
+        chunk = ' '.join(obs[4] for obs in observations)
+        self.assertEqual(relevant_crops([chunk], observations, 1200, 1000), [])
+
+    def test_merge_limits_crop_count(self):
+        """Distant regions stay separate up to the crop limit"""
+        boxes = [(0, 200 * i, 100, 20) for i in range(5)]
+        self.assertEqual(len(merge_boxes(boxes, gap=50, max_crops=3)), 3)
+        self.assertEqual(len(merge_boxes(boxes[:2], gap=50)), 2)
+        self.assertEqual(len(merge_boxes(boxes[:2], gap=500)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
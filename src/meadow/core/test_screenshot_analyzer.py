@@ -1,13 +1,16 @@
 """Unit tests for screenshot analyzer functionality"""
 
+import json
 import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 import Vision
 from PIL import Image, ImageDraw
 import numpy as np
 
-from meadow.core.screenshot_analyzer import OCRProcessor
+from meadow.core.screenshot_analyzer import OCRProcessor, choose_llm_mode, complete_deferred_analysis
 
 class TestOCRProcessor(unittest.TestCase):
     """Test OCR processing with both Vision and EasyOCR"""
@@ -105,5 +108,66 @@ class TestOCRProcessor(unittest.TestCase):
             result = self.ocr.get_text_from_image(None, self.test_path)
             self.assertTrue(len(result) > 0)
 
+class TestLLMMode(unittest.TestCase):
+    """Test choosing between OCR-text-only and image input for Claude"""
+
+    def setUp(self):
+        words = "The council approved the transit budget after a long public hearing on Tuesday."
+        self.article = ' '.join([words] * 10)
+        # Text lines covering most of an 800x600 window
+        self.lines = [(20, y, 760, 18, words) for y in range(20, 580, 24)]
+
+    def test_text_dominated_screen_uses_text(self):
+        """Long, clean OCR text covering the window goes text-only"""
+        self.assertEqual(choose_llm_mode(self.article, self.lines, 800, 600), 'text')
+
+    def test_visual_or_garbled_screen_uses_image(self):
+        """Sparse boxes, garbled tokens or short text keep the image"""
+        self.assertEqual(choose_llm_mode(self.article, self.lines[:2], 800, 600), 'image')
+        garbled = ' '.join(['x7f3q Il1| ~~ #@!'] * 40)
+        self.assertEqual(choose_llm_mode(garbled, self.lines, 800, 600), 'image')
+        self.assertEqual(choose_llm_mode("Play Pause", self.lines, 800, 600), 'image')
+        self.assertEqual(choose_llm_mode(self.article, None, 800, 600), 'image')
+
+    def test_configured_mode_overrides(self):
+        """Config 'llm_input_mode' forces a mode"""
+        self.assertEqual(choose_llm_mode(self.article, self.lines, 800, 600, 'image'), 'image')
+        self.assertEqual(choose_llm_mode("short", None, 800, 600, 'text'), 'text')
+
+class TestDeferredAnalysis(unittest.TestCase):
+    """Test logging of batch results that arrive after later captures"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.temp_dir, 'logs', 'log.json')
+        os.makedirs(os.path.dirname(self.log_path))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def meta(self, timestamp):
+        pending_image = os.path.join(self.temp_dir, f"pending_{timestamp[-2:]}.png")
+        Image.new('RGB', (4, 4)).save(pending_image)
+        return {'timestamp': timestamp, 'window_info': {'app': 'Safari', 'title': 'Zoning'}, 'llm_mode': 'text',
+                'image_crops': [], 'ocr_text': 'zoning text', 'data_dir': self.temp_dir,
+                'log_path': self.log_path, 'pending_image': pending_image}
+
+    @patch('meadow.core.config.Config')
+    @patch('meadow.core.markdown_bridge.process_analysis_result', new_callable=AsyncMock)
+    @patch('meadow.core.semantic_search.index_entry')
+    @patch('meadow.core.event_bus.get_event_bus')
+    @patch('meadow.core.screenshot_analyzer.record_call', return_value={'usd': 0.0})
+    def test_late_result_appended_and_exported(self, _record, _bus, _index, export, _config):
+        """A late result goes at the end of the day log, so exported entries never shift, and is exported"""
+        message = MagicMock(usage=None)
+        message.content = [MagicMock(text='<action>Reads</action><topic>urban planning</topic><summary>Zoning.</summary>')]
+        complete_deferred_analysis(self.meta('2024-11-01 10:00:30'), message)
+        complete_deferred_analysis(self.meta('2024-11-01 10:00:10'), message)
+
+        with open(os.path.join(self.temp_dir, 'logs', 'log_20241101.json'), encoding='utf-8') as f:
+            timestamps = [entry['timestamp'] for entry in json.load(f)]
+        self.assertEqual(timestamps, ['2024-11-01 10:00:30', '2024-11-01 10:00:10'])
+        self.assertEqual(export.await_count, 2)
+
 if __name__ == '__main__':
     unittest.main()
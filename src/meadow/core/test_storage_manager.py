@@ -0,0 +1,133 @@
+"""Unit tests for screenshot compression and budget enforcement"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+
+from PIL import Image
+
+from meadow.core.frame_archive import archive_day
+from meadow.core.storage_manager import StorageManager
+
+class TestStorageManager(unittest.TestCase):
+    """Test recompression, log path updates and eviction order"""
+
+    def setUp(self):
+        self.app_dir = tempfile.mkdtemp()
+        self.config = {'compress_after_days': 7}
+        self.manager = StorageManager(self.app_dir, get_config=lambda: self.config)
+        os.makedirs(self.manager.screenshot_dir)
+        os.makedirs(self.manager.log_dir)
+        self.now = datetime(2024, 6, 30, 12, 0, 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.app_dir)
+
+    def add_capture(self, day, seconds='120000'):
+        """Write a noisy PNG screenshot and its log entry"""
+        path = os.path.join(self.manager.screenshot_dir, f'screenshot_{day}_{seconds}.png')
+        Image.effect_noise((800, 600), 64).convert('RGB').save(path)
+        log_path = os.path.join(self.manager.log_dir, f'log_{day}.json')
+        logs = []
+        if os.path.exists(log_path):
+            with open(log_path, encoding='utf-8') as f:
+                logs = json.load(f)
+        logs.append({'timestamp': f'{day} {seconds}', 'image_path': path})
+        with open(log_path, 'w', encoding='utf-8') as f:
+            json.dump(logs, f)
+        return path
+
+    def log_paths(self, day):
+        with open(os.path.join(self.manager.log_dir, f'log_{day}.json'), encoding='utf-8') as f:
+            return [entry['image_path'] for entry in json.load(f)]
+
+    def add_cache_file(self, tier, name, size, age):
+        path = os.path.join(self.manager.cache_dirs[tier], name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_old_screenshots_recompressed(self):
+        """Only old PNGs become WebP, and their log entries follow"""
+        old = self.add_capture('20240601')
+        recent = self.add_capture('20240629')
+        png_size = os.path.getsize(old)
+
+        self.assertEqual(self.manager.compress_old_screenshots(self.now), 1)
+        webp = old[:-4] + '.webp'
+        self.assertFalse(os.path.exists(old))
+        self.assertLess(os.path.getsize(webp), png_size)
+        self.assertEqual(self.log_paths('20240601'), [webp])
+        self.assertEqual(self.log_paths('20240629'), [recent])
+
+    def test_caches_evicted_before_screenshots(self):
+        """Over budget, the least recently used cache files go first"""
+        capture = self.add_capture('20240629')
+        stale = self.add_cache_file('thumbnails', 'a.png', 200_000, age=1000)
+        fresh = self.add_cache_file('pdf_pages', 'b.png', 200_000, age=10)
+        used = self.manager.usage()['budgeted_bytes']
+        self.config['storage_budget_mb'] = (used - 100_000) / (1024 * 1024)
+
+        self.manager.compact(self.now)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertTrue(os.path.exists(capture))
+
+    def test_oldest_archive_deleted_last(self):
+        """When caches are not enough, the oldest archived screenshot is removed and unlinked"""
+        self.add_capture('20240601')
+        self.add_capture('20240602')
+        self.manager.compress_old_screenshots(self.now)
+        self.config['storage_budget_mb'] = (self.manager.usage()['budgeted_bytes'] - 1000) / (1024 * 1024)
+
+        usage = self.manager.compact(self.now)
+        self.assertEqual(self.log_paths('20240601'), [None])
+        self.assertTrue(os.path.exists(self.log_paths('20240602')[0]))
+        self.assertEqual(usage['tiers']['archive']['files'], 1)
+
+    def test_oldest_frame_archive_evicted(self):
+        """Frame archives are evicted oldest first and their frame references cleared"""
+        self.add_capture('20240601', '120000')
+        self.add_capture('20240601', '120100')
+        log_path = os.path.join(self.manager.log_dir, 'log_20240601.json')
+        with open(log_path, encoding='utf-8') as f:
+            logs = json.load(f)
+        for entry in logs:
+            entry['timestamp'] = datetime.strptime(entry['timestamp'], '%Y%m%d %H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+        with open(log_path, 'w', encoding='utf-8') as f:
+            json.dump(logs, f)
+        archive_day(log_path, self.manager.screenshot_dir)
+        self.add_capture('20240602')
+        self.manager.compress_old_screenshots(self.now)
+        self.assertEqual(self.manager.usage()['tiers']['frame_archives']['files'], 1)
+        self.config['storage_budget_mb'] = (self.manager.usage()['budgeted_bytes'] - 1000) / (1024 * 1024)
+
+        usage = self.manager.compact(self.now)
+        self.assertEqual(usage['tiers']['frame_archives']['files'], 0)
+        self.assertEqual(self.log_paths('20240601'), [None, None])
+        self.assertTrue(os.path.exists(self.log_paths('20240602')[0]))
+
+    def test_archive_kept_when_eviction_cannot_meet_budget(self):
+        """Unbudgeted logs do not count, and the archive is not wiped when recent screenshots exceed the budget"""
+        self.add_capture('20240601')
+        recent = self.add_capture('20240629')
+        self.manager.compress_old_screenshots(self.now)
+        with open(os.path.join(self.manager.log_dir, 'log_20240628.json'), 'w', encoding='utf-8') as f:
+            f.write(' ' * 2_000_000)
+        self.config['storage_budget_mb'] = (self.manager.usage()['budgeted_bytes'] + 1000) / (1024 * 1024)
+        self.assertEqual(self.manager.compact(self.now)['tiers']['archive']['files'], 1)
+
+        self.config['storage_budget_mb'] = (os.path.getsize(recent) - 1000) / (1024 * 1024)
+        usage = self.manager.compact(self.now)
+        self.assertEqual(usage['tiers']['archive']['files'], 1)
+        self.assertTrue(os.path.exists(self.log_paths('20240601')[0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Unit tests for tile-diff incremental OCR"""
+
+import unittest
+
+import numpy as np
+
+from meadow.core.tile_ocr import IncrementalOCR, changed_bands, changed_tiles, reading_order
+
+class FakeOCR:
+    """Returns one observation per 20px text line that has any dark pixel"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.rows_read = 0
+
+    def region(self, top, bottom):
+        self.rows_read += bottom - top
+        observations = []
+        for y in range(top - top % 20, bottom, 20):
+            if y >= top and y + 20 <= bottom and self.frame[y:y + 20].min() == 0:
+                observations.append((5.0, float(y), 100.0, 20.0, f'line{y}v{int(self.frame[y, 0, 0])}'))
+        return observations
+
+    def full(self):
+        return self.region(0, self.frame.shape[0])
+
+def page(versions):
+    """A 640x200 frame with a text line every 20px; versions maps line index to a marker value"""
+    frame = np.full((640, 200, 3), 255, dtype=np.uint8)
+    for line in range(32):
+        frame[line * 20 + 5:line * 20 + 15, 10:150] = 0
+        frame[line * 20, 0] = versions.get(line, 1)
+    return frame
+
+class TestIncrementalOCR(unittest.TestCase):
+    """Test change masks, band selection and text reuse"""
+
+    def test_changed_tiles_and_bands(self):
+        """One changed pixel marks one tile and one band with margins"""
+        previous = page({})
+        current = previous.copy()
+        current[300, 120] = 7
+        mask = changed_tiles(previous, current)
+        self.assertEqual(mask.shape, (10, 4))
+        self.assertEqual(int(mask.sum()), 1)
+        self.assertEqual(changed_bands(mask, height=640), [((256, 320), (192, 384))])
+
+    def test_only_changed_band_is_ocred(self):
+        """Unchanged lines keep their text and the changed line is re-read"""
+        ocr = IncrementalOCR()
+        first = FakeOCR(page({}))
+        ocr.run('window', first.frame, first.full, first.region)
+
+        second = FakeOCR(page({15: 9}))
+        observations = ocr.run('window', second.frame, second.full, second.region)
+        texts = [obs[4] for obs in observations]
+        self.assertEqual(len(texts), 32)
+        self.assertIn('line300v9', texts)
+        self.assertNotIn('line300v1', texts)
+        self.assertEqual(texts, sorted(texts, key=lambda t: int(t[4:t.index('v')])))
+        self.assertLess(second.rows_read, 640 / 2)
+
+    def test_identical_frame_skips_ocr(self):
+        """An unchanged frame reuses everything"""
+        ocr = IncrementalOCR()
+        first = FakeOCR(page({}))
+        expected = ocr.run('window', first.frame, first.full, first.region)
+        second = FakeOCR(page({}))
+        self.assertEqual(ocr.run('window', second.frame, second.full, second.region), expected)
+        self.assertEqual(second.rows_read, 0)
+
+    def test_other_window_is_full_ocr(self):
+        """State is per window"""
+        ocr = IncrementalOCR()
+        first = FakeOCR(page({}))
+        ocr.run('a', first.frame, first.full, first.region)
+        second = FakeOCR(page({}))
+        ocr.run('b', second.frame, second.full, second.region)
+        self.assertEqual(second.rows_read, 640)
+        self.assertEqual(len(ocr.observations('a')), len(ocr.observations('b')))
+        self.assertIsNone(ocr.observations('c'))
+
+    def test_reading_order_groups_lines(self):
+        """Slightly offset boxes on one line are read left to right"""
+        observations = [(200, 12, 50, 10, 'right'), (10, 10, 50, 10, 'left'), (10, 40, 50, 10, 'next')]
+        self.assertEqual([o[4] for o in reading_order(observations)], ['left', 'right', 'next'])
+
+if __name__ == '__main__':
+    unittest.main()
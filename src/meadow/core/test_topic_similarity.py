@@ -3,6 +3,18 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import os
+import random
+import zlib
+
+import numpy as np
+
+def fake_embeddings(texts):
+    """Deterministic pseudo-embeddings so decisions can be compared without a model"""
+    vectors = []
+    for text in texts:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        vectors.append(rng.normal(size=8))
+    return vectors
 
 class TestTopicSimilarity(unittest.TestCase):
     """Test topic similarity detection with different backends"""
@@ -37,5 +49,42 @@ class TestTopicSimilarity(unittest.TestCase):
         # Should not match with high threshold
         self.assertFalse(check_topic_relevance(self.test_text, self.test_topics, threshold=0.9))
 
+class TestStreamingRelevance(unittest.TestCase):
+    """Test the early-exit streaming decision against the exhaustive path"""
+
+    def setUp(self):
+        words = ['city', 'council', 'budget', 'zoning', 'cake', 'flour', 'transit', 'vote', 'oven', 'park']
+        rng = random.Random(0)
+        self.texts = []
+        for _ in range(40):
+            sentences = [' '.join(rng.choice(words) for _ in range(12)) + '.' for _ in range(rng.randint(1, 30))]
+            self.texts.append(' '.join(sentences))
+        self.topics = ['civic government', 'urban planning']
+
+    @patch('meadow.core.topic_similarity.get_embeddings', side_effect=fake_embeddings)
+    def test_matches_exhaustive_decision(self, _):
+        """Streaming and exhaustive paths agree across thresholds and chunk counts"""
+        from meadow.core.topic_similarity import get_similarity_score, get_streaming_relevance
+        for text in self.texts:
+            for threshold in (0.1, 0.3, 0.5):
+                for min_chunks in (1, 3, 5):
+                    exhaustive = get_similarity_score(text, self.topics, threshold, min_chunks) >= threshold
+                    streaming = get_streaming_relevance(text, self.topics, threshold, min_chunks)
+                    self.assertEqual(streaming['relevant'], exhaustive)
+                    self.assertLessEqual(streaming['chunks_evaluated'], streaming['chunks_total'])
+
+    @patch('meadow.core.topic_similarity.get_embeddings', side_effect=fake_embeddings)
+    def test_stops_early(self, _):
+        """Easy decisions do not embed every chunk"""
+        from meadow.core.topic_similarity import get_streaming_relevance
+        text = max(self.texts, key=len)
+        accept = get_streaming_relevance(text, self.topics, chunk_threshold=-1.0, min_chunks=1, batch_size=2)
+        self.assertTrue(accept['relevant'])
+        self.assertEqual(accept['chunks_evaluated'], 2)
+
+        reject = get_streaming_relevance(text, self.topics, chunk_threshold=1.0, min_chunks=3, batch_size=2)
+        self.assertFalse(reject['relevant'])
+        self.assertLess(reject['chunks_evaluated'], reject['chunks_total'])
+
 if __name__ == '__main__':
     unittest.main()
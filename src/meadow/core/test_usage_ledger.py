@@ -0,0 +1,59 @@
+"""Unit tests for the Claude usage ledger"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from meadow.core import usage_ledger
+from meadow.core.usage_ledger import budget_exceeded, read_ledger, record_call, rollup, spent_today
+
+SONNET = 'claude-3-5-sonnet-20241022'
+
+def usage(input_tokens=0, output_tokens=0, cache_read=0, cache_write=0):
+    return SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                           cache_read_input_tokens=cache_read, cache_creation_input_tokens=cache_write)
+
+class TestUsageLedger(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'data', 'usage_ledger.jsonl')
+        usage_ledger._today.update(path=None, date=None, offset=0, total=0.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_cost_and_batch_discount(self):
+        """Costs follow the model's prices, with batches at half price"""
+        record = record_call('capture', 't1', SONNET, usage(1_000_000, 100_000, 1_000_000), ledger_path=self.path)
+        self.assertAlmostEqual(record['usd'], 3.00 + 1.50 + 0.30)
+        batched = record_call('capture', 't2', SONNET, usage(1_000_000), batch=True, ledger_path=self.path)
+        self.assertAlmostEqual(batched['usd'], 1.50)
+        self.assertEqual(len(read_ledger(self.path)), 2)
+
+    def test_rollup_by_tag(self):
+        """Rollups group by tag and put records without it under '(none)'"""
+        record_call('capture', 't1', SONNET, usage(1000, 100), ledger_path=self.path, app='Safari', domain='arxiv.org')
+        record_call('capture', 't2', SONNET, usage(3000, 100), ledger_path=self.path, app='Safari')
+        record_call('pdf', 'abc123', SONNET, usage(500, 50), image_bytes=2048, ledger_path=self.path)
+        totals = rollup(read_ledger(self.path), 'app')
+        self.assertEqual(list(totals), ['Safari', '(none)'])
+        self.assertEqual(totals['Safari']['calls'], 2)
+        self.assertEqual(totals['Safari']['input_tokens'], 4000)
+        self.assertEqual(totals['(none)']['image_bytes'], 2048)
+        self.assertEqual(rollup(read_ledger(self.path), 'domain')['arxiv.org']['calls'], 1)
+
+    def test_budget_tracks_new_records(self):
+        """Today's spend picks up records appended after the first check"""
+        config = {'daily_budget_usd': 5.0}
+        self.assertFalse(budget_exceeded(config, self.path))
+        record_call('capture', 't1', SONNET, usage(1_000_000), ledger_path=self.path)
+        self.assertAlmostEqual(spent_today(self.path), 3.0)
+        self.assertFalse(budget_exceeded(config, self.path))
+        record_call('capture', 't2', SONNET, usage(1_000_000), ledger_path=self.path)
+        self.assertTrue(budget_exceeded(config, self.path))
+        self.assertFalse(budget_exceeded({}, self.path))
+
+if __name__ == '__main__':
+    unittest.main()
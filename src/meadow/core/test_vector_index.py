@@ -0,0 +1,76 @@
+"""Unit tests for the memory-mapped capture vector index"""
+
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from meadow.core.vector_index import VectorIndex
+
+class TestVectorIndex(unittest.TestCase):
+    """Test appends, top-k search, persistence and the IVF path"""
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(500, 16)).astype(np.float32)
+        self.ids = [{'timestamp': f'row {i}', 'chunk': 0} for i in range(500)]
+
+    def tearDown(self):
+        shutil.rmtree(self.index_dir)
+
+    def test_brute_force_top_k(self):
+        """The exact vector is the best match"""
+        index = VectorIndex(self.index_dir)
+        index.add(self.vectors, self.ids)
+        results = index.search(self.vectors[42], k=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][1]['timestamp'], 'row 42')
+        self.assertAlmostEqual(results[0][0], 1.0, places=2)
+        self.assertGreaterEqual(results[0][0], results[1][0])
+
+    def test_persists_and_refreshes(self):
+        """A second instance sees rows on open and rows appended later"""
+        writer = VectorIndex(self.index_dir)
+        writer.add(self.vectors[:100], self.ids[:100])
+
+        reader = VectorIndex(self.index_dir)
+        self.assertEqual(len(reader), 100)
+
+        writer.add(self.vectors[100:], self.ids[100:])
+        reader.refresh()
+        self.assertEqual(len(reader), 500)
+        self.assertEqual(reader.search(self.vectors[300], k=1)[0][1]['timestamp'], 'row 300')
+
+    def test_ivf_search(self):
+        """Partitioned search still finds exact matches"""
+        index = VectorIndex(self.index_dir, ivf_min_vectors=200)
+        index.add(self.vectors, self.ids)
+        deadline = time.time() + 10
+        while index._training and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertIsNotNone(index._centroids)
+        self.assertEqual(index.search(self.vectors[7], k=1)[0][1]['timestamp'], 'row 7')
+
+    def test_failed_training_can_retry(self):
+        """An error while training does not block later training"""
+        index = VectorIndex(self.index_dir, ivf_min_vectors=200)
+        index.add(self.vectors[:100], self.ids[:100])
+        with patch('meadow.core.vector_index._normalize', side_effect=ValueError('bad sample')):
+            index._training = True
+            index._train_ivf()
+        self.assertFalse(index._training)
+        self.assertIsNone(index._centroids)
+
+    def test_dimension_mismatch(self):
+        """Vectors of another size are rejected"""
+        index = VectorIndex(self.index_dir)
+        index.add(self.vectors[:1], self.ids[:1])
+        with self.assertRaises(ValueError):
+            index.add(np.zeros((1, 8)), self.ids[:1])
+
+if __name__ == '__main__':
+    unittest.main()
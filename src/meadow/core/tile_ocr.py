@@ -0,0 +1,165 @@
+"""Incremental OCR that only re-reads the parts of a window that changed"""
+
+import threading
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+# Tunable Parameters
+# -----------------
+# Edge length of the square tiles compared between frames (pixels)
+TILE_SIZE = 64
+# Tile rows of unchanged context OCR'd above and below each changed band, so lines are not cut
+BAND_MARGIN_TILES = 1
+# Above this fraction of changed tiles the whole frame is OCR'd (e.g. after a big scroll)
+FULL_OCR_FRACTION = 0.6
+# Number of windows whose last frame and text are remembered
+MAX_TRACKED_WINDOWS = 8
+# Observations whose vertical centers are this close (pixels) are treated as one line
+LINE_TOLERANCE = 8
+
+# Counters describing how much OCR work was avoided
+ocr_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def changed_tiles(previous, current, tile=TILE_SIZE):
+    """Boolean (tile rows, tile cols) mask of tiles whose pixels differ"""
+    different = (previous != current)
+    if different.ndim == 3:
+        different = different.any(axis=2)
+    rows, cols = -(-different.shape[0] // tile), -(-different.shape[1] // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:different.shape[0], :different.shape[1]] = different
+    return padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+
+def changed_bands(mask, tile=TILE_SIZE, height=None, margin=BAND_MARGIN_TILES):
+    """Group changed tile rows into (core, region) pixel row ranges
+
+    ``core`` covers the changed rows and ``region`` adds ``margin`` tile rows
+    of context on each side; overlapping regions are merged.
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    height = height or mask.shape[0] * tile
+    bands = []
+    for row in rows:
+        if bands and row <= bands[-1][1] + 2 * margin:
+            bands[-1][1] = row
+        else:
+            bands.append([row, row])
+    result = []
+    for first, last in bands:
+        core = (first * tile, min(height, (last + 1) * tile))
+        region = (max(0, (first - margin) * tile), min(height, (last + 1 + margin) * tile))
+        result.append((core, region))
+    return result
+
+
+def reading_order(observations):
+    """Sort (x, y, w, h, text) observations top to bottom, then left to right within a line"""
+    ordered = sorted(observations, key=lambda o: (o[1] + o[3] / 2, o[0]))
+    lines = []
+    for obs in ordered:
+        center = obs[1] + obs[3] / 2
+        if lines and center - lines[-1][0] <= LINE_TOLERANCE:
+            lines[-1][1].append(obs)
+        else:
+            lines.append((center, [obs]))
+    return [obs for _, line in lines for obs in sorted(line, key=lambda o: o[0])]
+
+
+def _center_in(obs, ranges):
+    center = obs[1] + obs[3] / 2
+    return any(start <= center < end for start, end in ranges)
+
+
+class IncrementalOCR:
+    """Reuses OCR observations from the previous frame of the same window
+
+    Frames are compared tile by tile. Only horizontal bands containing changed
+    tiles (plus a margin) are sent to OCR; observations centered in unchanged
+    rows are carried over with their positions, and everything is re-sorted
+    into reading order.
+    """
+
+    def __init__(self, tile=TILE_SIZE, max_windows=MAX_TRACKED_WINDOWS):
+        self.tile = tile
+        self.max_windows = max_windows
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def forget(self, window_key):
+        """Drop remembered state, e.g. after OCR failed for this window"""
+        with self._lock:
+            self._windows.pop(window_key, None)
+
+    def observations(self, window_key):
+        """Observations from the window's last frame, or None if it is not tracked"""
+        with self._lock:
+            state = self._windows.get(window_key)
+            return list(state['observations']) if state else None
+
+    def run(self, window_key, frame, ocr_full, ocr_region):
+        """Return observations for frame in reading order
+
+        Args:
+            window_key: Identifies the window the frame belongs to
+            frame: HxW(xC) pixel array
+            ocr_full: Function returning (x, y, w, h, text) observations for the whole frame
+            ocr_region: Function (top, bottom) returning observations for those pixel rows,
+                in whole-frame coordinates
+        """
+        with self._lock:
+            state = self._windows.get(window_key)
+            if state is not None:
+                self._windows.move_to_end(window_key)
+
+        if state is None or state['frame'].shape != frame.shape:
+            observations = ocr_full()
+            self._record(full=1, frames=1)
+        else:
+            mask = changed_tiles(state['frame'], frame, self.tile)
+            self._record(frames=1, tiles_changed=int(mask.sum()), tiles_total=mask.size)
+            if not mask.any():
+                observations = state['observations']
+                self._record(unchanged=1, observations_reused=len(observations),
+                             observations_total=len(observations))
+            elif mask.mean() > FULL_OCR_FRACTION:
+                observations = ocr_full()
+                self._record(full=1)
+            else:
+                bands = changed_bands(mask, self.tile, frame.shape[0])
+                cores = [core for core, _ in bands]
+                kept = [obs for obs in state['observations'] if not _center_in(obs, cores)]
+                fresh = []
+                for _, (top, bottom) in bands:
+                    fresh.extend(obs for obs in ocr_region(top, bottom) if _center_in(obs, cores))
+                observations = kept + fresh
+                self._record(partial=1, rows_ocred=sum(b - t for _, (t, b) in bands),
+                             rows_total=frame.shape[0], observations_reused=len(kept),
+                             observations_total=len(observations))
+
+        observations = reading_order(observations)
+        with self._lock:
+            self._windows[window_key] = {'frame': frame, 'observations': observations}
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+        return observations
+
+    def _record(self, **counts):
+        with _stats_lock:
+            ocr_stats.update(counts)
+
+
+def get_ocr_stats():
+    """Frame diff and reuse rates since startup"""
+    with _stats_lock:
+        stats = dict(ocr_stats)
+    frames = stats.get('frames', 0)
+    return {
+        **stats,
+        'tile_change_rate': stats.get('tiles_changed', 0) / max(1, stats.get('tiles_total', 0)),
+        'observation_reuse_rate': stats.get('observations_reused', 0) / max(1, stats.get('observations_total', 0)),
+        'ocr_skip_rate': (frames - stats.get('full', 0)) / max(1, frames),
+    }
@@ -1,14 +1,16 @@
 """Topic similarity detection using embeddings"""
 
 import os
-# Set tokenizers parallelism before importing any HuggingFace modules
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
-
-import asyncio
+import atexit
 import re
+import threading
 from collections import defaultdict
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from meadow.core.embedding_cache import EmbeddingCache
+from meadow.core.embedding_service import EmbeddingService
+from meadow.core.event_bus import get_event_bus
+from meadow.core.lexical_filter import keywords_for_topics, lexical_decision, matching_chunks
 
 # Tunable Parameters
 # -----------------
@@ -18,11 +20,60 @@ CHUNK_MAX_LENGTH = 200
 CHUNK_SIMILARITY_THRESHOLD = 0.2
 # Minimum number of relevant chunks needed for a topic to be considered matched
 MIN_CHUNKS_PER_TOPIC = 3
+# Stop embedding chunks as soon as the relevance decision is known
+STREAMING_RELEVANCE = True
+# Number of chunks embedded per step in streaming mode
+STREAM_BATCH_SIZE = 4
+# Run the BM25 keyword stage first and only embed ambiguous text
+CASCADE_RELEVANCE = True
+
+# Texts per embed request sent to the analysis worker, and seconds to wait for each
+REMOTE_EMBEDDING_BATCH = 64
+REMOTE_EMBEDDING_TIMEOUT = 60
+
+# Sentence-transformers model used for all embeddings
+MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_CACHE_DIR = os.path.expanduser('~/Library/Application Support/Meadow/cache/embeddings')
+
+# Initialize service and cache as None for lazy loading
+embedding_service = None
+embedding_cache = None
+_singleton_lock = threading.Lock()
+# Whether this process embeds through the analysis worker instead of loading the model
+_remote_embeddings = False
+
+def use_remote_embeddings():
+    """Embed through the analysis worker instead of loading the model in this process
+
+    The worker is the only process that opens the embedding cache, so the
+    menubar and web viewer call this at startup rather than becoming a
+    second writer of the same cache files.
+    """
+    global _remote_embeddings
+    _remote_embeddings = True
+
+def serve_embeddings():
+    """Answer 'embed' requests from other processes (runs in the analysis worker)"""
+    get_event_bus().handle('embed', lambda data: [np.asarray(embedding, dtype=np.float32).tolist()
+                                                  for embedding in get_embeddings(data['texts'])])
+
+def get_embedding_service():
+    """Get the embedding worker that owns the model, starting it if needed"""
+    global embedding_service
+    with _singleton_lock:
+        if embedding_service is None:
+            embedding_service = EmbeddingService(MODEL_NAME)
+    embedding_service.start()
+    return embedding_service
 
-# Initialize model and cache as None for lazy loading
-model = None
-model_init_lock = asyncio.Lock()
-topic_embedding_cache = {}
+def get_embedding_cache():
+    """Get or create the persistent embedding cache for the current model"""
+    global embedding_cache
+    with _singleton_lock:
+        if embedding_cache is None:
+            embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, MODEL_NAME)
+            atexit.register(embedding_cache.flush)
+    return embedding_cache
 
 def split_into_chunks(text, max_length=CHUNK_MAX_LENGTH):
     """Split text into chunks, preserving sentence boundaries"""
@@ -67,34 +118,55 @@ def split_into_chunks(text, max_length=CHUNK_MAX_LENGTH):
 
     return chunks
 
-async def initialize_model():
-    """Explicitly initialize the model"""
-    global model
-    async with model_init_lock:
-        if model is None:
-            print("[DEBUG] Initializing sentence-transformers model")
-            # Run model initialization in a thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            model = await loop.run_in_executor(None, lambda: SentenceTransformer('all-MiniLM-L6-v2'))
-    return model
-
-async def get_embedding(text):
+def initialize_model():
+    """Explicitly initialize the model, blocking until it is loaded"""
+    service = get_embedding_service()
+    service.wait_until_ready()
+    return service
+
+def _get_remote_embeddings(texts):
+    """Ask the analysis worker for embeddings; raises TimeoutError if it does not answer"""
+    bus = get_event_bus()
+    embeddings = []
+    for start in range(0, len(texts), REMOTE_EMBEDDING_BATCH):
+        batch = texts[start:start + REMOTE_EMBEDDING_BATCH]
+        vectors = bus.request('embed', {'texts': batch}, timeout=REMOTE_EMBEDDING_TIMEOUT)
+        embeddings.extend(np.asarray(vector, dtype=np.float32) for vector in vectors)
+    return embeddings
+
+def get_embeddings(texts):
+    """Get embeddings for several texts, only running the model on cache misses"""
+    if _remote_embeddings:
+        return _get_remote_embeddings(list(texts))
+    cache = get_embedding_cache()
+    embeddings = cache.get_many(texts)
+    missing = [text for text, embedding in zip(texts, embeddings) if embedding is None]
+
+    if missing:
+        # Encoding happens on the shared worker, batched with other threads' requests
+        encoded = get_embedding_service().encode(missing)
+        cache.put_many(missing, encoded)
+        fresh = dict(zip(missing, encoded))
+        embeddings = [fresh[text] if embedding is None else embedding
+                      for text, embedding in zip(texts, embeddings)]
+
+    stats = cache.stats()
+    print(f"[DEBUG] Embedding cache: {len(texts) - len(missing)}/{len(texts)} hits "
+          f"(overall hit rate {stats['hit_rate']:.1%}, {stats['entries']} entries)")
+    return embeddings
+
+def get_embedding(text):
     """Get embedding using sentence-transformers"""
-    global model
-    if model is None:
-        await initialize_model()
-    # Run encoding in a thread to avoid blocking
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, lambda: model.encode(text, convert_to_numpy=True))
-
-async def calculate_similarity(text_embedding, topic_embedding):
+    return get_embeddings([text])[0]
+
+def calculate_similarity(text_embedding, topic_embedding):
     """Calculate cosine similarity between two embeddings"""
     similarity = np.dot(text_embedding, topic_embedding) / (
         np.linalg.norm(text_embedding) * np.linalg.norm(topic_embedding)
     )
     return float(similarity)  # Convert to float for better debug printing
 
-async def get_similarity_score(text, topics, chunk_threshold=CHUNK_SIMILARITY_THRESHOLD, min_chunks=MIN_CHUNKS_PER_TOPIC):
+def get_similarity_score(text, topics, chunk_threshold=CHUNK_SIMILARITY_THRESHOLD, min_chunks=MIN_CHUNKS_PER_TOPIC):
     """Calculate similarity score between text and topics"""
     if not text or not topics:
         return 0.0
@@ -106,18 +178,9 @@ async def get_similarity_score(text, topics, chunk_threshold=CHUNK_SIMILARITY_TH
     for i, chunk in enumerate(chunks):
         print(f"Chunk {i+1}: {chunk[:100]}...")
 
-    # Get embeddings for all chunks
-    chunk_embeddings = []
-    for chunk in chunks:
-        chunk_embedding = await get_embedding(chunk)
-        chunk_embeddings.append((chunk, chunk_embedding))
-
-    # Get topic embeddings, using cache when available
-    topic_embeddings = []
-    for topic in topics:
-        if topic not in topic_embedding_cache:
-            topic_embedding_cache[topic] = await get_embedding(topic)
-        topic_embeddings.append((topic, topic_embedding_cache[topic]))
+    # Get embeddings for all chunks and topics, using the cache when available
+    chunk_embeddings = list(zip(chunks, get_embeddings(chunks)))
+    topic_embeddings = list(zip(topics, get_embeddings(list(topics))))
 
     # Track chunks that exceed threshold for each topic
     relevant_chunks_by_topic = defaultdict(list)
@@ -126,7 +189,7 @@ async def get_similarity_score(text, topics, chunk_threshold=CHUNK_SIMILARITY_TH
     # Calculate similarities and group by topic
     for chunk, chunk_embedding in chunk_embeddings:
         for topic, topic_embedding in topic_embeddings:
-            similarity = await calculate_similarity(chunk_embedding, topic_embedding)
+            similarity = calculate_similarity(chunk_embedding, topic_embedding)
             print(f"[DEBUG] Similarity between chunk '{chunk[:50]}...' and topic '{topic}': {similarity:.3f}")
 
             if similarity > chunk_threshold:
@@ -162,8 +225,101 @@ async def get_similarity_score(text, topics, chunk_threshold=CHUNK_SIMILARITY_TH
         print("\n[DEBUG] No topics had enough relevant chunks")
         return 0.0
 
-async def check_topic_relevance(text, topics, threshold=CHUNK_SIMILARITY_THRESHOLD, min_chunks=MIN_CHUNKS_PER_TOPIC):
-    """Check if text is relevant to any topic"""
-    score = await get_similarity_score(text, topics, threshold, min_chunks)
+def tokenize(text):
+    """Lowercase word tokens used for cheap lexical scoring"""
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+def lexical_priority(chunk, topic_terms):
+    """Count chunk words that also appear in a topic; used to order chunks"""
+    return sum(1 for word in tokenize(chunk) if word in topic_terms)
+
+def get_streaming_relevance(text, topics, chunk_threshold=CHUNK_SIMILARITY_THRESHOLD,
+                            min_chunks=MIN_CHUNKS_PER_TOPIC, batch_size=STREAM_BATCH_SIZE):
+    """Decide relevance while embedding as few chunks as possible
+
+    Chunks are embedded in small batches, most lexically promising first. The
+    loop stops once a topic has ``min_chunks`` chunks above the threshold, or
+    once no topic can reach that count with the chunks left. The decision is
+    identical to ``get_similarity_score(...) >= chunk_threshold`` for any
+    positive threshold.
+
+    Returns:
+        dict with 'relevant', 'score' (best similarity seen if relevant, else
+        0.0), 'chunks_evaluated', 'chunks_total' and 'relevant_chunks' by topic
+    """
+    result = {'relevant': False, 'score': 0.0, 'chunks_evaluated': 0,
+              'chunks_total': 0, 'relevant_chunks': {}}
+    if not text or not topics:
+        return result
+
+    chunks = split_into_chunks(text)
+    result['chunks_total'] = len(chunks)
+    # A topic needs at least one relevant chunk even when min_chunks is 0
+    required = max(min_chunks, 1)
+    if len(chunks) < required:
+        print(f"[DEBUG] Only {len(chunks)} chunks, no topic can reach {required}")
+        return result
+
+    topic_terms = {word for topic in topics for word in tokenize(topic)}
+    order = sorted(range(len(chunks)), key=lambda i: lexical_priority(chunks[i], topic_terms), reverse=True)
+    topic_embeddings = list(zip(topics, get_embeddings(list(topics))))
+
+    relevant_chunks_by_topic = defaultdict(list)
+    max_similarity = 0.0
+    evaluated = 0
+    for start in range(0, len(order), batch_size):
+        batch = [chunks[i] for i in order[start:start + batch_size]]
+        for chunk, chunk_embedding in zip(batch, get_embeddings(batch)):
+            for topic, topic_embedding in topic_embeddings:
+                similarity = calculate_similarity(chunk_embedding, topic_embedding)
+                if similarity > chunk_threshold:
+                    relevant_chunks_by_topic[topic].append({'chunk': chunk, 'similarity': similarity})
+                    max_similarity = max(max_similarity, similarity)
+        evaluated += len(batch)
+
+        counts = [len(relevant_chunks_by_topic[topic]) for topic in topics]
+        remaining = len(chunks) - evaluated
+        if max(counts) >= required:
+            result['relevant'] = True
+            result['score'] = max_similarity
+            break
+        if all(count + remaining < required for count in counts):
+            break
+
+    result['chunks_evaluated'] = evaluated
+    result['relevant_chunks'] = dict(relevant_chunks_by_topic)
+    print(f"[DEBUG] Streaming relevance: evaluated {evaluated}/{len(chunks)} chunks, "
+          f"relevant={result['relevant']}")
+    return result
+
+def check_topic_relevance(text, topics, threshold=CHUNK_SIMILARITY_THRESHOLD, min_chunks=MIN_CHUNKS_PER_TOPIC,
+                          streaming=STREAMING_RELEVANCE, cascade=CASCADE_RELEVANCE, topic_keywords=None,
+                          return_chunks=False):
+    """Check if text is relevant to any topic
+
+    Args:
+        topic_keywords: Expanded keywords per topic, as saved in the config.
+            Topics without stored keywords are expanded on the fly.
+        return_chunks: Return (relevant, chunks) where chunks are the text chunks
+            that matched a topic (empty when the stage that decided does not know)
+    """
+    relevant, chunks = _check_topic_relevance(text, topics, threshold, min_chunks, streaming, cascade, topic_keywords)
+    return (relevant, chunks) if return_chunks else relevant
+
+def _check_topic_relevance(text, topics, threshold, min_chunks, streaming, cascade, topic_keywords):
+    if cascade and text and topics:
+        keywords = keywords_for_topics(topics, topic_keywords)
+        chunks = split_into_chunks(text)
+        decision = lexical_decision(chunks, keywords, min_chunks)
+        if decision is not None:
+            accepted = decision == 'accept'
+            return accepted, matching_chunks(chunks, keywords, min_chunks) if accepted else []
+
+    if streaming:
+        result = get_streaming_relevance(text, topics, threshold, min_chunks)
+        matched = [match['chunk'] for matches in result['relevant_chunks'].values() for match in matches]
+        return result['relevant'], list(dict.fromkeys(matched)) if result['relevant'] else []
+
+    score = get_similarity_score(text, topics, threshold, min_chunks)
     print(f"[DEBUG] Final relevance score: {score:.3f} (threshold: {threshold}, required chunks per topic: {min_chunks})")
-    return score >= threshold
+    return score >= threshold, []
@@ -0,0 +1,144 @@
+"""Ledger of every Claude call's tokens, cost and latency, with rollups and a daily budget"""
+
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlparse
+
+APP_DIR = os.path.expanduser('~/Library/Application Support/Meadow')
+LEDGER_PATH = os.path.join(APP_DIR, 'data', 'usage_ledger.jsonl')
+
+# USD per million tokens: input, output, cache write, cache read
+MODEL_PRICES = {
+    'claude-3-5-sonnet-20241022': (3.00, 15.00, 3.75, 0.30),
+    'claude-3-5-haiku-20241022': (0.80, 4.00, 1.00, 0.08),
+}
+DEFAULT_PRICES = MODEL_PRICES['claude-3-5-sonnet-20241022']
+# Message Batches are billed at half price
+BATCH_DISCOUNT = 0.5
+
+_ledger_lock = threading.Lock()
+
+
+def call_cost(record):
+    """USD cost of one ledger record"""
+    prices = MODEL_PRICES.get(record.get('model'), DEFAULT_PRICES)
+    tokens = (record.get('in', 0), record.get('out', 0), record.get('cw', 0), record.get('cr', 0))
+    cost = sum(count * price for count, price in zip(tokens, prices)) / 1e6
+    return cost * BATCH_DISCOUNT if record.get('batch') else cost
+
+
+def record_call(kind, ref, model, usage, latency=None, image_bytes=0, batch=False, ledger_path=LEDGER_PATH, **tags):
+    """Append one LLM call to the ledger
+
+    Args:
+        kind: 'capture' or 'pdf'
+        ref: Log entry timestamp for captures, PDF hash for PDFs
+        usage: The response's usage object (may be None)
+        tags: Extra fields for rollups, e.g. app, domain, topic, mode, page
+    """
+    record = {
+        'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'kind': kind,
+        'ref': ref,
+        'model': model,
+        'in': getattr(usage, 'input_tokens', 0) or 0,
+        'out': getattr(usage, 'output_tokens', 0) or 0,
+        'cw': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+        'cr': getattr(usage, 'cache_read_input_tokens', 0) or 0,
+        'img': image_bytes,
+        'lat': round(latency, 3) if latency is not None else None,
+        'batch': batch,
+    }
+    record.update({key: value for key, value in tags.items() if value is not None})
+    record['usd'] = round(call_cost(record), 6)
+    line = json.dumps(record, separators=(',', ':'))
+    with _ledger_lock:
+        os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+        with open(ledger_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    return record
+
+
+def read_ledger(ledger_path=LEDGER_PATH, since=None):
+    """Ledger records, optionally only those on or after the 'YYYY-MM-DD' date since"""
+    records = []
+    try:
+        with open(ledger_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+                if since is None or record['ts'][:10] >= since:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def domain_of(url):
+    """Host of a URL without 'www.', or None"""
+    if not url:
+        return None
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host or None
+
+
+def rollup(records, by):
+    """Totals per 'day', 'app', 'domain', 'topic', 'kind' or 'model', most expensive first"""
+    totals = defaultdict(lambda: {'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'cache_read_tokens': 0,
+                                  'cache_write_tokens': 0, 'image_bytes': 0, 'cost': 0.0})
+    for record in records:
+        key = record['ts'][:10] if by == 'day' else record.get(by) or '(none)'
+        total = totals[key]
+        total['calls'] += 1
+        total['input_tokens'] += record.get('in', 0)
+        total['output_tokens'] += record.get('out', 0)
+        total['cache_read_tokens'] += record.get('cr', 0)
+        total['cache_write_tokens'] += record.get('cw', 0)
+        total['image_bytes'] += record.get('img', 0)
+        total['cost'] += record.get('usd', call_cost(record))
+    if by == 'day':
+        return dict(sorted(totals.items(), reverse=True))
+    return dict(sorted(totals.items(), key=lambda item: item[1]['cost'], reverse=True))
+
+
+# Running total for today, advanced by reading only the lines appended since the last check
+_today = {'path': None, 'date': None, 'offset': 0, 'total': 0.0}
+
+
+def spent_today(ledger_path=LEDGER_PATH):
+    """USD spent since midnight"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    with _ledger_lock:
+        try:
+            size = os.path.getsize(ledger_path)
+        except OSError:
+            size = 0
+        if _today['path'] != ledger_path or _today['date'] != today or size < _today['offset']:
+            _today.update(path=ledger_path, date=today, offset=0, total=0.0)
+        if size > _today['offset']:
+            with open(ledger_path, 'rb') as f:
+                f.seek(_today['offset'])
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # Still being written
+                    _today['offset'] += len(line)
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get('ts', '')[:10] == today:
+                        _today['total'] += record.get('usd', 0.0)
+        return _today['total']
+
+
+def budget_exceeded(config, ledger_path=LEDGER_PATH):
+    """Whether today's spend has reached config 'daily_budget_usd' (no budget if unset)"""
+    budget = config.get('daily_budget_usd')
+    if not budget:
+        return False
+    return spent_today(ledger_path) >= float(budget)
@@ -0,0 +1,273 @@
+"""Append-only vector index over the chunk embeddings of relevant captures"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# Tunable Parameters
+# -----------------
+# Corpus size at which searches switch from brute force to the partitioned (IVF) index
+IVF_MIN_VECTORS = 50000
+# Number of IVF partitions is about sqrt(corpus size), capped here
+IVF_MAX_PARTITIONS = 1024
+# Number of partitions scanned per query
+IVF_PROBES = 16
+# Retrain partitions once the corpus has grown by this factor since the last training
+IVF_RETRAIN_GROWTH = 4
+# Rows added between saves of the IVF assignments
+IVF_SAVE_INTERVAL = 10000
+# Rows scored per block during brute-force search, to bound temporary memory
+SEARCH_BLOCK_ROWS = 32768
+# K-means iterations and sample size when training partitions
+IVF_TRAIN_ITERATIONS = 10
+IVF_TRAIN_SAMPLE = 100000
+
+VECTORS_FILENAME = 'vectors.f16'
+IDS_FILENAME = 'ids.jsonl'
+IVF_FILENAME = 'ivf.npz'
+META_FILENAME = 'meta.json'
+
+
+def _normalize(matrix):
+    """L2-normalize rows so dot products are cosine similarities"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class VectorIndex:
+    """Memory-mapped float16 matrix of normalized vectors with a JSON-lines id sidecar.
+
+    Row ``i`` of ``vectors.f16`` belongs to line ``i`` of ``ids.jsonl``. Vectors
+    are only ever appended, so another process can pick up new rows with
+    ``refresh``. Once the corpus reaches ``ivf_min_vectors`` an IVF index
+    (k-means centroids plus a partition label per row) is trained in the
+    background and extended as rows are added. Only one process should write.
+    """
+
+    def __init__(self, index_dir, ivf_min_vectors=IVF_MIN_VECTORS):
+        self.index_dir = index_dir
+        self.ivf_min_vectors = ivf_min_vectors
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._dim = None
+        self._vectors = None
+        self._ids = []
+        self._ids_bytes = 0
+        self._centroids = None
+        self._assignments = None
+        self._ivf_trained_rows = 0
+        self._ivf_saved_rows = 0
+        self._training = False
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _load(self):
+        """Load metadata, ids and the memmap from disk"""
+        try:
+            with open(self._path(META_FILENAME), 'r', encoding='utf-8') as f:
+                self._dim = json.load(f)['dim']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return
+
+        self._ids = []
+        self._ids_bytes = 0
+        self._read_new_ids()
+
+        try:
+            ivf = np.load(self._path(IVF_FILENAME))
+            if 0 < int(ivf['rows']) <= len(self._ids):
+                self._centroids = ivf['centroids']
+                self._ivf_trained_rows = int(ivf['trained_rows'])
+                self._ivf_saved_rows = int(ivf['rows'])
+                self._assignments = np.concatenate([ivf['assignments'],
+                                                    self._assign(self._vectors[self._ivf_saved_rows:])])
+        except (FileNotFoundError, KeyError, ValueError):
+            self._centroids = None
+            self._assignments = None
+
+    def _read_new_ids(self):
+        """Read id lines appended since the last read and map the matching vector rows
+
+        Returns the vectors of the new rows.
+        """
+        try:
+            with open(self._path(IDS_FILENAME), 'rb') as f:
+                f.seek(self._ids_bytes)
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+        # Only consume complete lines; a writer may be mid-append
+        data = data[:data.rfind(b'\n') + 1]
+        lines = data.splitlines()
+        new_ids = [json.loads(line) for line in lines]
+
+        # Never expose an id whose vector row is not fully written yet
+        rows = os.path.getsize(self._path(VECTORS_FILENAME)) // (2 * self._dim) \
+            if os.path.exists(self._path(VECTORS_FILENAME)) else 0
+        usable = max(0, min(len(new_ids), rows - len(self._ids)))
+        if usable < len(new_ids):
+            data = b''.join(line + b'\n' for line in lines[:usable])
+            new_ids = new_ids[:usable]
+
+        start = len(self._ids)
+        self._ids.extend(new_ids)
+        self._ids_bytes += len(data)
+        self._map_vectors(len(self._ids))
+        return self._vectors[start:] if self._vectors is not None else np.zeros((0, self._dim))
+
+    def refresh(self):
+        """Pick up rows appended by another process"""
+        with self._lock:
+            if self._dim is None or (self._centroids is None and os.path.exists(self._path(IVF_FILENAME))):
+                # First rows, or the writer has trained partitions since we loaded
+                self._load()
+                return
+            try:
+                if os.path.getsize(self._path(IDS_FILENAME)) == self._ids_bytes:
+                    return
+            except FileNotFoundError:
+                return
+            new_vectors = self._read_new_ids()
+            if self._centroids is not None and len(new_vectors):
+                self._assignments = np.concatenate([self._assignments, self._assign(new_vectors)])
+
+    def _map_vectors(self, count):
+        """(Re)map the first count rows of the vectors file"""
+        self._vectors = np.memmap(self._path(VECTORS_FILENAME), dtype=np.float16, mode='r',
+                                  shape=(count, self._dim)) if count else None
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, vectors, ids):
+        """Append vectors and their id records (any JSON-serializable dicts)"""
+        vectors = _normalize(vectors)
+        if len(vectors) != len(ids):
+            raise ValueError("vectors and ids must have the same length")
+        if not len(ids):
+            return
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                with open(self._path(META_FILENAME), 'w', encoding='utf-8') as f:
+                    json.dump({'dim': self._dim}, f)
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Expected {self._dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            # Truncate to the last consistent row before appending, then write vectors before ids
+            with open(self._path(VECTORS_FILENAME), 'ab') as f:
+                f.truncate(len(self._ids) * 2 * self._dim)
+                f.write(vectors.astype(np.float16).tobytes())
+            lines = ''.join(json.dumps(record) + '\n' for record in ids).encode('utf-8')
+            with open(self._path(IDS_FILENAME), 'ab') as f:
+                f.truncate(self._ids_bytes)
+                f.write(lines)
+
+            self._ids.extend(ids)
+            self._ids_bytes += len(lines)
+            self._map_vectors(len(self._ids))
+
+            count = len(self._ids)
+            if self._centroids is not None:
+                self._assignments = np.concatenate([self._assignments, self._assign(vectors)])
+                if count - self._ivf_saved_rows >= IVF_SAVE_INTERVAL:
+                    self.save_ivf()
+            if not self._training and count >= self.ivf_min_vectors and (
+                    self._centroids is None or count >= IVF_RETRAIN_GROWTH * self._ivf_trained_rows):
+                self._training = True
+                threading.Thread(target=self._train_ivf, daemon=True).start()
+
+    def _assign(self, vectors, centroids=None):
+        """Return the nearest centroid for each vector"""
+        centroids = self._centroids if centroids is None else centroids
+        if len(vectors) == 0:
+            return np.zeros(0, dtype=np.int32)
+        assignments = []
+        for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            assignments.append(np.argmax(block @ centroids.T, axis=1).astype(np.int32))
+        return np.concatenate(assignments)
+
+    def _train_ivf(self):
+        """Train spherical k-means partitions over a sample of the corpus
+
+        Runs on a background thread; searches stay brute force (or use the
+        previous partitions) until training finishes.
+        """
+        try:
+            with self._lock:
+                vectors = self._vectors
+                count = len(self._ids)
+            partitions = min(IVF_MAX_PARTITIONS, max(1, int(np.sqrt(count))))
+            print(f"[DEBUG] Training IVF index with {partitions} partitions over {count} vectors")
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(rng.choice(count, size=min(count, IVF_TRAIN_SAMPLE), replace=False))
+            sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+            centroids = sample[rng.choice(len(sample), size=partitions, replace=False)]
+            for _ in range(IVF_TRAIN_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                order = np.argsort(labels, kind='stable')
+                present, starts = np.unique(labels[order], return_index=True)
+                sums = centroids.copy()  # Empty partitions keep their old centroid
+                sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+                centroids = _normalize(sums)
+
+            assignments = self._assign(vectors, centroids)
+            with self._lock:
+                # Rows appended while training still need a partition
+                self._assignments = np.concatenate([assignments, self._assign(self._vectors[count:], centroids)])
+                self._centroids = centroids
+                self._ivf_trained_rows = count
+                self.save_ivf()
+            print(f"[DEBUG] IVF index ready ({partitions} partitions)")
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[ERROR] IVF training failed: {e}")
+        finally:
+            # A failed run is retried on a later add
+            with self._lock:
+                self._training = False
+
+    def save_ivf(self):
+        """Persist the IVF centroids and assignments"""
+        if self._centroids is None:
+            return
+        tmp_path = self._path(IVF_FILENAME + '.tmp.npz')
+        np.savez(tmp_path, centroids=self._centroids, assignments=self._assignments,
+                 rows=len(self._assignments), trained_rows=self._ivf_trained_rows)
+        os.replace(tmp_path, self._path(IVF_FILENAME))
+        self._ivf_saved_rows = len(self._assignments)
+
+    def search(self, query, k=10, probes=IVF_PROBES):
+        """Return up to k (score, id record) pairs, most similar first"""
+        with self._lock:
+            vectors = self._vectors
+            ids = self._ids
+            centroids = self._centroids
+            assignments = self._assignments
+        if vectors is None or not len(ids):
+            return []
+
+        query = _normalize(np.asarray(query).reshape(1, -1))[0]
+        if centroids is not None and len(assignments) == len(ids):
+            nearest = np.argsort(centroids @ query)[::-1][:probes]
+            rows = np.flatnonzero(np.isin(assignments, nearest))
+            scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+        else:
+            rows = None
+            scores = np.concatenate([
+                np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32) @ query
+                for start in range(0, len(ids), SEARCH_BLOCK_ROWS)
+            ])
+
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), ids[rows[i] if rows is not None else i]) for i in top]
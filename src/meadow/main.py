@@ -1,19 +1,30 @@
 import multiprocessing
-from meadow.ui.menubar_app import MenubarApp
-from meadow.web.web_viewer import start_viewer
 
 def main():
     print("\n[DEBUG] Starting Meadow...")
+    # Imported here, not at module level: the spawned viewer process re-imports
+    # this module and must not pay for rumps, Quartz and the analysis pipeline
+    from meadow.ui.menubar_app import MenubarApp  # pylint: disable=import-outside-toplevel
+    from meadow.web.web_viewer import start_viewer  # pylint: disable=import-outside-toplevel
+    from meadow.core.analysis_worker import AnalysisWorker  # pylint: disable=import-outside-toplevel
+    from meadow.core.event_bus import EventBroker  # pylint: disable=import-outside-toplevel
+    # Event bus between the menubar, web viewer and analysis worker; clients reconnect if it restarts
+    broker = EventBroker().start()
     # Start web viewer in a separate process
     viewer_process = multiprocessing.Process(target=start_viewer)
     viewer_process.start()
+    # Start the analysis pipeline in its own supervised process
+    analysis_worker = AnalysisWorker().start()
 
     try:
         # Start the menubar app
-        MenubarApp().run()
+        MenubarApp(analysis_worker).run()
     except Exception as e:
         print(f"[ERROR] Menubar app crashed: {e}")
     finally:
+        # Let captures in flight finish writing their logs
+        print("[DEBUG] Stopping analysis worker...")
+        analysis_worker.stop()
         # Always clean up the web viewer process
         print("[DEBUG] Cleaning up web viewer...")
         viewer_process.terminate()
@@ -21,6 +32,7 @@ def main():
         if viewer_process.is_alive():
             viewer_process.kill()  # Force kill if still running
             viewer_process.join()
+        broker.stop()
 
 if __name__ == "__main__":
     main()
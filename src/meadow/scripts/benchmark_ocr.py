@@ -0,0 +1,202 @@
+"""Benchmark OCR engines on a versioned corpus of synthetic screens
+
+The corpus is rendered deterministically from CORPUS_VERSION and its seed, so
+results from different machines and runs are comparable as long as the
+version (and the printed corpus hash) match. Each engine runs in its own
+process so memory and warm-up are measured in isolation.
+
+Reported per engine: load time, first-read latency, latency percentiles over
+the remaining reads, character and word error rates, and peak RSS.
+
+Usage: python benchmark_ocr.py [--engines vision easyocr tesseract] [--screens N]
+                               [--max-cer 0.05] [--json results.json]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+import psutil
+from PIL import Image, ImageDraw, ImageFont
+
+from meadow.core.ocr_engines import ENGINES, get_engine
+from meadow.core.tile_ocr import reading_order
+
+# Bump when the corpus generator changes, so old and new numbers are never compared
+CORPUS_VERSION = 1
+CORPUS_SEED = 20241101
+CORPUS_DIR = os.path.expanduser('~/Library/Application Support/Meadow/cache/ocr_corpus')
+
+VOCABULARY = (
+    "budget council zoning housing transit ordinance meeting agenda public works fiscal year revenue "
+    "expenditure capital improvement plan city county district permit hearing resident comment staff "
+    "report motion approved denied amendment section page total percent million review committee "
+    "infrastructure street parking library park water sewer climate policy grant federal state local"
+).split()
+THEMES = [((255, 255, 255), (20, 20, 20)), ((30, 30, 36), (230, 230, 230)), ((246, 241, 230), (60, 40, 20))]
+FONT_CANDIDATES = ['DejaVuSans.ttf', 'Arial.ttf', '/System/Library/Fonts/Helvetica.ttc',
+                   '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf']
+
+
+def _font(size):
+    for candidate in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def render_screen(rng):
+    """Render one window-like screen and return (image, ground truth lines)"""
+    background, foreground = rng.choice(THEMES)
+    width, height = 1280, 800
+    image = Image.new('RGB', (width, height), background)
+    draw = ImageDraw.Draw(image)
+    lines = []
+
+    title = ' '.join(rng.choice(VOCABULARY).capitalize() for _ in range(rng.randint(2, 5)))
+    draw.rectangle([0, 0, width, 40], fill=tuple(max(0, c - 25) for c in background))
+    draw.text((20, 10), title, fill=foreground, font=_font(18))
+    lines.append(title)
+
+    y = 70
+    size = rng.choice([14, 16, 18, 22])
+    font = _font(size)
+    while y + size * 2 < height:
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(4, 12))]
+        if rng.random() < 0.3:
+            words.append(f"${rng.randint(1, 999)}.{rng.randint(0, 99):02d}")
+        line = ' '.join(words)
+        draw.text((40, y), line, fill=foreground, font=font)
+        lines.append(line)
+        y += int(size * rng.choice([1.6, 2.0, 2.6]))
+    return image, lines
+
+
+def build_corpus(corpus_dir, screens):
+    """Render the corpus if needed and return (samples, corpus hash)"""
+    version_dir = os.path.join(corpus_dir, f'v{CORPUS_VERSION}')
+    truth_path = os.path.join(version_dir, 'truth.json')
+    try:
+        with open(truth_path, 'r', encoding='utf-8') as f:
+            truth = json.load(f)
+        if len(truth) < screens:
+            raise FileNotFoundError
+    except (FileNotFoundError, json.JSONDecodeError):
+        os.makedirs(version_dir, exist_ok=True)
+        rng = random.Random(CORPUS_SEED)
+        truth = {}
+        for i in range(screens):
+            image, lines = render_screen(rng)
+            name = f'screen_{i:03d}.png'
+            image.save(os.path.join(version_dir, name))
+            truth[name] = lines
+        with open(truth_path, 'w', encoding='utf-8') as f:
+            json.dump(truth, f, indent=2)
+
+    names = sorted(truth)[:screens]
+    digest = hashlib.sha256(json.dumps({n: truth[n] for n in names}).encode('utf-8')).hexdigest()[:12]
+    return [(os.path.join(version_dir, name), ' '.join(truth[name])) for name in names], digest
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two sequences"""
+    previous = list(range(len(b) + 1))
+    for i, item in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (item != other)))
+        previous = current
+    return previous[-1]
+
+
+def error_rates(predicted, truth):
+    """Character and word error rates after whitespace normalization"""
+    predicted, truth = ' '.join(predicted.split()), ' '.join(truth.split())
+    cer = edit_distance(predicted, truth) / max(1, len(truth))
+    wer = edit_distance(predicted.split(), truth.split()) / max(1, len(truth.split()))
+    return cer, wer
+
+
+def _run_engine(name, samples, results):
+    """Child process: load one engine and read every sample"""
+    process = psutil.Process()
+    base_rss = process.memory_info().rss
+    engine = get_engine(name)
+    start = time.perf_counter()
+    engine.load()
+    load_seconds = time.perf_counter() - start
+    peak_rss = process.memory_info().rss
+
+    latencies, cers, wers = [], [], []
+    for path, truth in samples:
+        with Image.open(path) as img:
+            frame = np.asarray(img.convert('RGB'))
+        start = time.perf_counter()
+        observations = engine.read(frame)
+        latencies.append(time.perf_counter() - start)
+        peak_rss = max(peak_rss, process.memory_info().rss)
+        cer, wer = error_rates(' '.join(obs[4] for obs in reading_order(observations)), truth)
+        cers.append(cer)
+        wers.append(wer)
+
+    steady = latencies[1:] or latencies
+    results[name] = {
+        'load_s': load_seconds,
+        'first_read_s': latencies[0],
+        'p50_ms': 1000 * float(np.percentile(steady, 50)),
+        'p90_ms': 1000 * float(np.percentile(steady, 90)),
+        'p99_ms': 1000 * float(np.percentile(steady, 99)),
+        'cer': float(np.mean(cers)),
+        'wer': float(np.mean(wers)),
+        'rss_mb': (peak_rss - base_rss) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engines', nargs='+', default=[name for name, e in ENGINES.items() if e.available()])
+    parser.add_argument('--screens', type=int, default=30, help='Number of corpus screens to read')
+    parser.add_argument('--corpus-dir', default=CORPUS_DIR)
+    parser.add_argument('--max-cer', type=float, default=0.05, help='Accuracy bar for the recommendation')
+    parser.add_argument('--json', help='Also write results to this file')
+    args = parser.parse_args()
+
+    samples, digest = build_corpus(args.corpus_dir, args.screens)
+    print(f"Corpus v{CORPUS_VERSION} ({digest}), {len(samples)} screens")
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Manager().dict()
+    for name in args.engines:
+        print(f"Running {name}...")
+        process = context.Process(target=_run_engine, args=(name, samples, results))
+        process.start()
+        process.join()
+        if name not in results:
+            print(f"  {name} failed (exit code {process.exitcode})")
+
+    print(f"\n{'engine':<10} {'load s':>7} {'first s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'CER':>6} {'WER':>6} {'RSS MB':>7}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['load_s']:>7.2f} {r['first_read_s']:>8.2f} {r['p50_ms']:>8.0f} {r['p90_ms']:>8.0f} "
+              f"{r['p99_ms']:>8.0f} {r['cer']:>6.3f} {r['wer']:>6.3f} {r['rss_mb']:>7.0f}")
+
+    passing = [name for name, r in results.items() if r['cer'] <= args.max_cer]
+    if passing:
+        best = min(passing, key=lambda name: results[name]['p50_ms'])
+        print(f"\nFastest engine with CER <= {args.max_cer}: {best}")
+    else:
+        print(f"\nNo engine reached CER <= {args.max_cer}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'corpus_version': CORPUS_VERSION, 'corpus_hash': digest, 'results': dict(results)}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
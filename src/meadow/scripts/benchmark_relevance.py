@@ -0,0 +1,123 @@
+"""Benchmark the BM25 keyword stage of the relevance cascade against the embedding-only filter
+
+Texts come from the OCR text of saved logs and/or a directory of .txt files.
+The embedding-only decision is treated as ground truth, so precision and
+recall describe how closely the cascade reproduces the current filter.
+Exits with status 1 if recall falls below --min-recall, so a threshold that
+drops relevant screens (e.g. paraphrases with no topic keywords) fails.
+
+Usage: python benchmark_relevance.py [--text-dir DIR] [--reject-below X] [--accept-above Y]
+                                     [--min-recall 0.98]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from meadow.core import lexical_filter
+from meadow.core.config import Config
+from meadow.core.topic_similarity import (MIN_CHUNKS_PER_TOPIC, get_streaming_relevance,
+                                          split_into_chunks)
+
+def load_texts(log_dir, text_dir):
+    """Collect OCR text from log files and plain text files"""
+    texts = []
+    for log_file in sorted(glob.glob(os.path.join(log_dir, 'log_*.json'))):
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                texts.extend(entry['ocr_text'] for entry in json.load(f) if entry.get('ocr_text'))
+        except (json.JSONDecodeError, OSError):
+            continue
+    if text_dir:
+        for text_file in sorted(glob.glob(os.path.join(text_dir, '*.txt'))):
+            with open(text_file, 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+    return texts
+
+def run_benchmark(texts, topics, topic_keywords, reject_below, accept_above):
+    """Compare cascade decisions with embedding-only decisions"""
+    keywords = lexical_filter.keywords_for_topics(topics, topic_keywords)
+    counts = {'tp': 0, 'fp': 0, 'fn': 0, 'tn': 0}
+    texts_avoided = chunks_avoided = chunks_total = 0
+    # Relevant texts sharing no keyword with any topic, which a reject threshold would drop
+    relevant_without_keywords = 0
+    lexical_time = embedding_time = 0.0
+
+    for text in texts:
+        chunks = split_into_chunks(text)
+        chunks_total += len(chunks)
+
+        start = time.perf_counter()
+        decision = lexical_filter.lexical_decision(chunks, keywords, MIN_CHUNKS_PER_TOPIC,
+                                                   reject_below, accept_above)
+        lexical_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = get_streaming_relevance(text, topics)['relevant']
+        embedding_time += time.perf_counter() - start
+        if reference and not lexical_filter.matching_chunks(chunks, keywords, MIN_CHUNKS_PER_TOPIC):
+            relevant_without_keywords += 1
+
+        if decision is None:
+            predicted = reference
+        else:
+            predicted = decision == 'accept'
+            texts_avoided += 1
+            chunks_avoided += len(chunks)
+
+        key = ('t' if predicted == reference else 'f') + ('p' if predicted else 'n')
+        counts[key] += 1
+
+    precision = counts['tp'] / (counts['tp'] + counts['fp']) if counts['tp'] + counts['fp'] else 1.0
+    recall = counts['tp'] / (counts['tp'] + counts['fn']) if counts['tp'] + counts['fn'] else 1.0
+    return {
+        'texts': len(texts),
+        'embedding_calls_avoided': texts_avoided,
+        'chunks_avoided': chunks_avoided,
+        'chunks_total': chunks_total,
+        'precision': precision,
+        'recall': recall,
+        'confusion': counts,
+        'relevant_without_keywords': relevant_without_keywords,
+        'lexical_ms_per_text': 1000 * lexical_time / max(len(texts), 1),
+        'embedding_ms_per_text': 1000 * embedding_time / max(len(texts), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--log-dir', default=os.path.join(Config().app_dir, 'data', 'logs'))
+    parser.add_argument('--text-dir', help='Directory of extra .txt samples (e.g. irrelevant screens)')
+    parser.add_argument('--reject-below', type=float, default=lexical_filter.LEXICAL_REJECT_BELOW)
+    parser.add_argument('--accept-above', type=float, default=lexical_filter.LEXICAL_ACCEPT_ABOVE)
+    parser.add_argument('--min-recall', type=float, default=0.98,
+                        help='Fail if the cascade keeps less than this share of embedding-relevant texts')
+    args = parser.parse_args()
+
+    config = Config()
+    texts = load_texts(args.log_dir, args.text_dir)
+    if not texts:
+        print("No texts found to benchmark")
+        return
+
+    results = run_benchmark(texts, config.get('research_topics'), config.get('topic_keywords'),
+                            args.reject_below, args.accept_above)
+    print(f"\nTexts: {results['texts']}")
+    reject = 'never' if args.reject_below is None else f"< {args.reject_below}"
+    print(f"Thresholds: reject {reject}, accept >= {args.accept_above}")
+    print(f"Embedding calls avoided: {results['embedding_calls_avoided']}/{results['texts']}"
+          f" ({results['chunks_avoided']}/{results['chunks_total']} chunks)")
+    print(f"Precision vs embedding-only: {results['precision']:.3f}")
+    print(f"Recall vs embedding-only: {results['recall']:.3f}")
+    print(f"Confusion: {results['confusion']}")
+    print(f"Relevant texts without topic keywords: {results['relevant_without_keywords']}")
+    print(f"Lexical stage: {results['lexical_ms_per_text']:.2f} ms/text, "
+          f"embedding stage: {results['embedding_ms_per_text']:.2f} ms/text")
+    if results['recall'] < args.min_recall:
+        print(f"FAIL: recall {results['recall']:.3f} is below {args.min_recall:.3f}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark startup: time to menubar icon and time to the web viewer's first HTTP response
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+Time to icon is the wall time of importing meadow.ui.menubar_app, which is
+everything that runs before the rumps icon appears. Time to first response is
+the time from starting a viewer process to its first answer on --path.
+
+Both runs are also checked with `python -X importtime` for heavy modules
+(torch, sentence-transformers, easyocr, PyMuPDF, anthropic), which must only
+be imported once a capture or PDF needs them. Exits with status 1 if a heavy
+module is imported at startup or a time is over its budget, so it can guard
+against import regressions.
+
+Usage: python benchmark_startup.py [--runs 5] [--max-icon-ms 1500]
+                                   [--max-http-ms 2500] [--path /settings] [--top 15]
+"""
+
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Imported lazily by the app; none may appear at startup
+HEAVY_MODULES = ('torch', 'sentence_transformers', 'easyocr', 'pymupdf', 'fitz', 'anthropic')
+
+ICON_MODULE = 'meadow.ui.menubar_app'
+VIEWER_MODULE = 'meadow.web.web_viewer'
+
+def import_profile(module):
+    """Run `python -X importtime -c 'import module'`
+
+    Returns (total cumulative microseconds, {top-level package: cumulative us}).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    total = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (field.strip() for field in line[len('import time:'):].split('|'))
+        package = name.split('.')[0]
+        # The outermost (last reported) import of a package holds its full cumulative time
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+        if name == module:
+            total = int(cumulative)
+    return total, packages
+
+def time_to_icon():
+    """Wall seconds for a fresh interpreter to import the menubar app"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {ICON_MODULE}'], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def time_to_first_response(path, timeout=60):
+    """Wall seconds from starting a viewer process to its first HTTP response"""
+    port = _free_port()
+    code = f'from {VIEWER_MODULE} import app; app.run(port={port}, debug=False, use_reloader=False)'
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Viewer exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=timeout):
+                    return time.perf_counter() - start
+            except urllib.error.HTTPError:
+                # An error page is still a response
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"No response from viewer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh processes per measurement (median is reported)')
+    parser.add_argument('--max-icon-ms', type=float, default=1500)
+    parser.add_argument('--max-http-ms', type=float, default=2500)
+    parser.add_argument('--path', default='/settings', help='Viewer page requested first')
+    parser.add_argument('--top', type=int, default=15, help='Slowest packages to list per module')
+    args = parser.parse_args()
+
+    failures = []
+    for module in (ICON_MODULE, VIEWER_MODULE):
+        total, packages = import_profile(module)
+        print(f"\nimport {module}: {total / 1000:.0f} ms cumulative (-X importtime)")
+        for package, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:<30} {cumulative / 1000:>8.1f} ms")
+        heavy = [name for name in HEAVY_MODULES if name in packages]
+        if heavy:
+            failures.append(f"{module} imports {', '.join(heavy)} at startup")
+
+    icon_ms = statistics.median(time_to_icon() for _ in range(args.runs)) * 1000
+    http_ms = statistics.median(time_to_first_response(args.path) for _ in range(args.runs)) * 1000
+    print(f"\nTime to icon (median of {args.runs}):           {icon_ms:>7.0f} ms (budget {args.max_icon_ms:.0f})")
+    print(f"Time to first HTTP response (median of {args.runs}): {http_ms:>7.0f} ms (budget {args.max_http_ms:.0f})")
+    if icon_ms > args.max_icon_ms:
+        failures.append(f"time to icon {icon_ms:.0f} ms is over {args.max_icon_ms:.0f} ms")
+    if http_ms > args.max_http_ms:
+        failures.append(f"time to first response {http_ms:.0f} ms is over {args.max_http_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Convert saved PNG screenshots into keyframe+delta frame archives
+
+Consecutive captures of the same app and window in each day log become one
+archive in the screenshots folder, log entries are repointed to
+"<archive>#<frame>", and the PNGs are deleted. Today's log is skipped
+because the analyzer is still appending to it.
+
+Usage: python migrate_frame_archive.py [--min-run N] [--day YYYYMMDD]
+"""
+
+import argparse
+import glob
+import os
+import time
+from datetime import datetime
+
+from meadow.core.frame_archive import FrameArchive, archive_day, load_image
+
+APP_DIR = os.path.expanduser('~/Library/Application Support/Meadow')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--min-run', type=int, default=2, help='Minimum captures of one window to archive')
+    parser.add_argument('--day', help='Only migrate this day (YYYYMMDD)')
+    args = parser.parse_args()
+
+    log_dir = os.path.join(APP_DIR, 'data', 'logs')
+    screenshot_dir = os.path.join(APP_DIR, 'data', 'screenshots')
+    today = datetime.now().strftime('%Y%m%d')
+
+    total_before = total_after = 0
+    start = time.perf_counter()
+    for log_path in sorted(glob.glob(os.path.join(log_dir, 'log_*.json'))):
+        day = os.path.basename(log_path)[4:12]
+        if day == today or (args.day and day != args.day):
+            continue
+        before, after = archive_day(log_path, screenshot_dir, min_run=args.min_run)
+        if before:
+            print(f"{day}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({before / after:.1f}x)")
+        total_before += before
+        total_after += after
+
+    if not total_after:
+        print("Nothing to migrate")
+        return
+    print(f"\nTotal: {total_before / 1e6:.1f} MB -> {total_after / 1e6:.1f} MB "
+          f"({total_before / total_after:.1f}x) in {time.perf_counter() - start:.1f}s")
+
+    # Random-access decode speed, which bounds the web viewer's thumbnail latency
+    archives = sorted(glob.glob(os.path.join(screenshot_dir, 'frames_*.mfa')))
+    if archives:
+        frames = len(FrameArchive(archives[-1]))
+        start = time.perf_counter()
+        for i in reversed(range(frames)):
+            load_image(f"{archives[-1]}#{i}").load()
+        print(f"Random-access decode: {1000 * (time.perf_counter() - start) / frames:.1f} ms/frame")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 """Menubar app for screen monitoring using rumps and Quartz"""
 
 import os
+import queue
 import threading
 import subprocess
 import json
@@ -8,12 +9,15 @@ import webbrowser
 import asyncio
 from datetime import datetime
 import rumps
-from meadow.core.screenshot_analyzer import analyze_and_log_screenshot
+from meadow.core.analysis_worker import AnalysisWorker
 from meadow.core.monitor import monitoring_loop, take_screenshot
 from meadow.core.markdown_bridge import process_analysis_result, process_saved_logs
-from meadow.core.config import Config
-from meadow.core.manicode_wrapper import execute_manicode
-from meadow.core.topic_similarity import initialize_model
+from meadow.core.config import Config, create_notes_structure
+from meadow.core.event_bus import get_event_bus
+from meadow.core.note_scheduler import NoteJobScheduler
+from meadow.core.notes_index import NotesIndex
+from meadow.core.storage_manager import StorageManager
+from meadow.core.topic_similarity import use_remote_embeddings
 
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=too-many-locals
@@ -23,7 +27,7 @@ class MenubarApp(rumps.App):
     captures screenshots and analyzes the user's activity.
     """
 
-    def __init__(self):
+    def __init__(self, analysis_worker=None):
         print("[DEBUG] Initializing MenubarApp...")
         try:
             self.timer_menu_item = None  # Initialize before super().__init__
@@ -33,19 +37,36 @@ class MenubarApp(rumps.App):
         except Exception as e:
             print(f"[ERROR] Failed to initialize MenubarApp: {e}")
             raise
+        # Only the analysis worker loads the model and writes the embedding cache
+        use_remote_embeddings()
         self.setup_config()
         self.setup_menu()
+        self.setup_note_scheduler()
+        # Recompress old screenshots and keep caches under the disk budget
+        self.storage_manager = StorageManager(self.app_dir, get_config=lambda: Config().get_all())
+        self.storage_manager.start()
+        # OCR, embeddings and Claude calls run in a separate process so the menubar stays responsive;
+        # the worker also warms the embedding model and reconciles batch results
+        self.analysis_worker = analysis_worker or AnalysisWorker().start()
         self.is_monitoring = False
         self.next_screenshot = None
         self.last_window_info = None
-        # Check config changes every 1 second
-        rumps.Timer(self.check_config_changes, 1).start()
+        # The web viewer announces config changes on the event bus; after a
+        # (re)connection, check once for changes made while it was away.
+        # Bus callbacks run on the reader thread, so they only raise a flag and
+        # a main-thread timer applies the change (rumps UI must not be touched off it)
+        self._config_changed = threading.Event()
+        bus = get_event_bus()
+        bus.subscribe('config', lambda topic, data: self._config_changed.set())
+        bus.on_connect(self._config_changed.set)
+        rumps.Timer(self.apply_config_changes, 1).start()
+        # Worker callbacks post title changes here for the main thread to apply
+        self._pending_titles = queue.SimpleQueue()
+        rumps.Timer(self.apply_pending_title, 0.2).start()
 
     def create_notes_structure(self, notes_dir):
         """Create the standard notes directory structure"""
-        os.makedirs(notes_dir, exist_ok=True)
-        os.makedirs(os.path.join(notes_dir, '_machine'), exist_ok=True)
-        os.makedirs(os.path.join(notes_dir, 'research'), exist_ok=True)
+        create_notes_structure(notes_dir)
 
     def setup_config(self):
         """Initialize configuration settings"""
@@ -90,11 +111,32 @@ class MenubarApp(rumps.App):
         """Save current configuration to file"""
         Config().update(self.config)
 
+    def apply_config_changes(self, _):
+        """Main-thread timer: reload the config if the event bus reported a change"""
+        if self._config_changed.is_set():
+            self._config_changed.clear()
+            self.check_config_changes(None)
+
+    def post_title(self, title):
+        """Set the menubar title from any thread"""
+        self._pending_titles.put(title)
+
+    def apply_pending_title(self, _):
+        """Main-thread timer: show the latest title posted by a background thread"""
+        title = None
+        while True:
+            try:
+                title = self._pending_titles.get_nowait()
+            except queue.Empty:
+                break
+        if title is not None:
+            self.title = title
+
     def check_config_changes(self, _):
         """Check for config changes and reload if needed"""
         try:
-            config = Config()
-            new_config = config.get_all()
+            # Another process wrote the file; the Config singleton still holds the old values
+            new_config = Config().reload()
             if new_config != self.config:
                 old_config = self.config
                 self.config = new_config
@@ -110,60 +152,63 @@ class MenubarApp(rumps.App):
         """Main monitoring loop"""
         # Pass function to get fresh config
         monitoring_loop(lambda: Config().get_all(), self.timer_menu_item, lambda: self.is_monitoring, self.data_dir,
-                       lambda title: setattr(self, 'title', title))
+                       lambda title: setattr(self, 'title', title), submit=self.analysis_worker.submit)
 
     def process_screenshot_analysis(self, analysis_result):
         """Process screenshot analysis result immediately"""
         if analysis_result and analysis_result.get('research_summary'):
             asyncio.run(process_analysis_result(analysis_result, self.config['notes_dir']))
 
-    async def generate_source_notes_with_manicode(self):
-        """Generate source notes from temp notes in the notes dir"""
-        instructions = """
-        1. Read the new markdown files in _machine/_staging/ and subfolders
-        2. Update or create topic-specific notes in _machine/ based on the content
-        3. Link related concepts using [[wiki-style]] links
-        4. Update the knowledge files in _machine/ to reflect new information
-        5. Clean up and organize notes in _machine/ as needed
-        """
-
-        # Execute manicode with the workspace
-        await execute_manicode(instructions, {
-            "cwd": self.config['notes_dir'],
-            "notes_dir": self.config['notes_dir']
-        }, allow_notes=True)
+    def setup_note_scheduler(self):
+        """Track newly staged notes so generation only sees what is new"""
+        def on_complete(generated):
+            # Runs on the scheduler's worker thread
+            self.post_title("📸")
+            if generated:
+                subprocess.run(['open', self.config['notes_dir']], check=True)
+
+        self.notes_index = NotesIndex(self.config['notes_dir'])
+        self.note_scheduler = NoteJobScheduler(self.config['notes_dir'], on_complete=on_complete,
+                                               notes_index=self.notes_index)
+
+        def start_watchers():
+            # The first notes index refresh parses every changed note, so keep it off the main thread
+            for watcher in (self.note_scheduler, self.notes_index):
+                try:
+                    watcher.start_watching()
+                except (ImportError, OSError) as e:
+                    # Without a watcher, both fall back to scanning when a run is requested
+                    print(f"[ERROR] Could not watch notes folder: {e}")
+
+        threading.Thread(target=start_watchers, daemon=True).start()
 
     @rumps.clicked("Analyze Current Window")
     def take_screenshot_and_analyze(self, _):
         """Take and analyze a screenshot of the current window."""
-        # Initialize model before analysis
         self.title = "📸 Analyzing..."
-        screenshot, image_path, timestamp, window_info = take_screenshot(self.data_dir)
+        frame = take_screenshot(self.data_dir)
         log_path = self.get_current_log_path()
 
-        def analyze_and_restore():
-            # Initialize model asynchronously
-            asyncio.run(initialize_model())
-            analysis_result = analyze_and_log_screenshot(screenshot, image_path, timestamp, window_info, log_path)
+        # Both callbacks run on the worker's supervisor thread
+        def show_topic(tags):
+            if tags.get('topic') and tags['topic'].lower() != 'none':
+                self.post_title(f"📸 {tags['topic']}")
+
+        def restore(analysis_result):
             if analysis_result:
-                self.process_screenshot_analysis(analysis_result)
-            self.title = "📸"
+                # Off the supervisor thread, which delivers every capture's results
+                threading.Thread(target=self.process_screenshot_analysis, args=(analysis_result,)).start()
+            self.post_title("📸")
 
-        threading.Thread(target=analyze_and_restore).start()
+        if not self.analysis_worker.submit(frame, log_path, deferred=False, on_update=show_topic, on_done=restore):
+            self.title = "📸"
 
     @rumps.clicked("Generate Source Notes")
     def handle_generate_source_notes(self, _):
-        """Generate source notes from the temp notes."""
+        """Generate source notes from newly staged notes."""
         self.title = "📝 Generating..."
-
-        async def generate():
-            try:
-                await self.generate_source_notes_with_manicode()
-                subprocess.run(['open', self.config['notes_dir']], check=True)
-            finally:
-                self.title = "📸"
-
-        threading.Thread(target=lambda: asyncio.run(generate())).start()
+        # Clicks during a run queue a single follow-up run instead of overlapping
+        self.note_scheduler.request_run()
 
     @rumps.clicked("Start Monitoring")
     def start_monitoring(self, _):
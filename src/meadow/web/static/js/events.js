@@ -0,0 +1,34 @@
+// Live updates from the analysis pipeline over server-sent events.
+// EventSource reconnects by itself if the viewer restarts.
+document.addEventListener('DOMContentLoaded', () => {
+    const log = document.querySelector('[data-log-date]');
+    const status = document.getElementById('live-status');
+    if (!log || !status || !window.EventSource) {
+        return;
+    }
+    let newEntries = 0;
+    const events = new EventSource('/events');
+
+    function show(text) {
+        status.hidden = false;
+        status.textContent = text;
+        if (newEntries) {
+            const link = document.createElement('a');
+            link.href = '/logs?date=' + log.dataset.logDate;
+            link.textContent = ' Show ' + newEntries + ' new ' + (newEntries === 1 ? 'capture' : 'captures');
+            status.appendChild(link);
+        }
+    }
+
+    events.addEventListener('capture.started', event => {
+        const capture = JSON.parse(event.data);
+        show('Analyzing ' + (capture.app || 'capture') + '...');
+    });
+    events.addEventListener('capture.analyzed', event => {
+        const capture = JSON.parse(event.data);
+        if (capture.kept && capture.date === log.dataset.logDate) {
+            newEntries += 1;
+        }
+        show(capture.kept ? 'Logged: ' + (capture.description || capture.app) : 'Last capture was not relevant.');
+    });
+});
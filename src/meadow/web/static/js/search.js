@@ -0,0 +1,40 @@
+function semanticSearch(event) {
+    event.preventDefault();
+    const query = document.getElementById('search-query').value.trim();
+    const results = document.getElementById('search-results');
+    if (!query) {
+        results.innerHTML = '';
+        return;
+    }
+    results.textContent = 'Searching...';
+    fetch('/api/semantic_search?q=' + encodeURIComponent(query))
+        .then(response => response.json())
+        .then(data => {
+            results.innerHTML = '';
+            if (data.error) {
+                results.textContent = data.error;
+                return;
+            }
+            if (!data.results.length) {
+                results.textContent = 'No matching captures';
+                return;
+            }
+            data.results.forEach(result => {
+                const item = document.createElement('div');
+                item.className = 'search-result';
+                const date = result.timestamp.slice(0, 10).replace(/-/g, '');
+                const link = document.createElement('a');
+                link.href = '/logs?date=' + date;
+                link.textContent = result.timestamp + ' | ' + (result.app || '') + ' - ' + (result.window || '');
+                const snippet = document.createElement('p');
+                snippet.className = 'ocr';
+                snippet.textContent = result.snippet;
+                item.appendChild(link);
+                item.appendChild(snippet);
+                results.appendChild(item);
+            });
+        })
+        .catch(() => {
+            results.textContent = 'Search failed';
+        });
+}
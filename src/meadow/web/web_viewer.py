@@ -6,26 +6,52 @@ import io
 import os
 import random
 import json
+import queue
 import string
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 import base64
 import hashlib
-from PIL import Image
-from flask import Flask, render_template_string, request, jsonify, redirect, render_template
-from meadow.ui.menubar_app import MenubarApp
-from meadow.core.pdf_analyzer import PDFAnalyzer
-from meadow.core.config import Config
+from flask import Flask, Response, render_template_string, request, jsonify, redirect, render_template
+from meadow.core.config import Config, create_notes_structure
+from meadow.core.event_bus import get_event_bus
+from meadow.core.lexical_filter import expand_topic_keywords
+from meadow.core.storage_manager import StorageManager
+from meadow.core.frame_archive import load_image
+from meadow.core.usage_ledger import read_ledger, rollup, spent_today
+
+# Tunable Parameters
+# -----------------
+# Seconds between keep-alive comments on idle event streams
+SSE_KEEPALIVE = 15
+# Events buffered per browser tab; a tab that falls further behind misses events
+SSE_QUEUE_SIZE = 100
+# Bus topics relayed to browsers
+SSE_TOPICS = ('capture', 'pipeline', 'config')
 
 app = Flask(__name__,
            template_folder=os.path.join(os.path.dirname(__file__), 'templates'),
            static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-pdf_analyzer = PDFAnalyzer()
+# Built on the first PDF upload; it imports PyMuPDF and anthropic, which no other page needs
+_pdf_analyzer = None
+
+def get_pdf_analyzer():
+    """Get or create the PDF analyzer"""
+    global _pdf_analyzer  # pylint: disable=global-statement
+    if _pdf_analyzer is None:
+        from meadow.core.pdf_analyzer import PDFAnalyzer  # pylint: disable=import-outside-toplevel
+        _pdf_analyzer = PDFAnalyzer()
+    return _pdf_analyzer
 
 # Cache for thumbnails
 thumbnail_cache = {}
 
 def get_thumbnail_base64(image_path):
     """Create base64 thumbnail from image path"""
+    if not image_path:
+        # Screenshot was deleted by the storage manager to stay under budget
+        return ""
     if image_path in thumbnail_cache:
         return thumbnail_cache[image_path]
 
@@ -44,7 +70,8 @@ def get_thumbnail_base64(image_path):
             pass
 
     try:
-        with Image.open(image_path) as img:
+        # Older captures may be frames inside a keyframe+delta archive
+        with load_image(image_path) as img:
             # Create thumbnail
             img.thumbnail((400, 300))
             # Save to cache
@@ -107,7 +134,7 @@ def analyze_pdf():
         pdf_hash = hashlib.sha256(base64.b64decode(pdf_data)).hexdigest()[:12]
 
         # Get analysis results and page images
-        markdown_results, page_images = pdf_analyzer.analyze_pdf(pdf_data)
+        markdown_results, page_images = get_pdf_analyzer().analyze_pdf(pdf_data)
 
         # Save page images to cache
         cache_dir = get_pdf_cache_dir()
@@ -149,6 +176,25 @@ def analyze_pdf():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/semantic_search')
+def api_semantic_search():
+    """Search all relevant captures by meaning"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    try:
+        k = min(int(request.args.get('k', 10)), 100)
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+
+    from meadow.core.semantic_search import semantic_search
+    start = time.perf_counter()
+    try:
+        results = semantic_search(query, k=k)
+    except TimeoutError:
+        return jsonify({'error': 'Search is unavailable until the Meadow menubar app is running'}), 503
+    return jsonify({'results': results, 'elapsed_ms': round(1000 * (time.perf_counter() - start), 1)})
+
 @app.route('/logs')
 def view_logs():
     """
@@ -201,6 +247,17 @@ def view_logs():
                            dates=dates,
                            selected_date=selected_date)
 
+@app.route('/usage')
+def view_usage():
+    """Claude token and cost rollups from the usage ledger"""
+    days = request.args.get('days', 30, type=int)
+    since = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    records = read_ledger(since=since)
+    rollups = {by: rollup(records, by) for by in ('day', 'app', 'domain', 'topic', 'kind')}
+    config = Config().get_all()
+    return render_template('usage.html', rollups=rollups, days=days, total=sum(r['usd'] for r in records),
+                           spent_today=spent_today(), budget=config.get('daily_budget_usd'))
+
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
     """Handle settings page and form submission"""
@@ -219,6 +276,23 @@ def settings():
             if 'research_topics' in request.form:
                 topics = [t.strip() for t in request.form['research_topics'].split('\n') if t.strip()]
                 updates['research_topics'] = topics
+                # Expand keywords once here so each capture only pays for a lookup
+                updates['topic_keywords'] = expand_topic_keywords(topics)
+
+            if request.form.get('storage_budget_mb'):
+                budget = int(request.form['storage_budget_mb'])
+                if budget > 0:
+                    updates['storage_budget_mb'] = budget
+
+            if request.form.get('compress_after_days'):
+                days = int(request.form['compress_after_days'])
+                if days > 0:
+                    updates['compress_after_days'] = days
+
+            if 'daily_budget_usd' in request.form:
+                budget = request.form['daily_budget_usd'].strip()
+                # Empty means no budget
+                updates['daily_budget_usd'] = float(budget) if budget and float(budget) > 0 else None
 
             if 'screenshot_dir' in request.form:
                 new_dir = request.form['screenshot_dir']
@@ -231,8 +305,7 @@ def settings():
                 if new_dir:
                     updates['notes_dir'] = new_dir
                     # Create full notes structure when directory changes
-                    menubarapp = MenubarApp()
-                    menubarapp.create_notes_structure(new_dir)
+                    create_notes_structure(new_dir)
 
             if 'anthropic_api_key' in request.form:
                 api_key = request.form['anthropic_api_key']
@@ -240,6 +313,8 @@ def settings():
                     config.set_api_key(api_key)
 
             config.update(updates)
+            # The menubar reloads its config when told, instead of polling the file
+            get_event_bus().publish('config.changed', {'keys': sorted(updates)})
             return '', 204
         except (ValueError, KeyError):
             pass
@@ -250,7 +325,9 @@ def settings():
     with open(template_path, 'r', encoding='utf-8') as f:
         template_content = f.read()
     config_dict = config.get_all()
-    return render_template_string(template_content, interval=config_dict['interval'], config=config_dict, stored_api_key=bool(stored_api_key))
+    storage = StorageManager(get_config=lambda: config_dict).usage()
+    return render_template_string(template_content, interval=config_dict['interval'], config=config_dict,
+                                  stored_api_key=bool(stored_api_key), storage=storage)
 
 def shutdown_viewer():
     """Shutdown the Flask server and cleanup resources"""
@@ -291,10 +368,54 @@ def initialize_config():
     os.makedirs(os.path.join(notes_dir, '_machine'), exist_ok=True)
     os.makedirs(os.path.join(notes_dir, 'research'), exist_ok=True)
 
+# One queue per open /events stream
+_sse_clients = []
+_sse_lock = threading.Lock()
+
+def _relay_event(topic, data):
+    """Copy a bus event to every open browser stream"""
+    with _sse_lock:
+        clients = list(_sse_clients)
+    for client in clients:
+        try:
+            client.put_nowait((topic, data))
+        except queue.Full:
+            pass
+
+@app.route('/events')
+def stream_events():
+    """Server-sent events relaying capture, pipeline and config events from the event bus"""
+    client = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+    with _sse_lock:
+        _sse_clients.append(client)
+
+    def generate():
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    topic, data = client.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {topic}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            with _sse_lock:
+                _sse_clients.remove(client)
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 def start_viewer():
     """Start the Flask server"""
     print("[DEBUG] Starting web viewer...")
     initialize_config()
+    # pylint: disable=import-outside-toplevel
+    from meadow.core.topic_similarity import use_remote_embeddings
+    # Queries are embedded by the analysis worker, the only writer of the embedding cache
+    use_remote_embeddings()
+    bus = get_event_bus()
+    for topic in SSE_TOPICS:
+        bus.subscribe(topic, _relay_event)
     app.run(port=5050, debug=False, use_reloader=False)
 
 if __name__ == '__main__':